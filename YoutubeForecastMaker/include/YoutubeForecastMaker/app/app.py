@@ -62,6 +62,7 @@ LLM_MODEL_NAME = params["model_name"]
 HEADLINE_PROMPT = params["headline_prompt"]
 HEADLINE_TEMPERATURE = params["headline_temperature"]
 ANALYSIS_TEMPERATURE = params["analysis_temperature"]
+HTTP_CONFIG = params.get("http") or {}
 
 if st.session_state.get('scoring_data') is None:
     st.session_state['scoring_data'] = dr.Dataset.get(params["scoring_data"]).get_as_dataframe()
@@ -95,7 +96,7 @@ def get_dateformat(endpoint: str, token: str, deployment_id: str) -> str:
 @st.cache_data(show_spinner=False)
 def scoreForecast(df, deployment_id, prediction_interval: str = "80", bound_at_zero: bool = False):
     predictions = helpers.make_datarobot_deployment_predictions(
-        ENDPOINT, API_KEY, df, deployment_id
+        ENDPOINT, API_KEY, df, deployment_id, http_config=HTTP_CONFIG
     )
     processed_predictions = helpers.process_predictions(
         predictions, prediction_interval=prediction_interval
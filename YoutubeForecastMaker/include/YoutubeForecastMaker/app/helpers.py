@@ -7,13 +7,15 @@
 
 from __future__ import annotations
 import os
-from typing import Any, Dict, Tuple, TYPE_CHECKING
+from typing import Any, Dict, Optional, Tuple, TYPE_CHECKING
 
 import datarobot as dr
 import pandas as pd
 import requests
 import streamlit as st
 from openai import AzureOpenAI
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 
 if TYPE_CHECKING:
     from kedro.io import DataCatalog
@@ -42,9 +44,61 @@ def get_kedro_catalog(kedro_project_root: str) -> DataCatalog:
     return st.session_state["KEDRO_CATALOG"]
 
 
+# Same as common/sessions.py in the pipeline package. The app image only contains the
+# files under app/ (see the Dockerfile), so it can't import the package.
+class TimeoutHTTPAdapter(HTTPAdapter):
+    """HTTPAdapter that applies a default timeout to requests that don't set one."""
+
+    def __init__(self, *args: Any, timeout: Tuple[float, float], **kwargs: Any):
+        self.timeout = timeout
+        super().__init__(*args, **kwargs)
+
+    def send(self, request: requests.PreparedRequest, **kwargs: Any) -> requests.Response:
+        if kwargs.get("timeout") is None:
+            kwargs["timeout"] = self.timeout
+        return super().send(request, **kwargs)
+
+
+@st.cache_resource(show_spinner=False)
+def get_http_session(
+    pool_size: int = 10,
+    connect_timeout_secs: float = 5,
+    read_timeout_secs: float = 60,
+    max_retries: int = 3,
+    backoff_factor: float = 0.5,
+) -> requests.Session:
+    """Keep-alive session shared across reruns, with pooling, gzip and retries.
+
+    POSTs are retried too: scoring a deployment has no side effects, so a prediction
+    request can safely be sent again after a 429 or 5xx.
+    """
+    retry = Retry(
+        total=max_retries,
+        backoff_factor=backoff_factor,
+        status_forcelist=(429, 500, 502, 503, 504),
+        allowed_methods=frozenset({"GET", "POST"}),
+        raise_on_status=False,
+    )
+    adapter = TimeoutHTTPAdapter(
+        pool_connections=pool_size,
+        pool_maxsize=pool_size,
+        max_retries=retry,
+        timeout=(connect_timeout_secs, read_timeout_secs),
+    )
+    session = requests.Session()
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+    session.headers["Accept-Encoding"] = "gzip"
+    return session
+
+
 @st.cache_data(show_spinner=False)
 def make_datarobot_deployment_predictions(
-    endpoint: str, token: str, data: pd.DataFrame, deployment_id: str
+    endpoint: str,
+    token: str,
+    data: pd.DataFrame,
+    deployment_id: str,
+    http_config: Optional[Dict[str, Any]] = None,
 ):
     """
     Make predictions on data provided using DataRobot deployment_id provided.
@@ -58,6 +112,8 @@ def make_datarobot_deployment_predictions(
         numeric_value,string
     deployment_id : str
         Deployment ID to make predictions with.
+    http_config : dict, optional
+        Keyword arguments for `get_http_session`
     forecast_point : str, optional
         Forecast point as timestamp in ISO format
     predictions_start_date : str, optional
@@ -75,6 +131,7 @@ def make_datarobot_deployment_predictions(
     DataRobotPredictionError if there are issues getting predictions from DataRobot
     """
     client = dr.Client(endpoint=endpoint, token=token)
+    session = get_http_session(**(http_config or {}))
 
     deployment = client.get(f"deployments/{deployment_id}/").json()
 
@@ -96,13 +153,13 @@ def make_datarobot_deployment_predictions(
     params = {"maxExplanations": 3}
 
     # Make API request for predictions
-    predictions_response = requests.post(
+    predictions_response = session.post(
         url, data=data.to_json(orient="records"), headers=headers, params=params # "Prediction Explanations aren't available because the validation partition doesn't contain the required number of rows."
     )
     # If we run into an issue, explanations may not be available.
     if predictions_response.status_code == 400:
         print(predictions_response.text) 
-        predictions_response = requests.post(
+        predictions_response = session.post(
             url, data=data.to_json(orient="records"), headers=headers, params=None
         )
     # Return a Python dict following the schema in the documentation
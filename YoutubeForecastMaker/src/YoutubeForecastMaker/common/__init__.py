@@ -0,0 +1 @@
+"""Utilities shared across the project's pipelines."""
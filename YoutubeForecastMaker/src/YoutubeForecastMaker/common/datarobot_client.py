@@ -0,0 +1,119 @@
+# Copyright 2024 DataRobot, Inc. and its affiliates.
+# All rights reserved.
+# DataRobot, Inc.
+# This is proprietary source code of DataRobot, Inc. and its
+# affiliates.
+# Released under the terms of DataRobot Tool and Utility Agreement.
+
+"""DataRobot clients for the nodes of a run, safe to use from runner threads.
+
+The SDK keeps one global client. Creating it with `dr.Client` replaces the client that
+nodes on other threads may be using, and costs a version check request, so it is done
+once per run by `hooks.DataRobotClientHooks`. Nodes call `configure_client` with their
+credentials, which is a no-op once the client is configured, so they also work outside
+a Kedro run (e.g. from a notebook).
+
+During a run the hooks also wrap every node in `node_client`, which sets the copy of
+the configured client owned by the runner thread as the SDK's context-local client.
+SDK calls and `rest_client` in the node use that copy, so nodes on different threads
+never share a connection pool. The `datarobotx.idp` helpers some nodes call run
+`dr.Client` themselves, which replaces the global client and, for the rest of that
+node, its context-local one. Nodes on other threads keep their copies, and later nodes
+copy the new client. Outside a node, e.g. in threads a node starts itself,
+`rest_client` also gives every thread its own copy.
+
+The context-local client is private to the SDK, so this module checks on import that
+the installed datarobot (pinned in requirements.txt) still has it.
+"""
+import contextvars
+import threading
+from contextlib import contextmanager
+from typing import Iterator, Optional, Tuple
+
+import datarobot as dr
+from datarobot.rest import RESTClientObject
+
+# Private to the SDK, see the module docstring
+_sdk_context_client = getattr(dr.client, "_context_client", None)
+if not isinstance(_sdk_context_client, contextvars.ContextVar):
+    raise ImportError(
+        f"datarobot {dr.__version__} has no context-local client (datarobot.client._context_client), "
+        "which nodes need to run on threads. Install the datarobot version pinned in requirements.txt"
+    )
+
+
+class _ConfiguredClient:
+    """Endpoint and token the global client was last configured for."""
+
+    credentials: Optional[Tuple[str, str]] = None
+
+
+_configured = _ConfiguredClient()
+_configure_lock = threading.Lock()
+_thread_clients = threading.local()
+_node_client: contextvars.ContextVar[Optional[RESTClientObject]] = contextvars.ContextVar(
+    "node_client", default=None
+)
+
+
+def configure_client(endpoint: str, token: str) -> RESTClientObject:
+    """Configure the global client for `endpoint` and `token` unless it already is.
+
+    Parameters
+    ----------
+    endpoint : str
+        DataRobot API endpoint
+    token : str
+        DataRobot API token
+
+    Returns
+    -------
+    RESTClientObject
+        The global client
+    """
+    with _configure_lock:
+        if _configured.credentials != (endpoint, token):
+            dr.Client(endpoint=endpoint, token=token)
+            _configured.credentials = (endpoint, token)
+        return dr.client.get_client()
+
+
+def _thread_copy(client: RESTClientObject) -> RESTClientObject:
+    """Copy of `client` owned by the calling thread, replaced when `client` changes."""
+    if getattr(_thread_clients, "source", None) is not client:
+        _thread_clients.client = client.copy()
+        _thread_clients.source = client
+    return _thread_clients.client
+
+
+@contextmanager
+def node_client() -> Iterator[RESTClientObject]:
+    """Run the enclosed code with the calling thread's copy of the configured client.
+
+    The copy is set as the SDK's context-local client, which only the calling thread
+    sees, and removed again on exit. Nodes that run one after the other on the same
+    thread reuse the copy and its connections.
+    """
+    client = _thread_copy(dr.client.get_client())
+    # The SDK has no public way to set the context-local client without also
+    # replacing the global one
+    sdk_token = _sdk_context_client.set(client)
+    token = _node_client.set(client)
+    try:
+        yield client
+    finally:
+        _node_client.reset(token)
+        _sdk_context_client.reset(sdk_token)
+
+
+def rest_client() -> RESTClientObject:
+    """Client for raw REST calls owned by the calling thread.
+
+    Inside `node_client` this is the node's client. Elsewhere it is a copy of the
+    global client per thread, because requests sessions are not guaranteed to be
+    thread-safe. The copy is replaced when the global client is reconfigured.
+    """
+    client = dr.client.get_client()
+    if client is _node_client.get():
+        return client
+    return _thread_copy(client)
@@ -0,0 +1,106 @@
+# Copyright 2024 DataRobot, Inc. and its affiliates.
+# All rights reserved.
+# DataRobot, Inc.
+# This is proprietary source code of DataRobot, Inc. and its
+# affiliates.
+# Released under the terms of DataRobot Tool and Utility Agreement.
+
+"""Shared AI Catalog name to id index."""
+import threading
+import time
+from typing import Dict, Optional
+
+import datarobot as dr
+
+DEFAULT_TTL_SECS = 300
+
+
+class DatasetIndex:
+    """Name to id index of AI Catalog datasets built from a single `Dataset.list()` call.
+
+    The index is rebuilt once it is older than `ttl_secs`, and once more on a lookup
+    miss so datasets created elsewhere since the last build are still found before a
+    node decides to create a duplicate. Misses are remembered per name, so a name that
+    doesn't exist triggers at most one rebuild per `ttl_secs`. Nodes that create a
+    dataset `register` it.
+
+    Parameters
+    ----------
+    ttl_secs : float
+        Seconds after which the index is rebuilt on the next lookup
+    """
+
+    def __init__(self, ttl_secs: float = DEFAULT_TTL_SECS):
+        self._ttl_secs = ttl_secs
+        self._index: Dict[str, str] = {}
+        self._built_at: Optional[float] = None
+        # Name -> time of the latest build it was missing from
+        self._misses: Dict[str, float] = {}
+        self._lock = threading.Lock()
+
+    def _build(self) -> None:
+        index: Dict[str, str] = {}
+        for dataset in dr.Dataset.list():
+            # Keep the first match, like the linear scans this replaces
+            index.setdefault(dataset.name, dataset.id)
+        self._index = index
+        self._built_at = time.monotonic()
+
+    def _is_stale(self) -> bool:
+        return self._built_at is None or time.monotonic() - self._built_at > self._ttl_secs
+
+    def get(self, name: str) -> Optional[str]:
+        """Return the id of the dataset called `name`, or None if there isn't one."""
+        with self._lock:
+            rebuilt = self._is_stale()
+            if rebuilt:
+                self._build()
+            if name in self._index:
+                return self._index[name]
+            missed_at = self._misses.get(name)
+            if not rebuilt and (missed_at is None or time.monotonic() - missed_at > self._ttl_secs):
+                self._build()
+            if name not in self._index:
+                self._misses[name] = self._built_at
+            return self._index.get(name)
+
+    def register(self, name: str, dataset_id: str) -> None:
+        """Record a dataset that was just created or renamed."""
+        with self._lock:
+            self._index[name] = str(dataset_id)
+            self._misses.pop(name, None)
+
+    def invalidate(self) -> None:
+        """Force a rebuild on the next lookup."""
+        with self._lock:
+            self._built_at = None
+            self._misses.clear()
+
+
+_indexes: Dict[str, DatasetIndex] = {}
+_indexes_lock = threading.Lock()
+
+
+def get_dataset_index() -> DatasetIndex:
+    """Return the index for the DataRobot endpoint of the configured client."""
+    endpoint = dr.client.get_client().endpoint
+    with _indexes_lock:
+        if endpoint not in _indexes:
+            _indexes[endpoint] = DatasetIndex()
+        return _indexes[endpoint]
+
+
+def find_dataset_id(name: str) -> Optional[str]:
+    """Check if a dataset with the given name exists in the AI Catalog.
+
+    Parameters
+    ----------
+    name : str
+        Exact name of the dataset
+
+    Returns
+    -------
+    str or None :
+        Id of the dataset, None if it doesn't exist
+    """
+    return get_dataset_index().get(name)
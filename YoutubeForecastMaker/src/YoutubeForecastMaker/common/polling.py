@@ -0,0 +1,133 @@
+# Copyright 2024 DataRobot, Inc. and its affiliates.
+# All rights reserved.
+# DataRobot, Inc.
+# This is proprietary source code of DataRobot, Inc. and its
+# affiliates.
+# Released under the terms of DataRobot Tool and Utility Agreement.
+
+"""Polling with capped exponential backoff, for one resource or several at once.
+
+A fixed interval either wastes time on resources that are ready quickly or sends a
+request every few seconds to ones that take minutes. `poll` checks again quickly at
+first and backs off up to a cap. Deadlines are measured on a monotonic clock, so the
+time spent in requests counts against the timeout. `poll_many` waits on several
+resources concurrently and reports the total time waited.
+"""
+import random
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict, Iterator, Optional, Tuple, TypeVar, Union
+
+T = TypeVar("T")
+
+DEFAULT_INITIAL_INTERVAL_SECS = 0.5
+DEFAULT_MAX_INTERVAL_SECS = 15.0
+DEFAULT_MAX_WORKERS = 8
+
+
+def backoff_intervals(
+    initial_interval_secs: float = DEFAULT_INITIAL_INTERVAL_SECS,
+    max_interval_secs: float = DEFAULT_MAX_INTERVAL_SECS,
+    factor: float = 1.5,
+    jitter: float = 0.1,
+) -> Iterator[float]:
+    """Endless sequence of sleeps growing by `factor` up to `max_interval_secs`.
+
+    Every sleep is randomized by +/- `jitter` so pollers started together don't send
+    their requests in lockstep.
+    """
+    interval = initial_interval_secs
+    while True:
+        yield interval * random.uniform(1 - jitter, 1 + jitter)
+        interval = min(max_interval_secs, interval * factor)
+
+
+def poll(
+    check: Callable[[], Optional[T]],
+    timeout_secs: float,
+    initial_interval_secs: float = DEFAULT_INITIAL_INTERVAL_SECS,
+    max_interval_secs: float = DEFAULT_MAX_INTERVAL_SECS,
+    description: str = "resource",
+) -> Tuple[T, float]:
+    """Call `check` until it returns something other than None.
+
+    Parameters
+    ----------
+    check : callable
+        Returns the result once the resource is ready, None while it isn't
+    timeout_secs : float
+        Seconds after which to give up, including the time spent in `check`
+    initial_interval_secs : float
+        Sleep after the first check
+    max_interval_secs : float
+        Longest sleep between checks
+    description : str
+        What is waited for, used in the timeout message
+
+    Returns
+    -------
+    tuple
+        The result of `check` and the seconds waited for it
+
+    Raises
+    ------
+    TimeoutError
+        If the resource isn't ready after `timeout_secs`
+    """
+    started = time.monotonic()
+    deadline = started + timeout_secs
+    intervals = backoff_intervals(initial_interval_secs, max_interval_secs)
+    while True:
+        result = check()
+        now = time.monotonic()
+        if result is not None:
+            return result, now - started
+        if now >= deadline:
+            raise TimeoutError(f"Timed out after {now - started:.1f}s waiting for {description}")
+        # The last check happens at the deadline rather than after it
+        time.sleep(min(next(intervals), deadline - now))
+
+
+def poll_many(
+    checks: Dict[str, Callable[[], Optional[T]]],
+    timeout_secs: float,
+    initial_interval_secs: float = DEFAULT_INITIAL_INTERVAL_SECS,
+    max_interval_secs: float = DEFAULT_MAX_INTERVAL_SECS,
+    max_workers: int = DEFAULT_MAX_WORKERS,
+) -> Tuple[Dict[str, Union[T, Exception]], float]:
+    """Poll several resources concurrently, each with its own backoff, see `poll`.
+
+    Parameters
+    ----------
+    checks : dict
+        Check of every resource, keyed by a name for the resource
+    timeout_secs : float
+        Seconds after which to give up on a resource
+    initial_interval_secs : float
+        Sleep after the first check of a resource
+    max_interval_secs : float
+        Longest sleep between checks of a resource
+    max_workers : int
+        Number of resources polled at the same time
+
+    Returns
+    -------
+    tuple
+        The result of every check in the order of `checks`, or the exception it raised
+        (a TimeoutError if it timed out), and the seconds waited for all of them
+    """
+    started = time.monotonic()
+    with ThreadPoolExecutor(max_workers=max(1, min(max_workers, len(checks)))) as executor:
+        futures = {
+            key: executor.submit(
+                poll, check, timeout_secs, initial_interval_secs, max_interval_secs, key
+            )
+            for key, check in checks.items()
+        }
+    results: Dict[str, Union[T, Exception]] = {}
+    for key, future in futures.items():
+        try:
+            results[key] = future.result()[0]
+        except Exception as e:
+            results[key] = e
+    return results, time.monotonic() - started
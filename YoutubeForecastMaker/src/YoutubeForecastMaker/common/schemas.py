@@ -0,0 +1,122 @@
+# Copyright 2024 DataRobot, Inc. and its affiliates.
+# All rights reserved.
+# DataRobot, Inc.
+# This is proprietary source code of DataRobot, Inc. and its
+# affiliates.
+# Released under the terms of DataRobot Tool and Utility Agreement.
+
+"""Column types of the time series and metadata frames.
+
+The Youtube API returns counters as strings and the AI Catalog returns whatever its
+CSV parser inferred, so frames are cast to these types as soon as they are built or
+downloaded and stay typed until they are uploaded again.
+"""
+from typing import Optional
+
+import pandas as pd
+
+# Snapshot times are wall-clock times in this timezone in the AI Catalog and the local store
+TIMESERIES_TIMEZONE = "America/New_York"
+
+COUNTER_COLUMNS = ["viewCount", "likeCount", "commentCount"]
+CATEGORICAL_COLUMNS = ["video_id", "channelId", "categoryId"]
+STRING_COLUMNS = ["title", "channelTitle", "tags"]
+
+_DURATION_PATTERN = r"^P(?:(?P<days>\d+)D)?(?:T(?:(?P<hours>\d+)H)?(?:(?P<minutes>\d+)M)?(?:(?P<seconds>\d+)S)?)?$"
+_DURATION_SECONDS = {"days": 86400, "hours": 3600, "minutes": 60, "seconds": 1}
+
+
+def parse_duration(values: pd.Series) -> pd.Series:
+    """Convert ISO 8601 durations (e.g. "PT4M13S") to whole seconds.
+
+    Values that are already numeric are kept, anything unparseable becomes <NA>.
+    """
+    numeric = pd.to_numeric(values, errors="coerce")
+    parts = values.astype("string").str.extract(_DURATION_PATTERN)
+    matched = values.astype("string").str.match(_DURATION_PATTERN).fillna(False).astype(bool)
+
+    seconds = pd.Series(0, index=values.index, dtype="Int64")
+    for unit, factor in _DURATION_SECONDS.items():
+        seconds += pd.to_numeric(parts[unit]).fillna(0).astype("Int64") * factor
+    return numeric.round().astype("Int64").where(numeric.notna(), seconds.where(matched))
+
+
+def to_datetime_tz(values: pd.Series, tz: str) -> pd.Series:
+    """Parse datetimes, treating naive values as wall-clock times in `tz`.
+
+    Ambiguous wall-clock times at the end of daylight saving time are read as standard time.
+    """
+    values = pd.to_datetime(values, errors="coerce")
+    if values.dt.tz is None:
+        return values.dt.tz_localize(tz, ambiguous=False, nonexistent="shift_forward")
+    return values.dt.tz_convert(tz)
+
+
+def repeated_hour_start(latest: pd.Timestamp, tz: str = TIMESERIES_TIMEZONE) -> Optional[pd.Timestamp]:
+    """Where snapshots stop being final while `latest` is in the hour that repeats in `tz`.
+
+    Wall-clock times repeat when daylight saving time ends and are all read as standard
+    time (see `to_datetime_tz`), so a later pull can still add snapshots that sort before
+    `latest`. Every snapshot read from the repeated hour is at or after the returned
+    time, every snapshot before it is earlier. None when `latest` isn't in a repeated hour.
+    """
+    if latest is None or pd.isna(latest):
+        return None
+    latest = pd.Timestamp(latest)
+    # The daylight saving time reading of the same wall-clock time
+    earlier = latest.tz_convert(tz).tz_localize(None).tz_localize(tz, ambiguous=True)
+    return earlier if earlier < latest else None
+
+
+def to_wall_time(values: pd.Series, tz: str = TIMESERIES_TIMEZONE) -> pd.Series:
+    """Naive wall-clock times in `tz`, the representation used in storage and uploads."""
+    values = pd.to_datetime(values)
+    if values.dt.tz is None:
+        return values
+    return values.dt.tz_convert(tz).dt.tz_localize(None)
+
+
+def apply_timeseries_schema(data_frame: pd.DataFrame) -> pd.DataFrame:
+    """Nullable int64 counters, categorical `video_id` and tz-aware `as_of_datetime`."""
+    data_frame = data_frame.copy()
+    for column in COUNTER_COLUMNS:
+        if column in data_frame:
+            data_frame[column] = pd.to_numeric(data_frame[column], errors="coerce").astype("Int64")
+    if "video_id" in data_frame:
+        data_frame["video_id"] = data_frame["video_id"].astype(str).astype("category")
+    if "as_of_datetime" in data_frame:
+        data_frame["as_of_datetime"] = to_datetime_tz(data_frame["as_of_datetime"], TIMESERIES_TIMEZONE)
+    return data_frame
+
+
+def apply_metadata_schema(data_frame: pd.DataFrame) -> pd.DataFrame:
+    """Categorical ids, string text columns, UTC `publishedAt` and `duration` in seconds."""
+    data_frame = data_frame.copy()
+    for column in CATEGORICAL_COLUMNS:
+        if column in data_frame:
+            # Category ids come back from the catalog as numbers
+            data_frame[column] = data_frame[column].astype("string").astype("category")
+    for column in STRING_COLUMNS:
+        if column in data_frame:
+            # Empty strings come back from the catalog as missing values
+            data_frame[column] = data_frame[column].astype("string").replace("", pd.NA)
+    if "publishedAt" in data_frame:
+        data_frame["publishedAt"] = to_datetime_tz(data_frame["publishedAt"], "UTC")
+    if "duration" in data_frame:
+        data_frame["duration"] = parse_duration(data_frame["duration"])
+    if "madeForKids" in data_frame:
+        data_frame["madeForKids"] = data_frame["madeForKids"].astype("boolean")
+    return data_frame
+
+
+def to_upload_frame(data_frame: pd.DataFrame) -> pd.DataFrame:
+    """Drop timezones so datetimes are uploaded in the format the catalog already holds.
+
+    `as_of_datetime` becomes wall-clock time in `TIMESERIES_TIMEZONE`, other datetimes UTC.
+    """
+    data_frame = data_frame.copy()
+    for column in data_frame.columns:
+        if isinstance(data_frame[column].dtype, pd.DatetimeTZDtype):
+            tz = TIMESERIES_TIMEZONE if column == "as_of_datetime" else "UTC"
+            data_frame[column] = to_wall_time(data_frame[column], tz)
+    return data_frame
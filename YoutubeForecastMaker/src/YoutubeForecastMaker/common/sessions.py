@@ -0,0 +1,101 @@
+# Copyright 2024 DataRobot, Inc. and its affiliates.
+# All rights reserved.
+# DataRobot, Inc.
+# This is proprietary source code of DataRobot, Inc. and its
+# affiliates.
+# Released under the terms of DataRobot Tool and Utility Agreement.
+
+"""Pooled HTTP sessions for outbound calls made by the pipeline nodes."""
+import threading
+from typing import Any, Dict, Optional, Tuple
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+RETRY_STATUS_CODES = (429, 500, 502, 503, 504)
+
+_sessions: Dict[Tuple[Tuple[str, Any], ...], requests.Session] = {}
+_sessions_lock = threading.Lock()
+
+
+class TimeoutHTTPAdapter(HTTPAdapter):
+    """HTTPAdapter that applies a default timeout to requests that don't set one."""
+
+    def __init__(self, *args: Any, timeout: Tuple[float, float], **kwargs: Any):
+        self.timeout = timeout
+        super().__init__(*args, **kwargs)
+
+    def send(self, request: requests.PreparedRequest, **kwargs: Any) -> requests.Response:
+        if kwargs.get("timeout") is None:
+            kwargs["timeout"] = self.timeout
+        return super().send(request, **kwargs)
+
+
+def make_session(
+    pool_size: int = 10,
+    connect_timeout_secs: float = 5,
+    read_timeout_secs: float = 30,
+    max_retries: int = 3,
+    backoff_factor: float = 0.5,
+) -> requests.Session:
+    """Create a keep-alive session with connection pooling, gzip and retries.
+
+    Parameters
+    ----------
+    pool_size : int
+        Number of connections kept alive per host
+    connect_timeout_secs : float
+        Default connect timeout for requests that don't pass one
+    read_timeout_secs : float
+        Default read timeout for requests that don't pass one
+    max_retries : int
+        Number of retries on connection errors and 429/5xx responses
+    backoff_factor : float
+        urllib3 exponential backoff factor between retries
+
+    Returns
+    -------
+    requests.Session
+    """
+    retry = Retry(
+        total=max_retries,
+        backoff_factor=backoff_factor,
+        status_forcelist=RETRY_STATUS_CODES,
+        respect_retry_after_header=True,
+        # Hand the last response back to the caller instead of raising MaxRetryError
+        raise_on_status=False,
+    )
+    adapter = TimeoutHTTPAdapter(
+        pool_connections=pool_size,
+        pool_maxsize=pool_size,
+        max_retries=retry,
+        timeout=(connect_timeout_secs, read_timeout_secs),
+    )
+
+    session = requests.Session()
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+    # Google APIs only compress responses when the user agent also mentions gzip
+    session.headers["Accept-Encoding"] = "gzip"
+    session.headers["User-Agent"] = f"{requests.utils.default_user_agent()} (gzip)"
+    return session
+
+
+def get_session(http_config: Optional[Dict[str, Any]] = None) -> requests.Session:
+    """Return the session shared by all callers that use the same configuration.
+
+    Parameters
+    ----------
+    http_config : dict, optional
+        Keyword arguments for `make_session`, usually the `http` block of parameters.yml
+
+    Returns
+    -------
+    requests.Session
+    """
+    key = tuple(sorted((http_config or {}).items()))
+    with _sessions_lock:
+        if key not in _sessions:
+            _sessions[key] = make_session(**dict(key))
+        return _sessions[key]
@@ -0,0 +1,194 @@
+# Copyright 2024 DataRobot, Inc. and its affiliates.
+# All rights reserved.
+# DataRobot, Inc.
+# This is proprietary source code of DataRobot, Inc. and its
+# affiliates.
+# Released under the terms of DataRobot Tool and Utility Agreement.
+
+"""Local, append-only store for the raw time series snapshots."""
+import datetime
+import json
+import pathlib
+from typing import Any, Dict, List, Optional, Union
+
+import pandas as pd
+import pyarrow as pa
+import pyarrow.dataset as ds
+
+from .schemas import COUNTER_COLUMNS, to_wall_time
+
+SCHEMA = pa.schema(
+    [
+        ("video_id", pa.string()),
+        ("viewCount", pa.int64()),
+        ("likeCount", pa.int64()),
+        ("commentCount", pa.int64()),
+        ("as_of_datetime", pa.timestamp("ns")),
+    ]
+)
+PARTITION_COLUMN = "as_of_date"
+PARTITIONING = ds.partitioning(
+    pa.schema([(PARTITION_COLUMN, pa.date32())]), flavor="hive"
+)
+DATASET_SCHEMA = SCHEMA.append(pa.field(PARTITION_COLUMN, pa.date32()))
+
+
+class LocalTimeSeriesStore:
+    """Authoritative local copy of the raw time series data.
+
+    Snapshots are appended as parquet files partitioned by the date of their
+    `as_of_datetime`, so adding a snapshot costs the same regardless of how much history
+    has been collected, and reads can skip partitions and row groups outside the
+    requested window. A small state file keeps the watermark (latest `as_of_datetime`
+    stored) and how many snapshots were appended since the history was last uploaded
+    to the AI Catalog.
+
+    Parameters
+    ----------
+    filepath : str or pathlib.Path
+        Directory holding the store
+    """
+
+    def __init__(self, filepath: Union[str, pathlib.Path]):
+        self._path = pathlib.Path(filepath)
+        self._data_path = self._path / "data"
+        self._state_path = self._path / "state.json"
+
+    def _load_state(self) -> Dict[str, Any]:
+        if not self._state_path.exists():
+            return {"watermark": None, "snapshots_since_materialization": 0}
+        return json.loads(self._state_path.read_text())
+
+    def _save_state(self, state: Dict[str, Any]) -> None:
+        self._path.mkdir(parents=True, exist_ok=True)
+        self._state_path.write_text(json.dumps(state, indent=2))
+
+    @staticmethod
+    def _to_table(data_frame: pd.DataFrame) -> pa.Table:
+        # The API returns counters as strings while catalog downloads return numbers
+        data_frame = data_frame.copy()
+        for column in COUNTER_COLUMNS:
+            data_frame[column] = pd.to_numeric(data_frame[column]).astype("Int64")
+        data_frame["video_id"] = data_frame["video_id"].astype(str)
+        data_frame["as_of_datetime"] = to_wall_time(data_frame["as_of_datetime"])
+        return pa.Table.from_pandas(
+            data_frame[SCHEMA.names], schema=SCHEMA, preserve_index=False
+        )
+
+    def _write(self, data_frame: pd.DataFrame, basename: str) -> None:
+        dates = to_wall_time(data_frame["as_of_datetime"]).dt.date
+        for date, partition in data_frame.groupby(dates):
+            partition_path = self._data_path / f"{PARTITION_COLUMN}={date.isoformat()}"
+            partition_path.mkdir(parents=True, exist_ok=True)
+            ds.write_dataset(
+                self._to_table(partition),
+                partition_path,
+                format="parquet",
+                basename_template="part-" + basename + "-{i}.parquet",
+                existing_data_behavior="overwrite_or_ignore",
+            )
+
+    def is_empty(self) -> bool:
+        return not self._data_path.exists() or not any(self._data_path.rglob("*.parquet"))
+
+    @property
+    def watermark(self) -> Optional[pd.Timestamp]:
+        """Latest `as_of_datetime` in the store, if any."""
+        watermark = self._load_state()["watermark"]
+        return None if watermark is None else pd.Timestamp(watermark)
+
+    @property
+    def snapshots_since_materialization(self) -> int:
+        return self._load_state()["snapshots_since_materialization"]
+
+    def append(self, data_frame: pd.DataFrame) -> None:
+        """Add one snapshot to the store and advance the watermark."""
+        as_of = to_wall_time(data_frame["as_of_datetime"]).max()
+        self._write(data_frame, f"{as_of:%Y%m%dT%H%M%S}")
+
+        state = self._load_state()
+        if state["watermark"] is None or as_of > pd.Timestamp(state["watermark"]):
+            state["watermark"] = as_of.isoformat()
+        state["snapshots_since_materialization"] += 1
+        self._save_state(state)
+
+    def bootstrap(self, data_frame: pd.DataFrame) -> None:
+        """Seed an empty store with history that is already in the AI Catalog."""
+        self._write(data_frame, "bootstrap")
+        self._save_state(
+            {
+                "watermark": to_wall_time(data_frame["as_of_datetime"]).max().isoformat(),
+                "snapshots_since_materialization": 0,
+            }
+        )
+
+    def read(
+        self,
+        start: Optional[Union[str, datetime.datetime]] = None,
+        end: Optional[Union[str, datetime.datetime]] = None,
+        video_ids: Optional[List[str]] = None,
+        columns: Optional[List[str]] = None,
+    ) -> pd.DataFrame:
+        """Read the snapshots in a window, sorted by `as_of_datetime`.
+
+        Filters are pushed down to the parquet scan: date partitions outside
+        `[start, end]` are never opened and row groups are skipped using their statistics.
+
+        Parameters
+        ----------
+        start : str or datetime, optional
+            Earliest `as_of_datetime` to include
+        end : str or datetime, optional
+            Latest `as_of_datetime` to include
+        video_ids : list of str, optional
+            Only include these videos
+        columns : list of str, optional
+            Only read these columns (defaults to all columns of the schema)
+
+        Returns
+        -------
+        pd.DataFrame
+        """
+        if self.is_empty():
+            return SCHEMA.empty_table().to_pandas(types_mapper=_types_mapper)
+
+        expression = None
+        conditions = []
+        if start is not None:
+            start = pd.Timestamp(start)
+            conditions += [
+                ds.field(PARTITION_COLUMN) >= start.date(),
+                ds.field("as_of_datetime") >= start.to_datetime64(),
+            ]
+        if end is not None:
+            end = pd.Timestamp(end)
+            conditions += [
+                ds.field(PARTITION_COLUMN) <= end.date(),
+                ds.field("as_of_datetime") <= end.to_datetime64(),
+            ]
+        if video_ids is not None:
+            conditions.append(ds.field("video_id").isin(list(video_ids)))
+        for condition in conditions:
+            expression = condition if expression is None else expression & condition
+
+        dataset = ds.dataset(
+            self._data_path, schema=DATASET_SCHEMA, format="parquet", partitioning=PARTITIONING
+        )
+        table = dataset.to_table(columns=columns or SCHEMA.names, filter=expression)
+        data_frame = table.to_pandas(types_mapper=_types_mapper)
+        if "as_of_datetime" in data_frame:
+            data_frame = data_frame.sort_values("as_of_datetime", kind="stable")
+        return data_frame.reset_index(drop=True)
+
+    def mark_materialized(self) -> None:
+        """Record that the full history has just been uploaded to the AI Catalog."""
+        state = self._load_state()
+        state["snapshots_since_materialization"] = 0
+        self._save_state(state)
+
+
+def _types_mapper(arrow_type: pa.DataType) -> Optional[Any]:
+    # Keep missing counters as <NA> instead of turning the column into floats
+    if arrow_type == pa.int64():
+        return pd.Int64Dtype()
+    return None
@@ -0,0 +1,2 @@
+"""Custom Kedro datasets for the project."""
+from .timeseries_parquet_dataset import TimeSeriesParquetDataset  # NOQA
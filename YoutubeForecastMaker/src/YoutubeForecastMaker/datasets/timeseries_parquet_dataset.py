@@ -0,0 +1,54 @@
+# Copyright 2024 DataRobot, Inc. and its affiliates.
+# All rights reserved.
+# DataRobot, Inc.
+# This is proprietary source code of DataRobot, Inc. and its
+# affiliates.
+# Released under the terms of DataRobot Tool and Utility Agreement.
+
+from typing import Any, Dict, Optional
+
+import pandas as pd
+from kedro.io import AbstractDataset
+
+from ..common.timeseries_store import LocalTimeSeriesStore
+
+
+class TimeSeriesParquetDataset(AbstractDataset[pd.DataFrame, LocalTimeSeriesStore]):
+    """Kedro dataset for the local raw time series store.
+
+    Loading returns the `LocalTimeSeriesStore` itself rather than a DataFrame so nodes
+    can read only the window they need with `store.read(start=..., end=..., video_ids=...)`.
+    Saving appends a snapshot.
+
+    Example catalog entry:
+
+    .. code-block:: yaml
+
+        get_data_pipeline.timeseries_store:
+          type: YoutubeForecastMaker.datasets.TimeSeriesParquetDataset
+          filepath: data/timeseries_store
+
+    Parameters
+    ----------
+    filepath : str
+        Directory holding the partitioned parquet files and the store state
+    metadata : dict, optional
+        Arbitrary metadata, ignored by Kedro
+    """
+
+    def __init__(self, filepath: str, metadata: Optional[Dict[str, Any]] = None):
+        self._filepath = filepath
+        self._store = LocalTimeSeriesStore(filepath)
+        self.metadata = metadata
+
+    def _load(self) -> LocalTimeSeriesStore:
+        return self._store
+
+    def _save(self, data: pd.DataFrame) -> None:
+        self._store.append(data)
+
+    def _exists(self) -> bool:
+        return not self._store.is_empty()
+
+    def _describe(self) -> Dict[str, Any]:
+        return {"filepath": self._filepath}
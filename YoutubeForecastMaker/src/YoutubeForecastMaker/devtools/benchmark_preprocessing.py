@@ -0,0 +1,252 @@
+# Copyright 2024 DataRobot, Inc. and its affiliates.
+# All rights reserved.
+# DataRobot, Inc.
+# This is proprietary source code of DataRobot, Inc. and its
+# affiliates.
+# Released under the terms of DataRobot Tool and Utility Agreement.
+
+"""Benchmark the preprocessing transforms and app helpers on synthetic data.
+
+Times the in-memory transforms of the data_prep pipeline (no DataRobot I/O) and, when
+the app's dependencies are installed, `helpers.process_predictions` and
+`helpers.get_prompt` at several scales. Run it with
+
+    python -m <package>.devtools.benchmark_preprocessing --scales 100,10000 --days 3
+
+Every case prints one JSON line with its scale, input and output rows, the best wall
+time of `--repeat` runs and the tracemalloc peak of one more run. The first line
+describes the environment. Pass `--output` to append the lines to a file and compare
+scaling curves between releases.
+"""
+import argparse
+import datetime
+import importlib.util
+import json
+import pathlib
+import platform
+import time
+import tracemalloc
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple
+
+import pandas as pd
+
+from ..common.schemas import to_upload_frame, to_wall_time
+from ..pipelines.preprocessing.nodes import downsample_timeseries, join_metadata
+from .synthetic_data import (
+    generate_metadata,
+    generate_prediction_explanations,
+    generate_predictions,
+    generate_timeseries,
+)
+
+DOWNSAMPLING = {
+    "every_third": {"method": "every_third"},
+    "grid": {"method": "grid", "freq": "90min", "fill_gaps": False},
+}
+# Fixed so runs on different days generate the same data
+END = "2024-06-30 23:30:00"
+# Pulls since the previous run in the incremental cases, one 90 minute grid step
+INCREMENTAL_PULLS = 3
+
+
+def _measure(
+    func: Callable[[], Any], repeat: int, memory: bool
+) -> Tuple[Any, Dict[str, Any]]:
+    """Best wall time of `repeat` runs, then the allocation peak of one traced run."""
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        result = func()
+        timings.append(time.perf_counter() - started)
+
+    measurements: Dict[str, Any] = {
+        "wall_secs": round(min(timings), 4),
+        "wall_secs_all": [round(t, 4) for t in timings],
+    }
+    if memory:
+        tracemalloc.start()
+        try:
+            func()
+            measurements["peak_alloc_mb"] = round(tracemalloc.get_traced_memory()[1] / 2**20, 2)
+        finally:
+            tracemalloc.stop()
+    return result, measurements
+
+
+def _environment() -> Dict[str, Any]:
+    versions = {}
+    for module in ["numpy", "pandas", "pyarrow", "polars"]:
+        try:
+            versions[module] = __import__(module).__version__
+        except ImportError:
+            versions[module] = None
+    return {
+        "case": "environment",
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "processor": platform.processor() or platform.machine(),
+        "cpu_count": __import__("os").cpu_count(),
+        **versions,
+    }
+
+
+def _load_app_helpers() -> Any:
+    """Import the app's helpers module, which needs the app's own requirements."""
+    package = __package__.split(".")[0]
+    project_root = pathlib.Path(__file__).resolve().parents[3]
+    path = project_root / "include" / package / "app" / "helpers.py"
+    spec = importlib.util.spec_from_file_location(f"{package}_app_helpers", path)
+    helpers = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(helpers)
+    return helpers
+
+
+def _frames_match(left: pd.DataFrame, right: pd.DataFrame) -> bool:
+    try:
+        pd.testing.assert_frame_equal(to_upload_frame(left), to_upload_frame(right))
+    except AssertionError:
+        return False
+    return True
+
+
+def preprocessing_cases(
+    n_videos: int,
+    days: float,
+    engines: List[str],
+    repeat: int,
+    memory: bool,
+    seed: int,
+) -> Iterator[Dict[str, Any]]:
+    """Benchmark records of the preprocessing transforms for one scale."""
+    metadata = generate_metadata(n_videos, seed=seed)
+    raw_ts_data = generate_timeseries(metadata, days=days, end=END, seed=seed)
+    pulls = raw_ts_data["as_of_datetime"].drop_duplicates().sort_values()
+    history = raw_ts_data[raw_ts_data["as_of_datetime"] < pulls.iloc[-INCREMENTAL_PULLS]]
+    scale = {"videos": n_videos, "days": days, "rows_in": len(raw_ts_data)}
+
+    for method, downsampling in DOWNSAMPLING.items():
+        reference = None
+        for engine in engines:
+            if engine != "pandas" and method != "every_third":
+                continue
+
+            def prepare() -> pd.DataFrame:
+                timeseries, _ = downsample_timeseries(
+                    raw_ts_data, downsampling=downsampling, engine=engine
+                )
+                return join_metadata(metadata, timeseries)
+
+            modeling_data, measurements = _measure(prepare, repeat, memory)
+            record = {
+                "case": "prepare_modeling_data",
+                "method": method,
+                "engine": engine,
+                **scale,
+                "rows_out": len(modeling_data),
+                **measurements,
+            }
+            if reference is None:
+                reference = modeling_data
+            else:
+                record["matches_pandas"] = _frames_match(reference, modeling_data)
+            yield record
+
+            # The next run reads the snapshots from the oldest watermark on, like
+            # `read_new_snapshots`, and downsamples them on top of the watermarks
+            _, watermarks = downsample_timeseries(history, downsampling=downsampling, engine=engine)
+            start = to_wall_time(pd.to_datetime(watermarks["last_seen_datetime"], utc=True)).min()
+            new_snapshots = raw_ts_data[raw_ts_data["as_of_datetime"] >= start]
+            (new_rows, _), measurements = _measure(
+                lambda: downsample_timeseries(new_snapshots, watermarks, downsampling, engine),
+                repeat,
+                memory,
+            )
+            yield {
+                "case": "incremental",
+                "pulls": INCREMENTAL_PULLS,
+                "method": method,
+                "engine": engine,
+                **scale,
+                "rows_in": len(new_snapshots),
+                "rows_out": len(new_rows),
+                **measurements,
+            }
+
+
+def app_helper_cases(
+    n_videos: int, repeat: int, memory: bool, seed: int
+) -> Iterator[Dict[str, Any]]:
+    """Benchmark records of the app helpers for one scale, skipped if they can't be imported."""
+    try:
+        helpers = _load_app_helpers()
+    except ImportError as e:
+        yield {"case": "app_helpers", "videos": n_videos, "skipped": str(e)}
+        return
+
+    for explanations in [0, 3]:
+        predictions = generate_predictions(n_videos, explanations=explanations, seed=seed)
+        processed, measurements = _measure(
+            lambda: helpers.process_predictions(predictions, bound_at_zero=True), repeat, memory
+        )
+        yield {
+            "case": "process_predictions",
+            "explanations": explanations,
+            "videos": n_videos,
+            "rows_in": len(predictions["data"]),
+            "rows_out": len(processed),
+            **measurements,
+        }
+
+    prediction_explanations = generate_prediction_explanations(n_videos * 8 * 3, seed=seed)
+    _, measurements = _measure(
+        lambda: helpers.get_prompt(prediction_explanations, "viewDiff"), repeat, memory
+    )
+    yield {
+        "case": "get_prompt",
+        "videos": n_videos,
+        "rows_in": len(prediction_explanations),
+        **measurements,
+    }
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--scales", type=lambda s: [int(n) for n in s.split(",")], default=[100, 10_000, 100_000],
+                        help="Comma-separated numbers of videos")
+    parser.add_argument("--days", type=float, default=3, help="Days of half-hourly history per video")
+    parser.add_argument("--engines", type=lambda s: s.split(","), default=["pandas"],
+                        help="Comma-separated engines, e.g. pandas,polars")
+    parser.add_argument("--repeat", type=int, default=3, help="Timed runs per case, the best is reported")
+    parser.add_argument("--no-memory", action="store_true", help="Skip the traced run per case")
+    parser.add_argument("--skip-app", action="store_true", help="Skip the app helper cases")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", help="File to append the JSON lines to, in addition to stdout")
+    args = parser.parse_args(argv)
+
+    run = {"run_at": datetime.datetime.now(datetime.timezone.utc).isoformat(timespec="seconds")}
+    output = open(args.output, "a") if args.output else None
+
+    def emit(record: Dict[str, Any]) -> None:
+        line = json.dumps({**run, **record})
+        print(line, flush=True)  # noqa: T201
+        if output is not None:
+            output.write(line + "\n")
+            output.flush()
+
+    try:
+        emit(_environment())
+        for n_videos in args.scales:
+            for record in preprocessing_cases(
+                n_videos, args.days, args.engines, args.repeat, not args.no_memory, args.seed
+            ):
+                emit(record)
+            if not args.skip_app:
+                for record in app_helper_cases(n_videos, args.repeat, not args.no_memory, args.seed):
+                    emit(record)
+    finally:
+        if output is not None:
+            output.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,954 @@
+# Copyright 2024 DataRobot, Inc. and its affiliates.
+# All rights reserved.
+# DataRobot, Inc.
+# This is proprietary source code of DataRobot, Inc. and its
+# affiliates.
+# Released under the terms of DataRobot Tool and Utility Agreement.
+
+"""Offline stand-in for the parts of the DataRobot API used by the pipelines and the app.
+
+Serves the AI Catalog (dataset create, list, get, rename, delete, versions and file
+downloads), use cases, the async status routes the SDK polls, deployment settings, the
+project datetime partitioning, execution environment versions and a prediction server,
+with configurable latency, error injection and per-route request counts. Start it with
+
+    python -m <package>.devtools.fake_datarobot_api --deployments 1
+
+and set `datarobot.endpoint` in conf/local/credentials.yml to the printed endpoint.
+Any api token is accepted. Datasets are kept in memory, or under `--storage-dir` so
+they survive restarts. Building projects, models and deployments is not covered, so
+deploy_forecast only runs its settings nodes, against the seeded deployments.
+"""
+import argparse
+import itertools
+import json
+import math
+import os
+import random
+import re
+import threading
+import time
+import uuid
+from datetime import datetime, timedelta, timezone
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Callable, Dict, List, Optional, Tuple
+from urllib.parse import parse_qs, urlencode, urlparse
+
+API_PREFIX = "/api/v2"
+PREDICTION_PREFIX = "/predApi/v1.0"
+DEFAULT_PAGE_SIZE = 100
+SERVER_VERSION = {"major": 2, "minor": 34, "versionString": "2.34.0"}
+DEFAULT_DATE_FORMAT = "%Y-%m-%dT%H:%M:%SZ"
+DEFAULT_DEPLOYMENT_SETTINGS: Dict[str, Any] = {
+    "predictionsDataCollection": {"enabled": False},
+    "targetDrift": {"enabled": False},
+    "featureDrift": {"enabled": False},
+    "predictionIntervals": {"enabled": False, "percentiles": []},
+    "predictionsByForecastDate": {"enabled": False, "columnName": None, "datetimeFormat": None},
+    "automaticActuals": {"enabled": False},
+    "associationId": {"columnNames": [], "requiredInPredictionRequests": False, "autoGenerateId": False},
+}
+USER = {"id": "0" * 24, "email": "offline@example.com", "fullName": "Offline User", "userhash": None, "username": "offline"}
+EXPLANATION_FEATURES = ["viewDiff (1st lag)", "viewDiff (7 day mean)", "Forecast Distance", "duration", "categoryId"]
+
+Response = Tuple[int, Dict[str, str], Any]
+
+
+def _new_id() -> str:
+    # Same shape as the ObjectIds the real API hands out
+    return uuid.uuid4().hex[:24]
+
+
+def _now_iso() -> str:
+    return datetime.now(timezone.utc).strftime("%Y-%m-%dT%H:%M:%S.%fZ")
+
+
+def _error(status: int, message: str) -> Response:
+    return status, {}, {"message": message}
+
+
+def _merge(settings: Dict[str, Any], update: Dict[str, Any]) -> None:
+    for key, value in update.items():
+        if isinstance(value, dict) and isinstance(settings.get(key), dict):
+            _merge(settings[key], value)
+        else:
+            settings[key] = value
+
+
+def _multipart_file(content_type: str, body: bytes) -> Optional[bytes]:
+    """Content of the `file` field of a multipart/form-data body."""
+    match = re.search(r'boundary="?([^";]+)"?', content_type)
+    if match is None:
+        return None
+    for part in body.split(b"--" + match.group(1).encode()):
+        headers, _, content = part.partition(b"\r\n\r\n")
+        if b'name="file"' in headers:
+            return content[:-2] if content.endswith(b"\r\n") else content
+    return None
+
+
+class _VersionFiles:
+    """Contents of dataset versions, in memory or as files under `storage_dir`."""
+
+    def __init__(self, storage_dir: Optional[str] = None):
+        self.storage_dir = storage_dir
+        self._contents: Dict[str, bytes] = {}
+        if storage_dir:
+            os.makedirs(os.path.join(storage_dir, "datasets"), exist_ok=True)
+
+    def _path(self, version_id: str) -> str:
+        return os.path.join(self.storage_dir, "datasets", f"{version_id}.csv")
+
+    def put(self, version_id: str, content: bytes) -> None:
+        if self.storage_dir:
+            with open(self._path(version_id), "wb") as f:
+                f.write(content)
+        else:
+            self._contents[version_id] = content
+
+    def get(self, version_id: str) -> bytes:
+        if self.storage_dir:
+            with open(self._path(version_id), "rb") as f:
+                return f.read()
+        return self._contents[version_id]
+
+    def delete(self, version_id: str) -> None:
+        if self.storage_dir:
+            try:
+                os.remove(self._path(version_id))
+            except FileNotFoundError:
+                pass
+        else:
+            self._contents.pop(version_id, None)
+
+
+class FakeDataRobotApi:
+    """Request routing, state, fault injection and request accounting.
+
+    Parameters
+    ----------
+    storage_dir : str, optional
+        Directory to keep dataset files and the catalog in, in memory when not set
+    latency_secs : float
+        Base delay added to every response
+    jitter_secs : float
+        Upper bound of a uniform random delay added on top of `latency_secs`
+    processing_secs : float
+        How long an uploaded dataset or version stays in the RUNNING state before it
+        can be read, like AI Catalog ingestion. The SDK polls every 5 seconds meanwhile.
+    error_rate : float
+        Probability that an API request fails with one of `error_codes`
+    error_codes : list of int
+        Status codes to inject, chosen uniformly
+    v2_date_formats : bool
+        Reject forecast date settings whose `datetimeFormat` lacks the "v2" prefix,
+        like deployments of projects that use the newer date format strings
+    seed : int
+        Seed for latency jitter, error injection and predictions
+    """
+
+    def __init__(
+        self,
+        storage_dir: Optional[str] = None,
+        latency_secs: float = 0.0,
+        jitter_secs: float = 0.0,
+        processing_secs: float = 0.0,
+        error_rate: float = 0.0,
+        error_codes: Optional[List[int]] = None,
+        v2_date_formats: bool = False,
+        seed: int = 0,
+    ):
+        self.latency_secs = latency_secs
+        self.jitter_secs = jitter_secs
+        self.processing_secs = processing_secs
+        self.error_rate = error_rate
+        self.error_codes = list(error_codes or [500, 503, 429])
+        self.v2_date_formats = v2_date_formats
+        self._rng = random.Random(seed)
+        self._lock = threading.Lock()
+        self._files = _VersionFiles(storage_dir)
+        self._catalog_path = os.path.join(storage_dir, "catalog.json") if storage_dir else None
+
+        self.datasets: Dict[str, Dict[str, Any]] = {}
+        self.use_cases: Dict[str, Dict[str, Any]] = {}
+        self.projects: Dict[str, Dict[str, Any]] = {}
+        self.deployments: Dict[str, Dict[str, Any]] = {}
+        # Environment id -> version id -> version
+        self.execution_environments: Dict[str, Dict[str, Dict[str, Any]]] = {}
+        # Async status id -> (resource url path, monotonic time it is ready at)
+        self._statuses: Dict[str, Tuple[str, float]] = {}
+        self._ready_at: Dict[str, float] = {}
+        # Modeling jobs have integer ids
+        self._job_ids = itertools.count(1)
+        if self._catalog_path and os.path.exists(self._catalog_path):
+            with open(self._catalog_path) as f:
+                state = json.load(f)
+            for key in ["datasets", "use_cases", "projects", "deployments", "execution_environments"]:
+                getattr(self, key).update(state.get(key, {}))
+
+        self._routes: List[Tuple[str, "re.Pattern[str]", str, Callable[..., Response]]] = []
+        for method, pattern, handler in [
+            ("GET", "version", self._version),
+            ("GET", "status/{id}", self._status),
+            ("GET", "datasets", self._list_datasets),
+            ("POST", "datasets/fromFile", self._create_dataset),
+            ("GET", "datasets/{id}", self._get_dataset),
+            ("PATCH", "datasets/{id}", self._modify_dataset),
+            ("DELETE", "datasets/{id}", self._delete_dataset),
+            ("GET", "datasets/{id}/file", self._dataset_file),
+            ("GET", "datasets/{id}/versions", self._list_versions),
+            ("POST", "datasets/{id}/versions/fromFile", self._create_version),
+            ("GET", "datasets/{id}/versions/{id}", self._get_version),
+            ("DELETE", "datasets/{id}/versions/{id}", self._delete_version),
+            ("GET", "datasets/{id}/versions/{id}/file", self._version_file),
+            ("GET", "useCases", self._list_use_cases),
+            ("POST", "useCases", self._create_use_case),
+            ("GET", "useCases/{id}", self._get_use_case),
+            ("POST", "useCases/{id}/{id}/{id}", self._add_to_use_case),
+            ("GET", "projects/{id}/datetimePartitioning", self._datetime_partitioning),
+            ("POST", "projects/{id}/models/{id}/predictionIntervals", self._calculate_intervals),
+            ("GET", "projects/{id}/jobs/{id}", self._job),
+            ("GET", "deployments/{id}", self._get_deployment),
+            ("GET", "deployments/{id}/settings", self._get_settings),
+            ("PATCH", "deployments/{id}/settings", self._patch_settings),
+            ("GET", "executionEnvironments/{id}/versions/{id}", self._get_execution_environment_version),
+        ]:
+            regex = re.compile("^" + pattern.replace("{id}", "([^/]+)") + "$")
+            self._routes.append((method, regex, f"{method} {pattern}/", handler))
+        self.reset_stats()
+
+    def reset_stats(self) -> None:
+        with self._lock:
+            self.requests: Dict[str, int] = {}
+            self.errors: Dict[str, int] = {}
+            self.bytes_received = 0
+            self.bytes_sent = 0
+            self.started_at = time.monotonic()
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "requests_total": sum(self.requests.values()),
+                "requests": dict(sorted(self.requests.items())),
+                "errors": dict(self.errors),
+                "bytes_received": self.bytes_received,
+                "bytes_sent": self.bytes_sent,
+                "secs_since_reset": round(time.monotonic() - self.started_at, 3),
+                "datasets": sum(not d["deleted"] for d in self.datasets.values()),
+            }
+
+    def count_sent(self, n_bytes: int) -> None:
+        with self._lock:
+            self.bytes_sent += n_bytes
+
+    def _save(self) -> None:
+        # Called with the lock held after every change, when storing on disk
+        if self._catalog_path is None:
+            return
+        state = {
+            "datasets": self.datasets,
+            "use_cases": self.use_cases,
+            "projects": self.projects,
+            "deployments": self.deployments,
+            "execution_environments": self.execution_environments,
+        }
+        with open(self._catalog_path + ".tmp", "w") as f:
+            json.dump(state, f)
+        os.replace(self._catalog_path + ".tmp", self._catalog_path)
+
+    def add_deployment(
+        self,
+        target: str = "viewDiff",
+        date_format: str = DEFAULT_DATE_FORMAT,
+        forecast_points: int = 8,
+        freq_minutes: int = 90,
+        series_id_column: str = "video_id",
+        datetime_column: str = "as_of_datetime",
+    ) -> str:
+        """Seed a time series deployment and its project, returning the deployment id."""
+        project_id, deployment_id = _new_id(), _new_id()
+        with self._lock:
+            self.projects[project_id] = {
+                "dateFormat": date_format,
+                "datetimePartitionColumn": datetime_column,
+                "multiseriesIdColumns": [series_id_column],
+                "target": target,
+                "forecastPoints": forecast_points,
+                "freqMinutes": freq_minutes,
+            }
+            self.deployments[deployment_id] = {
+                "id": deployment_id,
+                "label": f"{target} forecast",
+                "projectId": project_id,
+                "modelId": _new_id(),
+                "datarobotKey": uuid.uuid4().hex,
+                "settings": json.loads(json.dumps(DEFAULT_DEPLOYMENT_SETTINGS)),
+            }
+            self._save()
+        return deployment_id
+
+    def add_dataset(
+        self, name: str, n_versions: int = 1, hours_between_versions: float = 0.0, content: bytes = b"a\n1\n"
+    ) -> str:
+        """Seed a dataset with `n_versions` versions, returning the dataset id.
+
+        The versions are created `hours_between_versions` apart, the newest one now.
+        """
+        dataset_id = _new_id()
+        dataset = {
+            "datasetId": dataset_id,
+            "name": name,
+            "categories": ["TRAINING"],
+            "created": time.time(),
+            "deleted": False,
+            "versions": [],
+        }
+        with self._lock:
+            self.datasets[dataset_id] = dataset
+        now = datetime.now(timezone.utc)
+        for age in reversed(range(n_versions)):
+            version = self._add_version(dataset, content)
+            version["creationDate"] = (now - timedelta(hours=age * hours_between_versions)).strftime(
+                "%Y-%m-%dT%H:%M:%S.%fZ"
+            )
+        with self._lock:
+            self._save()
+        return dataset_id
+
+    def add_execution_environment_version(
+        self, environment_id: Optional[str] = None, build_status: str = "success"
+    ) -> Tuple[str, str]:
+        """Seed an execution environment version, returning the environment and version ids."""
+        environment_id, version_id = environment_id or _new_id(), _new_id()
+        with self._lock:
+            self.execution_environments.setdefault(environment_id, {})[version_id] = {
+                "id": version_id,
+                "environmentId": environment_id,
+                "buildStatus": build_status,
+                "created": _now_iso(),
+            }
+            self._save()
+        return environment_id, version_id
+
+    def handle(
+        self, method: str, path: str, query: Dict[str, List[str]], headers: Any, body: bytes, base_url: str
+    ) -> Response:
+        """Answer one request, returning the status code, extra headers and the body.
+
+        The body is bytes for file downloads and json-serializable otherwise.
+        """
+        if path.startswith(API_PREFIX + "/"):
+            route_path, prediction = path[len(API_PREFIX) + 1:].strip("/"), False
+        elif path.startswith(PREDICTION_PREFIX + "/"):
+            route_path, prediction = path[len(PREDICTION_PREFIX) + 1:].strip("/"), True
+        else:
+            return _error(404, f"Unknown path {path}")
+
+        route, handler, args = None, None, ()
+        if prediction:
+            match = re.match(r"^deployments/([^/]+)/predictions$", route_path)
+            if method == "POST" and match:
+                route, handler, args = "POST predApi/deployments/{id}/predictions/", self._predict, match.groups()
+        else:
+            for route_method, regex, name, route_handler in self._routes:
+                match = regex.match(route_path)
+                if route_method == method and match:
+                    route, handler, args = name, route_handler, match.groups()
+                    break
+
+        with self._lock:
+            self.bytes_received += len(body)
+            key = route or f"{method} (unknown)"
+            self.requests[key] = self.requests.get(key, 0) + 1
+            delay = self.latency_secs + self._rng.uniform(0, self.jitter_secs)
+            injected = (
+                self._rng.choice(self.error_codes) if self._rng.random() < self.error_rate else None
+            )
+        if delay:
+            time.sleep(delay)
+
+        if not headers.get("Authorization"):
+            status, extra_headers, response = _error(401, "Unauthorized")
+        elif handler is None:
+            status, extra_headers, response = _error(404, f"Unknown route {method} {path}")
+        elif injected is not None and route != "GET version/":
+            status, extra_headers, response = _error(injected, "Injected error")
+        else:
+            context = {"query": {key: values[-1] for key, values in query.items()}, "body": body,
+                       "headers": headers, "base_url": base_url}
+            status, extra_headers, response = handler(context, *args)
+
+        if status >= 400:
+            with self._lock:
+                self.errors[str(status)] = self.errors.get(str(status), 0) + 1
+        return status, extra_headers, response
+
+    def _accepted(self, base_url: str, location: str, ready_at: Optional[float] = None) -> Response:
+        """202 pointing at an async status that redirects to `location` once ready."""
+        status_id = _new_id()
+        with self._lock:
+            self._statuses[status_id] = (location, ready_at or 0.0)
+        return 202, {"Location": f"{base_url}{API_PREFIX}/status/{status_id}/"}, {"statusId": status_id}
+
+    def _page(self, items: List[Dict[str, Any]], context: Dict[str, Any], path: str) -> Response:
+        query = context["query"]
+        offset, limit = int(query.get("offset", 0)), int(query.get("limit", DEFAULT_PAGE_SIZE))
+        page = items[offset:offset + limit]
+
+        def link(page_offset: int) -> str:
+            return f"{context['base_url']}{API_PREFIX}/{path}/?" + urlencode(
+                {**query, "offset": page_offset, "limit": limit}
+            )
+
+        return 200, {}, {
+            "count": len(page),
+            "totalCount": len(items),
+            "next": link(offset + limit) if offset + limit < len(items) else None,
+            "previous": link(max(0, offset - limit)) if offset > 0 else None,
+            "data": page,
+        }
+
+    def _version(self, context: Dict[str, Any]) -> Response:
+        return 200, {}, SERVER_VERSION
+
+    def _status(self, context: Dict[str, Any], status_id: str) -> Response:
+        with self._lock:
+            status = self._statuses.get(status_id)
+        if status is None:
+            return _error(404, "Status not found")
+        location, ready_at = status
+        if time.monotonic() < ready_at:
+            return 200, {}, {"statusId": status_id, "status": "RUNNING", "message": ""}
+        return 303, {"Location": context["base_url"] + API_PREFIX + "/" + location}, {
+            "statusId": status_id, "status": "COMPLETED", "message": ""
+        }
+
+    # AI Catalog
+
+    def _live_dataset(self, dataset_id: str) -> Optional[Dict[str, Any]]:
+        dataset = self.datasets.get(dataset_id)
+        return None if dataset is None or dataset["deleted"] else dataset
+
+    def _dataset_resource(self, dataset: Dict[str, Any], version: Dict[str, Any]) -> Dict[str, Any]:
+        running = time.monotonic() < self._ready_at.get(version["versionId"], 0.0)
+        return {
+            "datasetId": dataset["datasetId"],
+            "versionId": version["versionId"],
+            "name": dataset["name"],
+            "categories": dataset["categories"],
+            "createdBy": USER["fullName"],
+            "creationDate": version["creationDate"],
+            "dataPersisted": True,
+            "datasetSize": version["size"],
+            "isDataEngineEligible": False,
+            "isLatestVersion": version is dataset["versions"][-1],
+            "isSnapshot": True,
+            "processingState": "RUNNING" if running else "COMPLETED",
+            "rowCount": version["rowCount"],
+            "sampleSize": {"type": "rows", "value": version["rowCount"]},
+        }
+
+    def _add_version(self, dataset: Dict[str, Any], content: bytes) -> Dict[str, Any]:
+        # The header is not a row, the last line may lack a newline
+        rows = content.count(b"\n") - (1 if content.endswith(b"\n") else 0)
+        version = {
+            "versionId": _new_id(),
+            "creationDate": _now_iso(),
+            "size": len(content),
+            "rowCount": max(rows, 0),
+        }
+        self._files.put(version["versionId"], content)
+        with self._lock:
+            dataset["versions"].append(version)
+            if self.processing_secs:
+                self._ready_at[version["versionId"]] = time.monotonic() + self.processing_secs
+            self._save()
+        return version
+
+    def _upload(self, context: Dict[str, Any]) -> Optional[bytes]:
+        return _multipart_file(context["headers"].get("Content-Type", ""), context["body"])
+
+    def _create_dataset(self, context: Dict[str, Any]) -> Response:
+        content = self._upload(context)
+        if content is None:
+            return _error(422, "The request must upload a file")
+        dataset_id = _new_id()
+        dataset = {
+            "datasetId": dataset_id,
+            "name": "data.csv",
+            "categories": ["TRAINING"],
+            "created": time.time(),
+            "deleted": False,
+            "versions": [],
+        }
+        with self._lock:
+            self.datasets[dataset_id] = dataset
+        self._add_version(dataset, content)
+        return self._accepted(
+            context["base_url"], f"datasets/{dataset_id}/", time.monotonic() + self.processing_secs
+        )
+
+    def _list_datasets(self, context: Dict[str, Any]) -> Response:
+        use_case_ids = context["query"].get("use_case_ids") or context["query"].get("useCaseIds")
+        with self._lock:
+            datasets = [d for d in self.datasets.values() if not d["deleted"] and d["versions"]]
+            if use_case_ids:
+                linked = self.use_cases.get(use_case_ids, {}).get("datasets", [])
+                datasets = [d for d in datasets if d["datasetId"] in linked]
+            datasets.sort(key=lambda d: d["created"], reverse=context["query"].get("orderBy") != "created")
+            items = [self._dataset_resource(d, d["versions"][-1]) for d in datasets]
+        return self._page(items, context, "datasets")
+
+    def _get_dataset(self, context: Dict[str, Any], dataset_id: str) -> Response:
+        with self._lock:
+            dataset = self._live_dataset(dataset_id)
+            if dataset is None:
+                return _error(404, "Dataset not found")
+            return 200, {}, self._dataset_resource(dataset, dataset["versions"][-1])
+
+    def _modify_dataset(self, context: Dict[str, Any], dataset_id: str) -> Response:
+        update = json.loads(context["body"] or b"{}")
+        with self._lock:
+            dataset = self._live_dataset(dataset_id)
+            if dataset is None:
+                return _error(404, "Dataset not found")
+            dataset["name"] = update.get("name", dataset["name"])
+            dataset["categories"] = update.get("categories", dataset["categories"])
+            self._save()
+            return 200, {}, self._dataset_resource(dataset, dataset["versions"][-1])
+
+    def _delete_dataset(self, context: Dict[str, Any], dataset_id: str) -> Response:
+        with self._lock:
+            dataset = self._live_dataset(dataset_id)
+            if dataset is None:
+                return _error(404, "Dataset not found")
+            dataset["deleted"] = True
+            self._save()
+        return 204, {}, None
+
+    def _file(self, dataset_id: str, version_id: Optional[str]) -> Response:
+        with self._lock:
+            dataset = self._live_dataset(dataset_id)
+            versions = [] if dataset is None else [
+                v for v in dataset["versions"] if version_id in (None, v["versionId"])
+            ]
+        if not versions:
+            return _error(404, "Dataset not found")
+        if time.monotonic() < self._ready_at.get(versions[-1]["versionId"], 0.0):
+            return _error(409, "The dataset is still being processed")
+        return 200, {"Content-Type": "text/csv"}, self._files.get(versions[-1]["versionId"])
+
+    def _dataset_file(self, context: Dict[str, Any], dataset_id: str) -> Response:
+        return self._file(dataset_id, None)
+
+    def _version_file(self, context: Dict[str, Any], dataset_id: str, version_id: str) -> Response:
+        return self._file(dataset_id, version_id)
+
+    def _list_versions(self, context: Dict[str, Any], dataset_id: str) -> Response:
+        with self._lock:
+            dataset = self._live_dataset(dataset_id)
+            if dataset is None:
+                return _error(404, "Dataset not found")
+            items = [self._dataset_resource(dataset, v) for v in reversed(dataset["versions"])]
+        return self._page(items, context, f"datasets/{dataset_id}/versions")
+
+    def _create_version(self, context: Dict[str, Any], dataset_id: str) -> Response:
+        with self._lock:
+            dataset = self._live_dataset(dataset_id)
+        if dataset is None:
+            return _error(404, "Dataset not found")
+        content = self._upload(context)
+        if content is None:
+            return _error(422, "The request must upload a file")
+        version = self._add_version(dataset, content)
+        return self._accepted(
+            context["base_url"],
+            f"datasets/{dataset_id}/versions/{version['versionId']}/",
+            time.monotonic() + self.processing_secs,
+        )
+
+    def _get_version(self, context: Dict[str, Any], dataset_id: str, version_id: str) -> Response:
+        with self._lock:
+            dataset = self._live_dataset(dataset_id)
+            for version in [] if dataset is None else dataset["versions"]:
+                if version["versionId"] == version_id:
+                    return 200, {}, self._dataset_resource(dataset, version)
+        return _error(404, "Dataset version not found")
+
+    def _delete_version(self, context: Dict[str, Any], dataset_id: str, version_id: str) -> Response:
+        with self._lock:
+            dataset = self._live_dataset(dataset_id)
+            versions = [] if dataset is None else [v["versionId"] for v in dataset["versions"]]
+            if version_id not in versions:
+                return _error(404, "Dataset version not found")
+            if version_id == versions[-1]:
+                return _error(422, "The latest version of a dataset can't be deleted")
+            dataset["versions"] = [v for v in dataset["versions"] if v["versionId"] != version_id]
+            self._save()
+        self._files.delete(version_id)
+        return 204, {}, None
+
+    # Use cases
+
+    def _use_case_resource(self, use_case: Dict[str, Any]) -> Dict[str, Any]:
+        return {
+            "id": use_case["id"],
+            "name": use_case["name"],
+            "description": use_case["description"],
+            "createdAt": use_case["createdAt"],
+            "updatedAt": use_case["createdAt"],
+            "created": USER,
+            "updated": USER,
+            "owners": [USER],
+            "members": [USER],
+            "datasetsCount": len(use_case["datasets"]),
+            "projectsCount": 0,
+            "applicationsCount": 0,
+            "modelsCount": 0,
+            "notebooksCount": 0,
+            "playgroundsCount": 0,
+            "vectorDatabasesCount": 0,
+        }
+
+    def _list_use_cases(self, context: Dict[str, Any]) -> Response:
+        # The real search matches names, datarobotx also searches for a hash in the description
+        search = context["query"].get("search", "").lower()
+        with self._lock:
+            items = [
+                self._use_case_resource(u)
+                for u in self.use_cases.values()
+                if search in u["name"].lower() or search in (u["description"] or "").lower()
+            ]
+        return self._page(items, context, "useCases")
+
+    def _create_use_case(self, context: Dict[str, Any]) -> Response:
+        payload = json.loads(context["body"] or b"{}")
+        if not payload.get("name"):
+            return _error(422, "name is required")
+        use_case = {
+            "id": _new_id(),
+            "name": payload["name"],
+            "description": payload.get("description"),
+            "createdAt": _now_iso(),
+            "datasets": [],
+        }
+        with self._lock:
+            self.use_cases[use_case["id"]] = use_case
+            self._save()
+        return 200, {}, {"id": use_case["id"]}
+
+    def _get_use_case(self, context: Dict[str, Any], use_case_id: str) -> Response:
+        with self._lock:
+            use_case = self.use_cases.get(use_case_id)
+            if use_case is None:
+                return _error(404, "Use case not found")
+            return 200, {}, self._use_case_resource(use_case)
+
+    def _add_to_use_case(self, context: Dict[str, Any], use_case_id: str, entity_type: str, entity_id: str) -> Response:
+        with self._lock:
+            use_case = self.use_cases.get(use_case_id)
+            if use_case is None:
+                return _error(404, "Use case not found")
+            if entity_type == "datasets" and entity_id not in use_case["datasets"]:
+                use_case["datasets"].append(entity_id)
+                self._save()
+        return 200, {}, {
+            "id": _new_id(),
+            "entityId": entity_id,
+            "entityType": entity_type.rstrip("s"),
+            "experimentContainerId": use_case_id,
+            "created": USER,
+            "createdAt": _now_iso(),
+            "isDeleted": False,
+        }
+
+    # Projects and deployments
+
+    def _datetime_partitioning(self, context: Dict[str, Any], project_id: str) -> Response:
+        with self._lock:
+            project = self.projects.get(project_id)
+        if project is None:
+            return _error(404, "Project not found")
+        return 200, {}, {
+            "projectId": project_id,
+            "dateFormat": project["dateFormat"],
+            "datetimePartitionColumn": project["datetimePartitionColumn"],
+            "multiseriesIdColumns": project["multiseriesIdColumns"],
+            "useTimeSeries": True,
+        }
+
+    def _calculate_intervals(self, context: Dict[str, Any], project_id: str, model_id: str) -> Response:
+        # Prediction intervals are "calculated" at once, the job is complete when first polled
+        job_id = next(self._job_ids)
+        return 202, {"Location": f"{context['base_url']}{API_PREFIX}/projects/{project_id}/jobs/{job_id}/"}, {}
+
+    def _job(self, context: Dict[str, Any], project_id: str, job_id: str) -> Response:
+        url = f"{context['base_url']}{API_PREFIX}/projects/{project_id}/jobs/{job_id}/"
+        return 303, {"Location": url}, {
+            "id": job_id,
+            "projectId": project_id,
+            "status": "COMPLETED",
+            "jobType": "calculatePredictionIntervals",
+            "isBlocked": False,
+            "url": url,
+        }
+
+    def _get_deployment(self, context: Dict[str, Any], deployment_id: str) -> Response:
+        with self._lock:
+            deployment = self.deployments.get(deployment_id)
+        if deployment is None:
+            return _error(404, "Deployment not found")
+        project = self.projects[deployment["projectId"]]
+        return 200, {}, {
+            "id": deployment_id,
+            "label": deployment["label"],
+            "description": None,
+            "status": "active",
+            "importance": "LOW",
+            "defaultPredictionServer": {
+                "id": "0" * 24,
+                "url": context["base_url"],
+                "datarobot-key": deployment["datarobotKey"],
+            },
+            "model": {
+                "id": deployment["modelId"],
+                "projectId": deployment["projectId"],
+                "targetName": project["target"],
+                "type": "Offline forecast",
+            },
+            "capabilities": {},
+            "permissions": ["CAN_MAKE_PREDICTIONS"],
+        }
+
+    def _get_settings(self, context: Dict[str, Any], deployment_id: str) -> Response:
+        with self._lock:
+            deployment = self.deployments.get(deployment_id)
+            if deployment is None:
+                return _error(404, "Deployment not found")
+            return 200, {}, json.loads(json.dumps(deployment["settings"]))
+
+    def _patch_settings(self, context: Dict[str, Any], deployment_id: str) -> Response:
+        update = json.loads(context["body"] or b"{}")
+        date_format = (update.get("predictionsByForecastDate") or {}).get("datetimeFormat")
+        if self.v2_date_formats and date_format and not date_format.startswith("v2"):
+            return _error(422, f"Invalid datetimeFormat {date_format}")
+        with self._lock:
+            deployment = self.deployments.get(deployment_id)
+            if deployment is None:
+                return _error(404, "Deployment not found")
+            _merge(deployment["settings"], update)
+            self._save()
+        return self._accepted(context["base_url"], f"deployments/{deployment_id}/settings/")
+
+    def _predict(self, context: Dict[str, Any], deployment_id: str) -> Response:
+        """Forecasts continuing the last known target value of every series."""
+        with self._lock:
+            deployment = self.deployments.get(deployment_id)
+        if deployment is None:
+            return _error(404, "Deployment not found")
+        if context["headers"].get("DataRobot-Key") != deployment["datarobotKey"]:
+            return _error(403, "Wrong DataRobot-Key")
+        try:
+            rows = json.loads(context["body"])
+        except ValueError:
+            return _error(400, "Prediction data must be a json list of records")
+
+        project = self.projects[deployment["projectId"]]
+        series_column, target = project["multiseriesIdColumns"][0], project["target"]
+        last: Dict[str, Tuple[str, float]] = {}
+        for row in rows:
+            timestamp, value = str(row.get(project["datetimePartitionColumn"]) or ""), row.get(target)
+            if series_column in row and (row[series_column] not in last or timestamp >= last[row[series_column]][0]):
+                known = value if isinstance(value, (int, float)) and not math.isnan(value) else None
+                previous = last.get(row[series_column], ("", 0.0))[1]
+                last[row[series_column]] = (timestamp, previous if known is None else float(known))
+
+        interval = context["query"].get("predictionIntervalsSize", "80")
+        explanations = int(context["query"].get("maxExplanations", 0))
+        data = []
+        for series_id, (timestamp, value) in last.items():
+            try:
+                forecast_point = datetime.fromisoformat(timestamp.replace("Z", "+00:00"))
+            except ValueError:
+                forecast_point = datetime.now(timezone.utc)
+            rng = random.Random(series_id)
+            for distance in range(1, project["forecastPoints"] + 1):
+                prediction = value * (1 + rng.gauss(0, 0.1))
+                width = abs(value) * 0.2 * math.sqrt(distance) + 1
+                data.append({
+                    "seriesId": series_id,
+                    "forecastPoint": forecast_point.isoformat(),
+                    "timestamp": (forecast_point + timedelta(minutes=project["freqMinutes"] * distance)).isoformat(),
+                    "forecastDistance": distance,
+                    "prediction": prediction,
+                    "predictionIntervals": {interval: {"low": prediction - width, "high": prediction + width}},
+                    "predictionExplanations": [
+                        {"feature": feature, "featureValue": 0, "strength": rng.gauss(0, 10),
+                         "qualitativeStrength": "+", "label": target}
+                        for feature in rng.sample(EXPLANATION_FEATURES, min(explanations, len(EXPLANATION_FEATURES)))
+                    ] if explanations else None,
+                })
+        return 200, {}, {"data": data}
+
+    # Execution environments
+
+    def _get_execution_environment_version(
+        self, context: Dict[str, Any], environment_id: str, version_id: str
+    ) -> Response:
+        with self._lock:
+            version = self.execution_environments.get(environment_id, {}).get(version_id)
+        if version is None:
+            return _error(404, "Execution environment version not found")
+        return 200, {}, dict(version)
+
+
+def _read_body(handler: BaseHTTPRequestHandler) -> bytes:
+    if handler.headers.get("Transfer-Encoding", "").lower() == "chunked":
+        chunks = []
+        while True:
+            size = int(handler.rfile.readline().split(b";")[0], 16)
+            chunk = handler.rfile.read(size + 2)[:size]
+            if not size:
+                return b"".join(chunks)
+            chunks.append(chunk)
+    return handler.rfile.read(int(handler.headers.get("Content-Length") or 0))
+
+
+class _Handler(BaseHTTPRequestHandler):
+    # Keep-alive, so pooled clients reuse connections as they do against DataRobot
+    protocol_version = "HTTP/1.1"
+    server: "FakeDataRobotServer"
+
+    def _respond(self, method: str) -> None:
+        parsed = urlparse(self.path)
+        api: FakeDataRobotApi = self.server.api
+        body = _read_body(self)
+        if parsed.path == "/_stats":
+            status, headers, response = 200, {}, api.stats()
+        elif parsed.path == "/_reset":
+            api.reset_stats()
+            status, headers, response = 200, {}, api.stats()
+        else:
+            base_url = f"http://{self.headers.get('Host') or self.server.host_port}"
+            status, headers, response = api.handle(
+                method, parsed.path, parse_qs(parsed.query), self.headers, body, base_url
+            )
+
+        if isinstance(response, bytes):
+            payload = response
+        else:
+            payload = b"" if response is None else json.dumps(response).encode()
+            headers = {"Content-Type": "application/json", **headers}
+        self.send_response(status)
+        for name, value in headers.items():
+            self.send_header(name, value)
+        self.send_header("Content-Length", str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+        api.count_sent(len(payload))
+
+    def do_GET(self) -> None:
+        self._respond("GET")
+
+    def do_POST(self) -> None:
+        self._respond("POST")
+
+    def do_PATCH(self) -> None:
+        self._respond("PATCH")
+
+    def do_DELETE(self) -> None:
+        self._respond("DELETE")
+
+    def log_message(self, format: str, *args: Any) -> None:
+        if self.server.verbose:
+            super().log_message(format, *args)
+
+
+class FakeDataRobotServer(ThreadingHTTPServer):
+    """Threaded HTTP server exposing a `FakeDataRobotApi` under `/api/v2` and `/predApi/v1.0`.
+
+    Besides the API it serves `/_stats` (request counts per route, errors and bytes
+    transferred) and `/_reset` (zero the counters).
+    """
+
+    daemon_threads = True
+
+    def __init__(self, api: FakeDataRobotApi, host: str = "127.0.0.1", port: int = 0, verbose: bool = False):
+        self.api = api
+        self.verbose = verbose
+        super().__init__((host, port), _Handler)
+
+    @property
+    def host_port(self) -> str:
+        host, port = self.server_address[:2]
+        return f"{host}:{port}"
+
+    @property
+    def url(self) -> str:
+        """Endpoint to use as `datarobot.endpoint`."""
+        return f"http://{self.host_port}{API_PREFIX}"
+
+    def __enter__(self) -> "FakeDataRobotServer":
+        threading.Thread(target=self.serve_forever, daemon=True).start()
+        return self
+
+    def __exit__(self, *args: Any) -> None:
+        self.shutdown()
+        self.server_close()
+
+
+def serve_in_thread(api: Optional[FakeDataRobotApi] = None, host: str = "127.0.0.1", port: int = 0) -> FakeDataRobotServer:
+    """Start a server on a background thread, e.g. for a benchmark script.
+
+    Use the returned server as a context manager to stop it again.
+    """
+    server = FakeDataRobotServer(api or FakeDataRobotApi(), host, port)
+    return server.__enter__()
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8766)
+    parser.add_argument("--storage-dir", help="Keep datasets on disk here instead of in memory")
+    parser.add_argument("--deployments", type=int, default=0, help="Number of time series deployments to seed")
+    parser.add_argument("--date-format", default=DEFAULT_DATE_FORMAT, help="Date format of the seeded projects")
+    parser.add_argument("--v2-date-formats", action="store_true",
+                        help="Require the v2 prefix on forecast date formats in deployment settings")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--latency-ms", type=float, default=0.0)
+    parser.add_argument("--jitter-ms", type=float, default=0.0)
+    parser.add_argument("--processing-secs", type=float, default=0.0,
+                        help="Seconds an upload stays RUNNING before the dataset can be read")
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    parser.add_argument("--error-codes", type=lambda s: [int(c) for c in s.split(",")], default=None,
+                        help="Comma-separated status codes to inject, default 500,503,429")
+    parser.add_argument("--verbose", action="store_true", help="Log every request")
+    args = parser.parse_args(argv)
+
+    api = FakeDataRobotApi(
+        storage_dir=args.storage_dir,
+        latency_secs=args.latency_ms / 1000,
+        jitter_secs=args.jitter_ms / 1000,
+        processing_secs=args.processing_secs,
+        error_rate=args.error_rate,
+        error_codes=args.error_codes,
+        v2_date_formats=args.v2_date_formats,
+        seed=args.seed,
+    )
+    deployment_ids = [api.add_deployment(date_format=args.date_format) for _ in range(args.deployments)]
+    server = FakeDataRobotServer(api, args.host, args.port, verbose=args.verbose)
+    print(f"Serving {sum(not d['deleted'] for d in api.datasets.values())} datasets at {server.url}")  # noqa: T201
+    print("endpoint: " + server.url)  # noqa: T201
+    for deployment_id in deployment_ids:
+        print(f"deployment {deployment_id} of project {api.deployments[deployment_id]['projectId']}")  # noqa: T201
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+
+if __name__ == "__main__":
+    main()
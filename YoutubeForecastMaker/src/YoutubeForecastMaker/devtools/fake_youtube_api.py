@@ -0,0 +1,463 @@
+# Copyright 2024 DataRobot, Inc. and its affiliates.
+# All rights reserved.
+# DataRobot, Inc.
+# This is proprietary source code of DataRobot, Inc. and its
+# affiliates.
+# Released under the terms of DataRobot Tool and Utility Agreement.
+
+"""Offline stand-in for the parts of the YouTube Data API v3 used by `get_data_pipeline`.
+
+Serves `playlistItems` and `videos` responses shaped like the real API from a
+synthetic catalog, with configurable latency, error injection and quota accounting.
+Start it with
+
+    python -m <package>.devtools.fake_youtube_api --videos 5000 --playlists 4
+
+and set `get_data_pipeline.youtube_api_url` to the printed url. Any api key is accepted.
+"""
+import argparse
+import base64
+import gzip
+import json
+import random
+import string
+import threading
+import time
+from datetime import datetime, timedelta, timezone
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Dict, List, Optional, Tuple
+from urllib.parse import parse_qs, urlparse
+
+API_PREFIX = "/youtube/v3"
+MAX_RESULTS = 50
+DEFAULT_PLAYLIST_MAX_RESULTS = 5
+# Both endpoints cost a single unit per call against the real daily quota
+QUOTA_COST = {"playlistItems": 1, "videos": 1}
+INJECTED_ERRORS = {
+    403: ("rateLimitExceeded", "The request cannot be completed because you have exceeded your quota."),
+    429: ("rateLimitExceeded", "Too many requests."),
+    500: ("backendError", "Backend Error"),
+    503: ("backendError", "The service is currently unavailable."),
+}
+
+
+def _random_id(rng: random.Random, length: int) -> str:
+    return "".join(rng.choice(string.ascii_letters + string.digits + "-_") for _ in range(length))
+
+
+def _iso_duration(seconds: int) -> str:
+    hours, remainder = divmod(seconds, 3600)
+    minutes, seconds = divmod(remainder, 60)
+    return "PT" + (f"{hours}H" if hours else "") + (f"{minutes}M" if minutes else "") + f"{seconds}S"
+
+
+class FakeYoutubeCatalog:
+    """Deterministic synthetic catalog of videos spread across playlists.
+
+    Parameters
+    ----------
+    n_videos : int
+        Number of videos in the catalog
+    n_playlists : int
+        Number of playlists the videos are dealt into round-robin
+    seed : int
+        Seed for the generated ids, titles and counters
+    missing_rate : float
+        Fraction of playlist entries that are private or deleted, i.e. listed in
+        `playlistItems` but omitted from `videos` responses
+    time_scale : float
+        How many simulated hours pass per wall-clock hour. Counters grow with
+        simulated time so consecutive pulls see changing statistics.
+    """
+
+    def __init__(
+        self,
+        n_videos: int = 1000,
+        n_playlists: int = 3,
+        seed: int = 0,
+        missing_rate: float = 0.0,
+        time_scale: float = 1.0,
+    ):
+        rng = random.Random(seed)
+        self.time_scale = time_scale
+        self.started_at = time.monotonic()
+        now = datetime.now(timezone.utc).replace(microsecond=0)
+
+        channels = [
+            (f"UC{_random_id(rng, 22)}", f"Channel {i}") for i in range(max(1, n_playlists))
+        ]
+        self.playlists: Dict[str, List[str]] = {
+            f"PL{_random_id(rng, 32)}": [] for _ in range(n_playlists)
+        }
+        playlist_ids = list(self.playlists)
+
+        self.videos: Dict[str, Dict[str, Any]] = {}
+        self.missing = set()
+        for i in range(n_videos):
+            video_id = _random_id(rng, 11)
+            playlist_index = i % n_playlists
+            self.playlists[playlist_ids[playlist_index]].append(video_id)
+            if rng.random() < missing_rate:
+                self.missing.add(video_id)
+                continue
+
+            channel_id, channel_title = channels[playlist_index]
+            self.videos[video_id] = {
+                "publishedAt": (now - timedelta(hours=rng.uniform(1, 24 * 365))).strftime(
+                    "%Y-%m-%dT%H:%M:%SZ"
+                ),
+                "channelId": channel_id,
+                "channelTitle": channel_title,
+                "title": f"Synthetic video {i}",
+                "categoryId": str(rng.choice([1, 10, 17, 20, 22, 24, 27, 28])),
+                "tags": [f"tag{rng.randint(0, 50)}" for _ in range(rng.randint(0, 5))],
+                "duration": rng.randint(15, 3 * 3600),
+                "madeForKids": rng.random() < 0.1,
+                "views": rng.randint(0, 1_000_000),
+                "views_per_hour": rng.expovariate(1 / 200),
+                "like_ratio": rng.uniform(0.005, 0.08),
+                "comment_ratio": rng.uniform(0.0005, 0.01),
+            }
+
+    def simulated_hours(self) -> float:
+        return (time.monotonic() - self.started_at) / 3600 * self.time_scale
+
+    def video_resource(self, video_id: str, parts: set) -> Optional[Dict[str, Any]]:
+        """The `videos` item for a video, or None if it is private/deleted/unknown."""
+        video = self.videos.get(video_id)
+        if video is None:
+            return None
+
+        resource: Dict[str, Any] = {"kind": "youtube#video", "id": video_id}
+        if "snippet" in parts:
+            resource["snippet"] = {
+                "publishedAt": video["publishedAt"],
+                "channelId": video["channelId"],
+                "title": video["title"],
+                "description": "",
+                "categoryId": video["categoryId"],
+                "channelTitle": video["channelTitle"],
+                "tags": video["tags"],
+            }
+        if "statistics" in parts:
+            views = int(video["views"] + video["views_per_hour"] * self.simulated_hours())
+            resource["statistics"] = {
+                "viewCount": str(views),
+                "likeCount": str(int(views * video["like_ratio"])),
+                "favoriteCount": "0",
+                "commentCount": str(int(views * video["comment_ratio"])),
+            }
+        if "contentdetails" in parts:
+            resource["contentDetails"] = {
+                "duration": _iso_duration(video["duration"]),
+                "dimension": "2d",
+                "definition": "hd",
+            }
+        if "status" in parts:
+            resource["status"] = {
+                "uploadStatus": "processed",
+                "privacyStatus": "public",
+                "madeForKids": video["madeForKids"],
+            }
+        return resource
+
+
+class FakeYoutubeApi:
+    """Request handling, fault injection and quota accounting on top of a catalog.
+
+    Parameters
+    ----------
+    catalog : FakeYoutubeCatalog
+        Videos and playlists to serve
+    latency_secs : float
+        Base delay added to every response
+    jitter_secs : float
+        Upper bound of a uniform random delay added on top of `latency_secs`
+    error_rate : float
+        Probability that a request fails with one of `error_codes`
+    error_codes : list of int
+        Status codes to inject, chosen uniformly
+    quota_limit : int, optional
+        Quota units available before every request fails with `quotaExceeded`
+    seed : int
+        Seed for latency jitter and error injection
+    """
+
+    def __init__(
+        self,
+        catalog: FakeYoutubeCatalog,
+        latency_secs: float = 0.0,
+        jitter_secs: float = 0.0,
+        error_rate: float = 0.0,
+        error_codes: Optional[List[int]] = None,
+        quota_limit: Optional[int] = None,
+        seed: int = 0,
+    ):
+        self.catalog = catalog
+        self.latency_secs = latency_secs
+        self.jitter_secs = jitter_secs
+        self.error_rate = error_rate
+        self.error_codes = list(error_codes or [500, 503, 429])
+        self.quota_limit = quota_limit
+        self._rng = random.Random(seed)
+        self._lock = threading.Lock()
+        self.reset_stats()
+
+    def reset_stats(self) -> None:
+        with self._lock:
+            self.quota_used = 0
+            self.requests: Dict[str, int] = {}
+            self.errors: Dict[str, int] = {}
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "quota_used": self.quota_used,
+                "quota_limit": self.quota_limit,
+                "requests": dict(self.requests),
+                "errors": dict(self.errors),
+            }
+
+    def handle(self, resource: str, query: Dict[str, List[str]]) -> Tuple[int, Dict[str, Any]]:
+        """Answer a single API call, returning the status code and json body."""
+        params = {key: values[-1] for key, values in query.items()}
+        if resource not in QUOTA_COST:
+            return _error(404, "notFound", f"Unknown resource {resource}")
+
+        with self._lock:
+            self.requests[resource] = self.requests.get(resource, 0) + 1
+            delay = self.latency_secs + self._rng.uniform(0, self.jitter_secs)
+            injected = (
+                self._rng.choice(self.error_codes) if self._rng.random() < self.error_rate else None
+            )
+            over_quota = (
+                self.quota_limit is not None
+                and self.quota_used + QUOTA_COST[resource] > self.quota_limit
+            )
+            if not over_quota:
+                self.quota_used += QUOTA_COST[resource]
+
+        if delay:
+            time.sleep(delay)
+
+        if "key" not in params:
+            status, body = _error(
+                403, "forbidden", "Method doesn't allow unregistered callers.", "global"
+            )
+        elif over_quota:
+            status, body = _error(
+                403, "quotaExceeded", "The request cannot be completed because you have exceeded your quota.", "youtube.quota"
+            )
+        elif injected is not None:
+            reason, message = INJECTED_ERRORS.get(injected, ("backendError", "Injected error"))
+            status, body = _error(injected, reason, message)
+        elif resource == "playlistItems":
+            status, body = self._playlist_items(params)
+        else:
+            status, body = self._videos(params)
+
+        if status != 200:
+            with self._lock:
+                self.errors[str(status)] = self.errors.get(str(status), 0) + 1
+        return status, body
+
+    def _playlist_items(self, params: Dict[str, str]) -> Tuple[int, Dict[str, Any]]:
+        video_ids = self.catalog.playlists.get(params.get("playlistId", ""))
+        if video_ids is None:
+            return _error(404, "playlistNotFound", "The playlist identified with the request's playlistId parameter cannot be found.")
+
+        max_results = int(params.get("maxResults", DEFAULT_PLAYLIST_MAX_RESULTS))
+        if not 0 <= max_results <= MAX_RESULTS:
+            return _error(400, "invalidParameter", "Invalid value for maxResults.")
+        try:
+            offset = _decode_page_token(params["pageToken"]) if "pageToken" in params else 0
+        except ValueError:
+            return _error(400, "invalidPageToken", "The request specifies an invalid page token.")
+
+        page = video_ids[offset:offset + max_results]
+        body: Dict[str, Any] = {
+            "kind": "youtube#playlistItemListResponse",
+            "pageInfo": {"totalResults": len(video_ids), "resultsPerPage": max_results},
+            "items": [
+                {
+                    "kind": "youtube#playlistItem",
+                    "id": _random_id(random.Random(video_id), 16),
+                    "contentDetails": {"videoId": video_id},
+                }
+                for video_id in page
+            ],
+        }
+        if offset + max_results < len(video_ids):
+            body["nextPageToken"] = _encode_page_token(offset + max_results)
+        if offset > 0:
+            body["prevPageToken"] = _encode_page_token(max(0, offset - max_results))
+        return 200, body
+
+    def _videos(self, params: Dict[str, str]) -> Tuple[int, Dict[str, Any]]:
+        video_ids = [video_id for video_id in params.get("id", "").split(",") if video_id]
+        if not video_ids:
+            return _error(400, "missingRequiredParameter", "No filter selected.")
+        if len(video_ids) > MAX_RESULTS:
+            return _error(400, "invalidFilters", "The request specifies too many video ids.")
+
+        # Part names are case-insensitive, the pipeline asks for "Status"
+        parts = {part.strip().lower() for part in params.get("part", "").split(",")}
+        items = []
+        for video_id in video_ids:
+            resource = self.catalog.video_resource(video_id, parts)
+            if resource is not None:
+                items.append(resource)
+        return 200, {
+            "kind": "youtube#videoListResponse",
+            "pageInfo": {"totalResults": len(items), "resultsPerPage": len(items)},
+            "items": items,
+        }
+
+
+def _error(status: int, reason: str, message: str, domain: str = "youtube") -> Tuple[int, Dict[str, Any]]:
+    return status, {
+        "error": {
+            "code": status,
+            "message": message,
+            "errors": [{"message": message, "domain": domain, "reason": reason}],
+        }
+    }
+
+
+def _encode_page_token(offset: int) -> str:
+    return base64.urlsafe_b64encode(f"offset:{offset}".encode()).decode().rstrip("=")
+
+
+def _decode_page_token(token: str) -> int:
+    try:
+        decoded = base64.urlsafe_b64decode(token + "=" * (-len(token) % 4)).decode()
+    except Exception as e:
+        raise ValueError(token) from e
+    prefix, _, offset = decoded.partition(":")
+    if prefix != "offset" or not offset.isdigit():
+        raise ValueError(token)
+    return int(offset)
+
+
+class _Handler(BaseHTTPRequestHandler):
+    # Keep-alive, so pooled clients reuse connections as they do against Google
+    protocol_version = "HTTP/1.1"
+    server: "FakeYoutubeServer"
+
+    def do_GET(self) -> None:
+        parsed = urlparse(self.path)
+        api: FakeYoutubeApi = self.server.api
+        if parsed.path == "/_stats":
+            status, body = 200, api.stats()
+        elif parsed.path == "/_reset":
+            api.reset_stats()
+            status, body = 200, api.stats()
+        elif parsed.path.startswith(API_PREFIX + "/"):
+            resource = parsed.path[len(API_PREFIX) + 1:].strip("/")
+            status, body = api.handle(resource, parse_qs(parsed.query))
+        else:
+            status, body = _error(404, "notFound", f"Unknown path {parsed.path}")
+
+        payload = json.dumps(body).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json; charset=UTF-8")
+        if "gzip" in self.headers.get("Accept-Encoding", ""):
+            payload = gzip.compress(payload, compresslevel=1)
+            self.send_header("Content-Encoding", "gzip")
+        self.send_header("Content-Length", str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def log_message(self, format: str, *args: Any) -> None:
+        if self.server.verbose:
+            super().log_message(format, *args)
+
+
+class FakeYoutubeServer(ThreadingHTTPServer):
+    """Threaded HTTP server exposing a `FakeYoutubeApi` under `/youtube/v3`.
+
+    Besides the API it serves `/_stats` (quota used, request and error counts)
+    and `/_reset` (zero the counters).
+    """
+
+    daemon_threads = True
+
+    def __init__(self, api: FakeYoutubeApi, host: str = "127.0.0.1", port: int = 0, verbose: bool = False):
+        self.api = api
+        self.verbose = verbose
+        super().__init__((host, port), _Handler)
+
+    @property
+    def url(self) -> str:
+        """Base url to use as `youtube_api_url`."""
+        host, port = self.server_address[:2]
+        return f"http://{host}:{port}{API_PREFIX}"
+
+    def __enter__(self) -> "FakeYoutubeServer":
+        threading.Thread(target=self.serve_forever, daemon=True).start()
+        return self
+
+    def __exit__(self, *args: Any) -> None:
+        self.shutdown()
+        self.server_close()
+
+
+def serve_in_thread(api: Optional[FakeYoutubeApi] = None, host: str = "127.0.0.1", port: int = 0) -> FakeYoutubeServer:
+    """Start a server on a background thread, e.g. for a benchmark script.
+
+    Use the returned server as a context manager to stop it again.
+    """
+    server = FakeYoutubeServer(api or FakeYoutubeApi(FakeYoutubeCatalog()), host, port)
+    return server.__enter__()
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--videos", type=int, default=1000, help="Number of synthetic videos")
+    parser.add_argument("--playlists", type=int, default=3, help="Number of synthetic playlists")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--missing-rate", type=float, default=0.0, help="Fraction of private/deleted videos")
+    parser.add_argument("--time-scale", type=float, default=1.0, help="Simulated hours per wall-clock hour")
+    parser.add_argument("--latency-ms", type=float, default=0.0)
+    parser.add_argument("--jitter-ms", type=float, default=0.0)
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    parser.add_argument("--error-codes", type=lambda s: [int(c) for c in s.split(",")], default=None,
+                        help="Comma-separated status codes to inject, default 500,503,429")
+    parser.add_argument("--quota-limit", type=int, default=None)
+    parser.add_argument("--verbose", action="store_true", help="Log every request")
+    args = parser.parse_args(argv)
+
+    catalog = FakeYoutubeCatalog(
+        n_videos=args.videos,
+        n_playlists=args.playlists,
+        seed=args.seed,
+        missing_rate=args.missing_rate,
+        time_scale=args.time_scale,
+    )
+    api = FakeYoutubeApi(
+        catalog,
+        latency_secs=args.latency_ms / 1000,
+        jitter_secs=args.jitter_ms / 1000,
+        error_rate=args.error_rate,
+        error_codes=args.error_codes,
+        quota_limit=args.quota_limit,
+        seed=args.seed,
+    )
+    server = FakeYoutubeServer(api, args.host, args.port, verbose=args.verbose)
+    print(f"Serving {len(catalog.videos)} videos at {server.url}")  # noqa: T201
+    print("youtube_api_url: " + server.url)  # noqa: T201
+    print("playlist_ids:")  # noqa: T201
+    for playlist_id in catalog.playlists:
+        print(f"  - {playlist_id}")  # noqa: T201
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,272 @@
+# Copyright 2024 DataRobot, Inc. and its affiliates.
+# All rights reserved.
+# DataRobot, Inc.
+# This is proprietary source code of DataRobot, Inc. and its
+# affiliates.
+# Released under the terms of DataRobot Tool and Utility Agreement.
+
+"""Synthetic datasets shaped like the ones the pipelines download from the AI Catalog.
+
+`generate_metadata` and `generate_timeseries` produce the raw metadata and time series
+datasets for any number of videos. Snapshots follow the half-hourly pull schedule with
+monotone counters, including the irregularities the preprocessing has to handle: pulls
+that were missed entirely, videos missing from a pull, duplicated rows of videos listed
+in several playlists and videos with hidden like counts. `generate_predictions` and
+`generate_prediction_explanations` produce deployment responses for the app helpers.
+All generators are vectorized and deterministic for a given seed.
+"""
+from typing import Any, Dict, Iterable, Optional, Union
+
+import numpy as np
+import pandas as pd
+
+ID_ALPHABET = np.array(list("ABCDEFGHIJKLMNOPQRSTUVWXYZabcdefghijklmnopqrstuvwxyz0123456789-_"))
+CATEGORY_IDS = [1, 10, 17, 20, 22, 23, 24, 25, 26, 27, 28]
+EXPLANATION_FEATURES = [
+    "viewDiff (1st lag)",
+    "viewDiff (7 day mean)",
+    "viewCount (1st lag)",
+    "likeDiff (1 day mean)",
+    "commentDiff (1 day max)",
+    "Forecast Distance",
+    "as_of_datetime (Hour of Day)",
+    "as_of_datetime (Day of Week)",
+    "duration",
+    "categoryId",
+]
+
+
+def _random_ids(rng: np.random.Generator, n: int, length: int = 11) -> np.ndarray:
+    """`n` distinct YouTube-style ids."""
+    ids = np.array([], dtype=f"<U{length}")
+    while len(ids) < n:
+        chars = ID_ALPHABET[rng.integers(0, len(ID_ALPHABET), (n - len(ids), length))]
+        ids = np.unique(np.concatenate([ids, chars.view(f"<U{length}").ravel()]))
+    return rng.permutation(ids)[:n]
+
+
+def generate_metadata(
+    n_videos: int, n_channels: Optional[int] = None, seed: int = 0
+) -> pd.DataFrame:
+    """Raw metadata of `n_videos` videos, as returned by the metadataset in the AI Catalog.
+
+    Parameters
+    ----------
+    n_videos : int
+        Number of videos
+    n_channels : int, optional
+        Number of channels the videos belong to, defaults to one per 20 videos
+    seed : int
+        Random seed
+
+    Returns
+    -------
+    pd.DataFrame
+    """
+    rng = np.random.default_rng(seed)
+    n_channels = n_channels or max(1, n_videos // 20)
+    channel = rng.integers(0, n_channels, n_videos)
+    channel_ids = np.char.add("UC", _random_ids(rng, n_channels, 22))
+
+    published_at = pd.Timestamp("2024-01-01") + pd.to_timedelta(
+        rng.integers(0, 365 * 86400, n_videos), unit="s"
+    )
+    n_tags = rng.integers(0, 6, n_videos)
+    tags = pd.Series(
+        [",".join(f"tag{t}" for t in rng.integers(0, 500, k)) for k in n_tags], dtype=object
+    ).where(n_tags > 0)
+
+    return pd.DataFrame(
+        {
+            "video_id": _random_ids(rng, n_videos),
+            "publishedAt": published_at,
+            "channelId": channel_ids[channel],
+            "title": [f"Video {i}" for i in range(n_videos)],
+            "categoryId": rng.choice(CATEGORY_IDS, n_videos),
+            "channelTitle": np.char.add("Channel ", channel.astype(str)),
+            "tags": tags,
+            "duration": rng.integers(30, 900, n_videos),
+            "madeForKids": rng.random(n_videos) < 0.05,
+        }
+    )
+
+
+def generate_timeseries(
+    metadata_or_ids: Union[pd.DataFrame, Iterable[str]],
+    days: float = 7,
+    freq: str = "30min",
+    end: Optional[Union[str, pd.Timestamp]] = None,
+    missed_pull_rate: float = 0.02,
+    missing_rate: float = 0.01,
+    duplicate_rate: float = 0.01,
+    hidden_likes_rate: float = 0.02,
+    seed: int = 0,
+) -> pd.DataFrame:
+    """Raw counter snapshots of every video, as returned by the time series dataset.
+
+    Each pull stamps all of its rows with the same `as_of_datetime`, a naive wall-clock
+    time a few seconds after the scheduled pull. Counters only grow: every video gets
+    a popularity drawn from a heavy-tailed distribution that decays with time.
+
+    Parameters
+    ----------
+    metadata_or_ids : pd.DataFrame or iterable of str
+        Metadata from `generate_metadata`, or video ids
+    days : float
+        Length of the history
+    freq : str
+        Pull schedule
+    end : str or pd.Timestamp, optional
+        Time of the last scheduled pull, defaults to the current half hour
+    missed_pull_rate : float
+        Fraction of pulls that didn't happen at all
+    missing_rate : float
+        Fraction of videos missing from a pull that did happen
+    duplicate_rate : float
+        Fraction of rows that appear twice, like videos listed in two playlists
+    hidden_likes_rate : float
+        Fraction of videos whose like count is hidden, i.e. missing in every snapshot
+    seed : int
+        Random seed
+
+    Returns
+    -------
+    pd.DataFrame
+        Counters, `as_of_datetime` and `video_id`, sorted by `as_of_datetime`
+    """
+    rng = np.random.default_rng(seed)
+    if isinstance(metadata_or_ids, pd.DataFrame):
+        video_ids = metadata_or_ids["video_id"].to_numpy()
+    else:
+        video_ids = np.asarray(list(metadata_or_ids))
+    n_videos = len(video_ids)
+
+    end = pd.Timestamp.now().floor(freq) if end is None else pd.Timestamp(end)
+    pulls = pd.date_range(end=end, periods=int(pd.Timedelta(days=days) / pd.Timedelta(freq)) + 1, freq=freq)
+    pulls = pulls[rng.random(len(pulls)) >= missed_pull_rate]
+    # The pull finishes a little after it was scheduled
+    as_of = (pulls + pd.to_timedelta(rng.integers(5, 90, len(pulls)), unit="s")).to_numpy()
+    n_pulls = len(pulls)
+
+    # Views per pull decay with the age of the history
+    popularity = rng.lognormal(mean=3, sigma=1.5, size=(n_videos, 1))
+    decay = np.exp(-np.linspace(0, 1, n_pulls) * rng.uniform(0, 2, (n_videos, 1)))
+    views = rng.poisson(popularity * decay)
+    view_count = rng.lognormal(10, 2, (n_videos, 1)).astype("int64") + np.cumsum(views, axis=1)
+    like_count = (view_count[:, :1] * 0.02).astype("int64") + np.cumsum(
+        rng.binomial(views, rng.uniform(0.005, 0.05, (n_videos, 1))), axis=1
+    )
+    comment_count = (view_count[:, :1] * 0.001).astype("int64") + np.cumsum(
+        rng.binomial(views, 0.001), axis=1
+    )
+
+    raw_ts_data = pd.DataFrame(
+        {
+            "viewCount": view_count.T.ravel(),
+            "likeCount": like_count.T.ravel(),
+            "commentCount": comment_count.T.ravel(),
+            "as_of_datetime": np.repeat(as_of, n_videos),
+            "video_id": np.tile(video_ids, n_pulls),
+        }
+    )
+    hidden_likes = np.tile(rng.random(n_videos) < hidden_likes_rate, n_pulls)
+    raw_ts_data["likeCount"] = raw_ts_data["likeCount"].astype("Int64").mask(hidden_likes)
+
+    raw_ts_data = raw_ts_data[rng.random(len(raw_ts_data)) >= missing_rate]
+    duplicates = raw_ts_data[rng.random(len(raw_ts_data)) < duplicate_rate]
+    raw_ts_data = pd.concat([raw_ts_data, duplicates])
+    return raw_ts_data.sort_values("as_of_datetime", kind="stable", ignore_index=True)
+
+
+def generate_predictions(
+    n_series: int,
+    forecast_points: int = 8,
+    prediction_interval: str = "80",
+    explanations: int = 0,
+    freq: str = "90min",
+    seed: int = 0,
+) -> Dict[str, Any]:
+    """Time series deployment response for `n_series` series, see `helpers.process_predictions`.
+
+    Parameters
+    ----------
+    n_series : int
+        Number of series (videos)
+    forecast_points : int
+        Forecast distances per series
+    prediction_interval : str
+        Key of the prediction intervals
+    explanations : int
+        Prediction explanations per row, none when 0
+    freq : str
+        Time step between forecast distances
+    seed : int
+        Random seed
+
+    Returns
+    -------
+    dict
+    """
+    rng = np.random.default_rng(seed)
+    series_ids = _random_ids(rng, n_series)
+    forecast_point = pd.Timestamp.now().floor(freq)
+    timestamps = pd.date_range(
+        forecast_point + pd.Timedelta(freq), periods=forecast_points, freq=freq
+    ).strftime("%Y-%m-%dT%H:%M:%S.%fZ")
+    predictions = rng.normal(50, 40, (n_series, forecast_points))
+    widths = rng.uniform(5, 60, (n_series, forecast_points))
+
+    data = []
+    for i, series_id in enumerate(series_ids):
+        for j, timestamp in enumerate(timestamps):
+            row: Dict[str, Any] = {
+                "seriesId": series_id,
+                "timestamp": timestamp,
+                "forecastPoint": forecast_point.isoformat(),
+                "forecastDistance": j + 1,
+                "prediction": predictions[i, j],
+                "predictionIntervals": {
+                    prediction_interval: {
+                        "low": predictions[i, j] - widths[i, j],
+                        "high": predictions[i, j] + widths[i, j],
+                    }
+                },
+                "predictionExplanations": None,
+            }
+            if explanations:
+                row["predictionExplanations"] = [
+                    {"feature": feature, "featureValue": 0, "strength": strength}
+                    for feature, strength in zip(
+                        rng.choice(EXPLANATION_FEATURES, explanations, replace=False),
+                        rng.normal(0, 10, explanations),
+                    )
+                ]
+            data.append(row)
+    return {"data": data}
+
+
+def generate_prediction_explanations(n_rows: int, seed: int = 0) -> pd.DataFrame:
+    """Prediction explanations in long format, see `helpers.get_prompt`.
+
+    Parameters
+    ----------
+    n_rows : int
+        Number of explanations
+    seed : int
+        Random seed
+
+    Returns
+    -------
+    pd.DataFrame
+        `feature`, `feature_value` and `strength` columns
+    """
+    rng = np.random.default_rng(seed)
+    # A few features explain most of the forecast
+    weights = 1 / np.arange(1, len(EXPLANATION_FEATURES) + 1)
+    return pd.DataFrame(
+        {
+            "feature": rng.choice(EXPLANATION_FEATURES, n_rows, p=weights / weights.sum()),
+            "feature_value": rng.normal(0, 1, n_rows),
+            "strength": rng.normal(0, 10, n_rows),
+        }
+    )
@@ -0,0 +1,271 @@
+# Copyright 2024 DataRobot, Inc. and its affiliates.
+# All rights reserved.
+# DataRobot, Inc.
+# This is proprietary source code of DataRobot, Inc. and its
+# affiliates.
+# Released under the terms of DataRobot Tool and Utility Agreement.
+
+"""Project hooks."""
+import json
+import os
+import pathlib
+import sys
+import threading
+import time
+import tracemalloc
+from contextlib import ExitStack
+from typing import Any, Callable, Dict, List, Optional
+
+import pandas as pd
+from kedro.framework.hooks import hook_impl
+from kedro.io import DataCatalog
+from kedro.pipeline import Pipeline
+from kedro.pipeline.node import Node
+
+from .common.datarobot_client import configure_client, node_client
+
+ENDPOINT_PARAM = "params:credentials.datarobot.endpoint"
+TOKEN_PARAM = "params:credentials.datarobot.api_token"
+# Path of the node profiling report, profiling is off when it isn't set
+PROFILE_REPORT_ENV = "NODE_PROFILE_REPORT"
+
+
+class DataRobotClientHooks:
+    """Configure the DataRobot client once, before any node runs.
+
+    Every node then runs with its own copy of that client, see
+    `common.datarobot_client.node_client`. Nodes never replace the client that other
+    nodes use, so independent nodes can run concurrently with
+    `kedro run --runner ThreadRunner`.
+    """
+
+    def __init__(self) -> None:
+        self._configured = False
+        # Node hooks run on the runner thread that runs the node
+        self._nodes = threading.local()
+
+    @hook_impl
+    def before_pipeline_run(
+        self, run_params: Dict[str, Any], pipeline: Pipeline, catalog: DataCatalog
+    ) -> None:
+        datasets = set(catalog.list())
+        if ENDPOINT_PARAM in datasets and TOKEN_PARAM in datasets:
+            configure_client(catalog.load(ENDPOINT_PARAM), catalog.load(TOKEN_PARAM))
+            self._configured = True
+
+    @hook_impl
+    def before_node_run(self, node: Node) -> None:
+        if self._configured:
+            self._nodes.client = ExitStack()
+            self._nodes.client.enter_context(node_client())
+
+    @hook_impl
+    def after_node_run(self, node: Node) -> None:
+        self._release_node_client()
+
+    @hook_impl
+    def on_node_error(self, node: Node) -> None:
+        self._release_node_client()
+
+    def _release_node_client(self) -> None:
+        client = getattr(self._nodes, "client", None)
+        if client is not None:
+            self._nodes.client = None
+            client.close()
+
+
+def _frame_sizes(data: Dict[str, Any]) -> Dict[str, Dict[str, float]]:
+    return {
+        name: {
+            "rows": len(value),
+            "columns": len(value.columns),
+            "mb": round(value.memory_usage(deep=True).sum() / 2**20, 3),
+        }
+        for name, value in data.items()
+        if isinstance(value, pd.DataFrame)
+    }
+
+
+def _rss_mb() -> Optional[float]:
+    # Current resident set size, only available on Linux
+    try:
+        with open("/proc/self/statm") as f:
+            return round(int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE") / 2**20, 1)
+    except (OSError, ValueError):
+        return None
+
+
+def _max_rss_mb() -> Optional[float]:
+    try:
+        import resource
+    except ImportError:
+        return None
+    max_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Kilobytes on Linux, bytes on macOS
+    return round(max_rss / 2**20 if sys.platform == "darwin" else max_rss / 2**10, 1)
+
+
+class NodeProfilingHooks:
+    """Record the time, memory, data sizes and HTTP calls of every node in a run.
+
+    Off unless the `NODE_PROFILE_REPORT` environment variable (or `report_path`) names
+    the report to write, as CSV if it ends with ".csv" and as JSON otherwise. Per node
+    it records wall and CPU time, the tracemalloc peak and net allocation, current and
+    peak RSS, the rows, columns and memory of DataFrame inputs and outputs, and the
+    number of HTTP requests sent through requests and httpx.
+
+    tracemalloc slows allocation-heavy nodes down, so compare profiled runs with each
+    other. CPU time, allocations and HTTP calls are process-wide, so with ThreadRunner
+    they include whatever nodes ran at the same time.
+
+    Parameters
+    ----------
+    report_path : str, optional
+        Where to write the report, defaults to the environment variable
+    """
+
+    def __init__(self, report_path: Optional[str] = None):
+        self._report_path = report_path or os.environ.get(PROFILE_REPORT_ENV)
+        self._lock = threading.Lock()
+        self._records: List[Dict[str, Any]] = []
+        self._started: Dict[str, Dict[str, Any]] = {}
+        self._restore: List[Callable[[], None]] = []
+        self._http_calls = 0
+        self._run_started = 0.0
+        self._started_tracemalloc = False
+
+    def _count_http_call(self) -> None:
+        with self._lock:
+            self._http_calls += 1
+
+    def _patch_http_clients(self) -> None:
+        from requests.adapters import HTTPAdapter
+
+        count = self._count_http_call
+        send = HTTPAdapter.send
+
+        def counted_send(adapter: HTTPAdapter, request: Any, *args: Any, **kwargs: Any) -> Any:
+            count()
+            return send(adapter, request, *args, **kwargs)
+
+        HTTPAdapter.send = counted_send
+        self._restore.append(lambda: setattr(HTTPAdapter, "send", send))
+
+        try:
+            import httpx
+        except ImportError:
+            return
+        handle = httpx.AsyncHTTPTransport.handle_async_request
+
+        async def counted_handle(transport: Any, request: Any) -> Any:
+            count()
+            return await handle(transport, request)
+
+        httpx.AsyncHTTPTransport.handle_async_request = counted_handle
+        self._restore.append(
+            lambda: setattr(httpx.AsyncHTTPTransport, "handle_async_request", handle)
+        )
+
+    @hook_impl
+    def before_pipeline_run(
+        self, run_params: Dict[str, Any], pipeline: Pipeline, catalog: DataCatalog
+    ) -> None:
+        if not self._report_path:
+            return
+        self._records = []
+        self._run_started = time.perf_counter()
+        if not tracemalloc.is_tracing():
+            tracemalloc.start()
+            self._started_tracemalloc = True
+        self._patch_http_clients()
+
+    @hook_impl
+    def before_node_run(self, node: Node, inputs: Dict[str, Any]) -> None:
+        if not self._report_path:
+            return
+        tracemalloc.reset_peak()
+        with self._lock:
+            self._started[node.name] = {
+                "wall": time.perf_counter(),
+                "cpu": time.process_time(),
+                "traced": tracemalloc.get_traced_memory()[0],
+                "http_calls": self._http_calls,
+                "inputs": _frame_sizes(inputs),
+            }
+
+    def _record(
+        self, node: Node, outputs: Dict[str, Any], error: Optional[Exception] = None
+    ) -> None:
+        traced, traced_peak = tracemalloc.get_traced_memory()
+        with self._lock:
+            started = self._started.pop(node.name)
+            self._records.append(
+                {
+                    "node": node.name,
+                    "wall_secs": round(time.perf_counter() - started["wall"], 3),
+                    "cpu_secs": round(time.process_time() - started["cpu"], 3),
+                    "peak_alloc_mb": round((traced_peak - started["traced"]) / 2**20, 3),
+                    "net_alloc_mb": round((traced - started["traced"]) / 2**20, 3),
+                    "rss_mb": _rss_mb(),
+                    "max_rss_mb": _max_rss_mb(),
+                    "http_calls": self._http_calls - started["http_calls"],
+                    "inputs": started["inputs"],
+                    "outputs": _frame_sizes(outputs),
+                    "error": None if error is None else repr(error),
+                }
+            )
+
+    @hook_impl
+    def after_node_run(self, node: Node, outputs: Dict[str, Any]) -> None:
+        if self._report_path:
+            self._record(node, outputs)
+
+    @hook_impl
+    def on_node_error(self, error: Exception, node: Node) -> None:
+        if self._report_path:
+            self._record(node, {}, error)
+
+    def _write_report(self, run_params: Dict[str, Any]) -> None:
+        from logzero import logger
+
+        for restore in reversed(self._restore):
+            restore()
+        self._restore = []
+        if self._started_tracemalloc:
+            tracemalloc.stop()
+            self._started_tracemalloc = False
+
+        path = pathlib.Path(self._report_path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        if path.suffix == ".csv":
+            rows = [
+                {
+                    **{key: value for key, value in record.items() if key not in ("inputs", "outputs")},
+                    **{
+                        f"{direction}_{size}": sum(frame[size] for frame in record[direction].values())
+                        for direction in ("inputs", "outputs")
+                        for size in ("rows", "mb")
+                    },
+                }
+                for record in self._records
+            ]
+            pd.DataFrame(rows).to_csv(path, index=False)
+        else:
+            report = {
+                "pipeline_name": run_params.get("pipeline_name"),
+                "runner": run_params.get("runner"),
+                "wall_secs": round(time.perf_counter() - self._run_started, 3),
+                "nodes": self._records,
+            }
+            path.write_text(json.dumps(report, indent=2))
+        logger.info(f"Wrote the node profile of {len(self._records)} nodes to {path}")
+
+    @hook_impl
+    def after_pipeline_run(self, run_params: Dict[str, Any]) -> None:
+        if self._report_path:
+            self._write_report(run_params)
+
+    @hook_impl
+    def on_pipeline_error(self, run_params: Dict[str, Any]) -> None:
+        if self._report_path:
+            self._write_report(run_params)
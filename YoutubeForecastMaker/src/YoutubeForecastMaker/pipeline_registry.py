@@ -13,6 +13,7 @@ from .pipelines import get_data_pipeline as get_data_p
 from .pipelines import deploy_forecast as deploy
 from .pipelines import deploy_streamlit_app as deploy_st
 from .pipelines import preprocessing as prep
+from .pipelines import refresh
 
 def register_pipelines() -> Dict[str, Pipeline]:
     """Register the project's pipelines.
@@ -24,4 +25,5 @@ def register_pipelines() -> Dict[str, Pipeline]:
         "__default__": deploy.create_pipeline() + deploy_st.create_pipeline(),
         "pull_data": get_data_p.create_pipeline(),
         "data_prep": prep.create_pipeline(),
+        "refresh": refresh.create_pipeline(),
     }
\ No newline at end of file
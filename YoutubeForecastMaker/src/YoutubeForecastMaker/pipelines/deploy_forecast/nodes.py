@@ -7,37 +7,83 @@
 
 from __future__ import annotations #Keep at top of file
 
-import time
+from functools import partial
 from typing import Any, List, TYPE_CHECKING, Union, Optional, Dict
 
 from datarobot.models.use_cases.utils import UseCaseLike
-from datarobot import Dataset 
+from datarobot import Dataset
 
 from datarobotx.idp.batch_predictions import get_update_or_create_batch_prediction_job
+
+from ...common.datarobot_client import configure_client, rest_client
+from ...common.polling import poll_many
 if TYPE_CHECKING:
     import tempfile
     import datarobot as dr
     import pandas as pd
 
+FINISHED_PROCESSING_STATES = {"COMPLETED", "ERROR"}
+
+
+def _finished_processing_state(dataset_id: str) -> Optional[str]:
+    state = rest_client().get(f"datasets/{dataset_id}/").json()["processingState"]
+    return state if state in FINISHED_PROCESSING_STATES else None
 
 
 def find_existing_dataset(
-    dataset_name: str, use_cases: Optional[UseCaseLike] = None, timeout_secs: int = 60, 
+    dataset_name: str, use_cases: Optional[UseCaseLike] = None, timeout_secs: int = 60,
 ) -> str:
-    for dataset in Dataset.list(use_cases=use_cases):
-        if dataset_name in dataset.name:
-            waited_secs = 0
-            while True:
-                status = Dataset.get(dataset.id).processing_state
-                if status == "COMPLETED":
-                    return str(dataset.id)
-                elif status == "ERROR":
-                    break
-                elif waited_secs > timeout_secs:
-                    raise TimeoutError("Timed out waiting for dataset to process.")
-                time.sleep(3)
-                waited_secs += 3
+    """Get the id of the first processed dataset called `dataset_name`.
 
+    Datasets whose name contains `dataset_name` are only considered when none has
+    exactly that name. Candidates listed before the first processed one that are still
+    processing are polled concurrently with exponential backoff, see `common.polling`.
+
+    Parameters
+    ----------
+    dataset_name : str
+        Name of the dataset
+    use_cases : UseCaseLike, optional
+        Use case(s) to look for the dataset in
+    timeout_secs : int
+        Seconds to wait for candidates that are still processing
+
+    Returns
+    -------
+    str
+        Id of the dataset
+    """
+    from logzero import logger
+
+    datasets = Dataset.list(use_cases=use_cases)
+    candidates = [d for d in datasets if d.name == dataset_name] or [
+        d for d in datasets if dataset_name in d.name
+    ]
+
+    # The listing already has the processing state, only unfinished candidates are polled
+    states: Dict[str, Any] = {str(d.id): d.processing_state for d in candidates}
+    pending = []
+    for dataset_id, state in states.items():
+        if state == "COMPLETED":
+            break
+        if state != "ERROR":
+            pending.append(dataset_id)
+    if pending:
+        polled, waited_secs = poll_many(
+            {dataset_id: partial(_finished_processing_state, dataset_id) for dataset_id in pending},
+            timeout_secs,
+        )
+        logger.info(f"Waited {waited_secs:.1f}s for {len(pending)} datasets called {dataset_name} to process")
+        states.update(polled)
+
+    for dataset_id, state in states.items():
+        if state == "COMPLETED":
+            return dataset_id
+    for state in states.values():
+        if isinstance(state, Exception) and not isinstance(state, TimeoutError):
+            raise state
+    if any(isinstance(state, TimeoutError) for state in states.values()):
+        raise TimeoutError("Timed out waiting for dataset to process.")
     raise KeyError("No matching dataset found")
 
 def put_forecast_distance_into_registered_model_name(registered_model_name: str, forecast_window_start: str, forecast_window_end: str) -> str:
@@ -76,13 +122,58 @@ def get_date_format(
     project_id: str,
 ):
     "Get date format for project"
-    import datarobot as dr
-
-    client = dr.Client(endpoint=endpoint, token=token)
+    configure_client(endpoint, token)
+    client = rest_client()
     url = "projects/{}/datetimePartitioning".format(project_id)
     response = client.get(url).json()
     return response["dateFormat"]
 
+def _desired_deployment_settings(
+    datetime_partitioning_column: str,
+    prediction_interval: int,
+    date_format: str,
+    association_id: Optional[str] = None,
+) -> Dict[str, Any]:
+    """Deployment settings the forecast deployment should have, as in the settings PATCH body."""
+    if association_id is None:
+        association = {
+            "columnNames": ["association_id"],
+            "requiredInPredictionRequests": False,
+            "autoGenerateId": True,
+        }
+    else:
+        association = {
+            "columnNames": [association_id],
+            "requiredInPredictionRequests": False,
+            "autoGenerateId": False,
+        }
+    return {
+        "predictionsDataCollection": {"enabled": True},
+        "targetDrift": {"enabled": True},
+        "predictionIntervals": {"enabled": True, "percentiles": [prediction_interval]},
+        "predictionsByForecastDate": {
+            "enabled": True,
+            "columnName": datetime_partitioning_column + " (actual)",
+            "datetimeFormat": date_format,
+        },
+        "automaticActuals": {"enabled": True},
+        "associationId": association,
+    }
+
+
+def _settings_delta(current: Dict[str, Any], desired: Dict[str, Any]) -> Dict[str, Any]:
+    """Top-level settings of `desired` with a field that differs from `current`.
+
+    Settings are compared on the fields of `desired` only, and changed ones are sent
+    whole because the API validates every setting as a unit.
+    """
+    return {
+        name: setting
+        for name, setting in desired.items()
+        if any((current.get(name) or {}).get(key) != value for key, value in setting.items())
+    }
+
+
 def ensure_deployment_settings(
     endpoint: str,
     token: str,
@@ -94,6 +185,15 @@ def ensure_deployment_settings(
 ) -> None:
     """Ensure deployment settings are properly configured.
 
+    The current settings are read once and only the settings that differ are updated,
+    so an unchanged deployment costs a single request. Prediction intervals are updated
+    through the SDK, which first computes the interval on the deployed model. All other
+    changes go in one PATCH.
+
+    Some deployments only accept the date format with a "v2" prefix. The variant the
+    deployment already has is kept, and the other one is tried if a PATCH with the
+    date format is rejected.
+
     Parameters
     ----------
     datetime_partitioning_column: str
@@ -107,48 +207,47 @@ def ensure_deployment_settings(
         When not set, the association id is auto-generated
     """
     import datarobot as dr
+    from datarobot.utils.waiters import wait_for_async_resolution
+    from logzero import logger
 
     deployment_settings_url = f"deployments/{deployment_id}/settings/"
-    client = dr.Client(endpoint=endpoint, token=token)
-
-    deployment = dr.Deployment.get(deployment_id)
+    configure_client(endpoint, token)
+    client = rest_client()
 
-    deployment.update_predictions_data_collection_settings(enabled=True)
-    deployment.update_drift_tracking_settings(target_drift_enabled=True)
-
-    deployment.update_prediction_intervals_settings(percentiles=[prediction_interval])
-
-    datetime_partition_column = datetime_partitioning_column + " (actual)"
-    request_body = {
-        "predictionsByForecastDate": {
-            "enabled": True,
-            "columnName": datetime_partition_column,
-            "datetimeFormat": date_format,
-        },
-        "automaticActuals": {"enabled": True},
-    }
+    current = client.get(deployment_settings_url).json()
+    variants = [date_format, "v2" + date_format]
+    current_format = (current.get("predictionsByForecastDate") or {}).get("datetimeFormat")
+    if current_format in variants:
+        date_format = current_format
+    delta = _settings_delta(
+        current,
+        _desired_deployment_settings(
+            datetime_partitioning_column, prediction_interval, date_format, association_id
+        ),
+    )
+    if not delta:
+        logger.info(f"Settings of deployment {deployment_id} are up to date")
+        return
+    logger.info(f"Updating {', '.join(delta)} settings of deployment {deployment_id}")
 
-    if association_id is None:
-        request_body["associationId"] = {
-            "columnNames": ["association_id"],
-            "requiredInPredictionRequests": False,
-            "autoGenerateId": True,
-        }
-    else:
-        request_body["associationId"] = {
-            "columnNames": [association_id],
-            "requiredInPredictionRequests": False,
-            "autoGenerateId": False,
-        }
+    if delta.pop("predictionIntervals", None) is not None:
+        dr.Deployment.get(deployment_id).update_prediction_intervals_settings(
+            percentiles=[prediction_interval]
+        )
+    if not delta:
+        return
 
     try:
-        client.patch(deployment_settings_url, json=request_body)
-    # Remove v2 on error
+        response = client.patch(deployment_settings_url, json=delta)
     except dr.errors.ClientError:
-        request_body["predictionsByForecastDate"]["datetimeFormat"] = "v2" + date_format
-        client.patch(deployment_settings_url, json=request_body)
+        if "predictionsByForecastDate" not in delta:
+            raise
+        other_format = variants[1] if date_format == variants[0] else variants[0]
+        delta["predictionsByForecastDate"]["datetimeFormat"] = other_format
+        response = client.patch(deployment_settings_url, json=delta)
+    if "Location" in response.headers:
+        wait_for_async_resolution(client, response.headers["Location"])
 
-    return
 
 def setup_batch_prediction_job_definition(
     endpoint: str,
@@ -176,8 +275,7 @@ def setup_batch_prediction_job_definition(
         "every" time denomination or an array of integers (e.g. ``[1, 2, 3]``) to define
         a specific interval.
     """
-    import datarobot as dr
-    dr.Client(token=token, endpoint=endpoint)  # type: ignore
+    configure_client(endpoint, token)
 
     batch_prediction_job["intake_settings"]["datasetId"] = dataset_id
     batch_prediction_job["deploymentId"] = deployment_id
@@ -6,10 +6,12 @@
 # Released under the terms of DataRobot Tool and Utility Agreement.
 
 from __future__ import annotations
-from typing import Any, Dict, List, TYPE_CHECKING, Union
+from typing import Any, Dict, List, Optional, TYPE_CHECKING, Union
 
 import tempfile
-import datarobot as dr
+
+from ...common.datarobot_client import configure_client, rest_client
+from ...common.dataset_index import find_dataset_id
 
 if TYPE_CHECKING:
     import pathlib
@@ -48,9 +50,172 @@ def get_dataset_id(dataset_name: str) -> Union[str, None]:
     str:
         The ID of the scoring dataset
     """
-    datasets = dr.Dataset.list()
-    return next((dataset.id for dataset in datasets if dataset.name == dataset_name), None)
+    return find_dataset_id(dataset_name)
+
+
+
+def _render_secrets(
+    secrets_template: str,
+    endpoint: str,
+    token: str,
+    azure_endpoint: str,
+    azure_api_key: str,
+    azure_api_version: str,
+) -> str:
+    return (secrets_template
+            .replace("<azure_endpoint>", azure_endpoint)
+            .replace("<azure_api_key>", azure_api_key)
+            .replace("<azure_api_version>", azure_api_version)
+            .replace("<datarobot_endpoint>", endpoint)
+            .replace("<datarobot_api_token>", token)
+            )
+
+
+def _load_build_record(build_record_filepath: Optional[str]) -> Dict[str, Any]:
+    import json
+    import os
+
+    if not build_record_filepath or not os.path.exists(build_record_filepath):
+        return {}
+    with open(build_record_filepath) as f:
+        return json.load(f)
+
+
+def _write_build_record(
+    build_record_filepath: str,
+    app_build: Dict[str, Any],
+    execution_environment_id: str,
+    execution_environment_version_id: str,
+) -> None:
+    import json
+    import os
+
+    os.makedirs(os.path.dirname(build_record_filepath) or ".", exist_ok=True)
+    with open(build_record_filepath, "w") as f:
+        json.dump(
+            {
+                "hash": app_build["hash"],
+                "files": app_build["files"],
+                "credentials": app_build["credentials"],
+                "execution_environment_id": execution_environment_id,
+                "execution_environment_version_id": execution_environment_version_id,
+            },
+            f,
+            indent=2,
+        )
+
+
+def make_app_build_manifest(
+    endpoint: str,
+    token: str,
+    azure_endpoint: str,
+    azure_api_key: str,
+    azure_api_version: str,
+    execution_environment_id: str,
+    app_py: str,
+    helpers_py: str,
+    app_parameters_yml: Any,
+    requirements: str,
+    dockerfile: str,
+    logo: Any,
+    style_css: str,
+    config_toml: str,
+    secrets_template: str,
+    build_record_filepath: Optional[str] = None,
+) -> Dict[str, Any]:
+    """Hash every file baked into the app image and look up a version built from them.
+
+    The manifest holds a sha256 per file and one over all of them. If it matches the
+    record of the last build in `build_record_filepath` and that execution environment
+    version built successfully, its id is returned so the assets are neither bundled
+    nor uploaded again. Secrets are part of the image too: the secrets.toml template is
+    hashed like the other files, and the rendered secrets as an HMAC keyed with the
+    DataRobot token. The record never holds the token, so guessed credentials can only be
+    checked against it by someone who already has the token.
+
+    Parameters
+    ----------
+    execution_environment_id : str
+        DataRobot execution environment id the app image is built in
+    app_py, helpers_py, requirements, dockerfile, style_css, config_toml : str
+        Contents of the app files
+    app_parameters_yml : dict or list
+        app_parameters.yaml contents
+    logo : PIL.Image.Image
+        The logo
+    secrets_template : str
+        secrets.toml template
+    build_record_filepath : str, optional
+        JSON record of the last successful build, builds are never skipped when not set
+
+    Returns
+    -------
+    dict :
+        `hash`, `files`, `credentials` and `execution_environment_version_id`, the id of
+        the matching version or None if the image has to be built
+    """
+    import hashlib
+    import hmac
+    import json
 
+    import yaml
+    from datarobot.errors import ClientError
+    from logzero import logger
+
+    contents = {
+        "app.py": app_py,
+        "helpers.py": helpers_py,
+        "app_parameters.yaml": yaml.dump(app_parameters_yml),
+        "requirements.txt": requirements,
+        "Dockerfile": dockerfile,
+        "style.css": style_css,
+        ".streamlit/config.toml": config_toml,
+        ".streamlit/secrets.toml": secrets_template,
+    }
+    files = {name: hashlib.sha256(content.encode()).hexdigest() for name, content in contents.items()}
+    files["DataRobot.png"] = hashlib.sha256(
+        f"{logo.mode}{logo.size}".encode() + logo.tobytes()
+    ).hexdigest()
+
+    credentials = hmac.new(
+        token.encode(),
+        _render_secrets(
+            secrets_template, endpoint, token, azure_endpoint, azure_api_key, azure_api_version
+        ).encode(),
+        hashlib.sha256,
+    ).hexdigest()
+    manifest = {
+        "hash": hashlib.sha256(
+            json.dumps({"files": files, "credentials": credentials}, sort_keys=True).encode()
+        ).hexdigest(),
+        "files": files,
+        "credentials": credentials,
+        "execution_environment_version_id": None,
+    }
+
+    record = _load_build_record(build_record_filepath)
+    if record.get("hash") != manifest["hash"] or record.get("execution_environment_id") != execution_environment_id:
+        changed = [name for name, digest in files.items() if record.get("files", {}).get(name) != digest]
+        if record.get("credentials") != credentials:
+            changed.append("credentials")
+        logger.info(f"App image needs a build, changed: {', '.join(changed)}")
+        return manifest
+
+    version_id = record["execution_environment_version_id"]
+    configure_client(endpoint, token)
+    try:
+        version = rest_client().get(
+            f"executionEnvironments/{execution_environment_id}/versions/{version_id}/"
+        ).json()
+    except ClientError:
+        logger.info(f"Execution environment version {version_id} no longer exists, rebuilding")
+        return manifest
+    if version.get("buildStatus") != "success":
+        logger.info(f"Execution environment version {version_id} did not build, rebuilding")
+        return manifest
+    logger.info(f"App assets are unchanged, reusing execution environment version {version_id}")
+    manifest["execution_environment_version_id"] = version_id
+    return manifest
 
 
 def get_or_create_execution_environment_version_with_secrets(
@@ -62,11 +227,14 @@ def get_or_create_execution_environment_version_with_secrets(
     execution_environment_id: str,
     secrets_template: str,
     app_assets: pathlib.Path,
+    app_build: Optional[Dict[str, Any]] = None,
+    build_record_filepath: Optional[str] = None,
 ) -> str:
     """Get or create the DR execution environment for the streamlit app.
 
     Bundles the secrets just in time before uploading so we don't accidentally
-    persist them locally.
+    persist them locally. Nothing is uploaded when `app_build` already names a version
+    built from the same assets, and successful builds are recorded for the next run.
 
     Parameters
     ----------
@@ -75,6 +243,10 @@ def get_or_create_execution_environment_version_with_secrets(
     app_assets : pathlib.Path
         Path to a directory containing all assets to be uploaded when creating the
         execution environment
+    app_build : dict, optional
+        Manifest from `make_app_build_manifest`
+    build_record_filepath : str, optional
+        Where to record the build for `make_app_build_manifest`
 
     Returns
     -------
@@ -85,22 +257,25 @@ def get_or_create_execution_environment_version_with_secrets(
         get_or_create_execution_environment_version,
     )
 
-    secrets_file = (secrets_template
-                    .replace("<azure_endpoint>", azure_endpoint)
-                    .replace("<azure_api_key>", azure_api_key)
-                    .replace("<azure_api_version>", azure_api_version)
-                    .replace("<datarobot_endpoint>", endpoint)
-                    .replace("<datarobot_api_token>", token)
-                    )
+    if app_build and app_build["execution_environment_version_id"]:
+        return app_build["execution_environment_version_id"]
+
+    secrets_file = _render_secrets(
+        secrets_template, endpoint, token, azure_endpoint, azure_api_key, azure_api_version
+    )
 
     # Overwrite the placeholder secrets.toml with real secrets
     with open(app_assets / ".streamlit/secrets.toml", "w") as f:
         f.write(secrets_file)
 
-    return get_or_create_execution_environment_version(
+    version_id = get_or_create_execution_environment_version(
         endpoint, token, execution_environment_id, app_assets
     )
 
+    if app_build and build_record_filepath:
+        _write_build_record(build_record_filepath, app_build, execution_environment_id, version_id)
+    return version_id
+
 
 def log_outputs(
     endpoint: str,
@@ -170,9 +345,13 @@ def make_app_assets(
     style_css: str,
     config_toml: str,
     secrets_toml: str,
+    app_build: Optional[Dict[str, Any]] = None,
 ) -> tempfile.TemporaryDirectory:
     """Assemble directory of streamlit assets to be uploaded for a new DR execution environment.
 
+    The directory is left empty when `app_build` names a version already built from
+    the same assets, since nothing will be uploaded.
+
     Parameters
     ----------
     app_py : str
@@ -193,6 +372,8 @@ def make_app_assets(
         config.toml contents to be included in execution environment
     secrets_toml : str
         secrets.toml contents to be included in execution environment
+    app_build : dict, optional
+        Manifest from `make_app_build_manifest`
 
     Returns
     -------
@@ -207,6 +388,8 @@ def make_app_assets(
 
     d = tempfile.TemporaryDirectory()
     path_to_d = d.name
+    if app_build and app_build["execution_environment_version_id"]:
+        return d
 
     files = zip(
         [
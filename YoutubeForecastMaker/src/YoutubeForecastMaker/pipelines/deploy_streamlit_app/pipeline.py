@@ -12,6 +12,7 @@ from datarobotx.idp.execution_environments import get_or_create_execution_enviro
 from .nodes import (log_outputs, 
                     prepare_yaml_content, 
                     make_app_assets,
+                    make_app_build_manifest,
                     get_or_create_execution_environment_version_with_secrets,
                     get_dataset_id)
 
@@ -48,6 +49,8 @@ def create_pipeline(**kwargs) -> Pipeline:
                 "execution_environment_id": "app_execution_environment_id",
                 "secrets_template": "app_secrets",
                 "app_assets": "app_assets",
+                "app_build": "app_build",
+                "build_record_filepath": "params:app_build_record_filepath",
             },
             outputs="execution_environment_version_id",
         ),
@@ -94,10 +97,34 @@ def create_pipeline(**kwargs) -> Pipeline:
                 "datetime_partition_column": "params:project.datetime_partitioning_config.datetime_partition_column",
                 "multiseries_id_column": "params:project.datetime_partitioning_config.multiseries_id_columns",
                 "prediction_interval": "params:deployment.prediction_interval",
-                "scoring_data": "prediction_data_id"
+                "scoring_data": "prediction_data_id",
+                "http": "params:http",
             },
             outputs="app_parameters",
         ),
+        node(
+            name="make_app_build_manifest",
+            func=make_app_build_manifest,
+            inputs={
+                "endpoint": "params:credentials.datarobot.endpoint",
+                "token": "params:credentials.datarobot.api_token",
+                "azure_endpoint": "params:credentials.azure_openai_llm_credentials.azure_endpoint",
+                "azure_api_key": "params:credentials.azure_openai_llm_credentials.api_key",
+                "azure_api_version": "params:credentials.azure_openai_llm_credentials.api_version",
+                "execution_environment_id": "app_execution_environment_id",
+                "app_py": "app_code",
+                "helpers_py": "app_helpers",
+                "app_parameters_yml": "app_parameters",
+                "requirements": "app_requirements",
+                "dockerfile": "app_dockerfile",
+                "logo": "app_logo",
+                "style_css": "app_style",
+                "config_toml": "app_config",
+                "secrets_template": "app_secrets",
+                "build_record_filepath": "params:app_build_record_filepath",
+            },
+            outputs="app_build",
+        ),
         node(
             name="make_app_assets",
             func=make_app_assets,
@@ -111,6 +138,7 @@ def create_pipeline(**kwargs) -> Pipeline:
                 "style_css": "app_style",
                 "config_toml": "app_config",
                 "secrets_toml": "app_secrets",
+                "app_build": "app_build",
             },
             outputs="app_assets",
         ),
@@ -5,7 +5,7 @@
 # affiliates.
 # Released under the terms of DataRobot Tool and Utility Agreement.
 
-from typing import List, Dict, Any, Tuple, Union, Optional
+from typing import List, Dict, Any, Iterable, Iterator, Tuple, Union, Optional, TYPE_CHECKING
 import datarobot as dr
 import pandas as pd
 
@@ -14,72 +14,421 @@ from datarobot.models.use_cases.utils import UseCaseLike
 from datarobotx.idp.common.hashing import get_hash
 import time
 
-def get_videos(playlist_ids: List[str], api_key: str) -> List[str]:
-    """
-    Pull all the video ids from a playlist
-    """
+from ...common.datarobot_client import configure_client
+from ...common.dataset_index import find_dataset_id, get_dataset_index
+from ...common.schemas import (
+    COUNTER_COLUMNS,
+    TIMESERIES_TIMEZONE,
+    apply_metadata_schema,
+    apply_timeseries_schema,
+    to_upload_frame,
+    to_wall_time,
+)
+from ...common.sessions import get_session
+from ...common.timeseries_store import LocalTimeSeriesStore
+
+if TYPE_CHECKING:
+    import asyncio
+    import httpx
     import requests
 
-    request_header = "https://www.googleapis.com/youtube/v3/playlistItems?playlistId={}&key={}&maxResults=50&part=contentDetails"
-    data = []
-    for playlist_id in playlist_ids:
-        datum = requests.get(request_header.format(playlist_id, api_key)).json()
-        data += [i['contentDetails']['videoId'] for i in datum['items']]
+# Can be pointed at devtools/fake_youtube_api.py with the `youtube_api_url` parameter
+YOUTUBE_API_URL = "https://www.googleapis.com/youtube/v3"
+YOUTUBE_VIDEOS_FIELDS = "items(id,snippet(publishedAt,channelId,title,description,categoryId,channelTitle, tags),statistics(viewCount,likeCount,commentCount),contentDetails,status)"
+YOUTUBE_VIDEOS_PART = "snippet,statistics,contentDetails,Status"
+# Videos whose metadata is already known only need their counters
+YOUTUBE_STATISTICS_FIELDS = "items(id,statistics(viewCount,likeCount,commentCount))"
+YOUTUBE_STATISTICS_PART = "statistics"
+# The videos endpoint accepts at most 50 comma-separated ids per request
+YOUTUBE_MAX_IDS_PER_REQUEST = 50
+# Quota/rate limit errors and server errors are worth retrying
+YOUTUBE_RETRYABLE_STATUS_CODES = {403, 429, 500, 502, 503, 504}
+YOUTUBE_MAX_BACKOFF_SECS = 30
+
+METADATA_COLUMNS = [
+    "video_id",
+    "publishedAt",
+    "channelId",
+    "title",
+    "categoryId",
+    "channelTitle",
+    "tags",
+    "duration",
+    "madeForKids",
+]
+# Only kept in the local metadata cache, never uploaded to the AI Catalog
+METADATA_PULLED_AT_COLUMN = "metadata_pulled_at"
+
+
+def _youtube_json(response: Union["requests.Response", "httpx.Response"]) -> Dict[str, Any]:
+    """
+    Body of a successful Youtube API response. Error responses raise instead of being
+    read as a page without items, which would look like deleted videos or an empty playlist.
+    """
+    response.raise_for_status()
+    data = response.json()
+    if "error" in data:
+        error = data["error"]
+        raise RuntimeError(f"Youtube API error {error.get('code')}: {error.get('message')}")
     return data
 
-def _pull_video_data(video_id: str, api_key: str) -> Dict[str, Any]:
+
+def _iter_playlist_pages(
+    playlist_id: str,
+    api_key: str,
+    session: "requests.Session",
+    api_url: str = YOUTUBE_API_URL,
+) -> Iterator[List[str]]:
     """
-    Pulls data from the Youtube API for a given video id
+    Yield the video ids of a playlist one page at a time, following `nextPageToken`.
+    Raises if the playlist can't be read, e.g. when it doesn't exist or the quota is used up.
     """
-    import requests
+    params = {
+        "playlistId": playlist_id,
+        "key": api_key,
+        "maxResults": 50,
+        "part": "contentDetails",
+    }
+    while True:
+        datum = _youtube_json(session.get(f"{api_url}/playlistItems", params=params))
+        yield [i['contentDetails']['videoId'] for i in datum['items']]
 
-    request_header = "https://www.googleapis.com/youtube/v3/videos?id={}&key={}&fields=items(id,snippet(publishedAt,channelId,title,description,categoryId,channelTitle, tags),statistics(viewCount,likeCount,commentCount),contentDetails,status)&part=snippet,statistics,contentDetails,Status"
-    data = requests.get(request_header.format(video_id, api_key)).json()
+        next_page_token = datum.get("nextPageToken")
+        if next_page_token is None:
+            return
+        params["pageToken"] = next_page_token
 
-    return data
 
-def compile_metadata(videos: List[str], api_key: str) -> pd.DataFrame:
+def iter_videos(
+    playlist_ids: List[str],
+    api_key: str,
+    session: Optional["requests.Session"] = None,
+    api_url: str = YOUTUBE_API_URL,
+) -> Iterator[str]:
+    """
+    Lazily enumerate the video ids of several playlists.
+
+    Pages are requested round-robin across the playlists and ids are yielded as soon
+    as their page arrives. Videos that appear in more than one playlist are only
+    yielded once.
+    """
+    session = session or get_session()
+    pages = [
+        _iter_playlist_pages(playlist_id, api_key, session, api_url)
+        for playlist_id in playlist_ids
+    ]
+    seen = set()
+    while pages:
+        for playlist_pages in list(pages):
+            page = next(playlist_pages, None)
+            if page is None:
+                pages.remove(playlist_pages)
+                continue
+            for video_id in page:
+                if video_id not in seen:
+                    seen.add(video_id)
+                    yield video_id
+
+
+def get_videos(
+    playlist_ids: List[str],
+    api_key: str,
+    http: Optional[Dict[str, Any]] = None,
+    api_url: str = YOUTUBE_API_URL,
+) -> List[str]:
+    """
+    Pull all the video ids from a list of playlists
+    """
+    return list(iter_videos(playlist_ids, api_key, session=get_session(http), api_url=api_url))
+
+
+def _batched(items: Iterable[str], batch_size: int) -> Iterator[List[str]]:
+    """
+    Split an iterable of video ids into lists of at most `batch_size` ids
+    """
+    batch = []
+    for item in items:
+        batch.append(item)
+        if len(batch) == batch_size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+def _video_request_params(
+    video_ids: List[str], api_key: str, statistics_only: bool = False
+) -> Dict[str, str]:
+    """
+    Query parameters for a single videos request
+    """
+    return {
+        "id": ",".join(video_ids),
+        "key": api_key,
+        "fields": YOUTUBE_STATISTICS_FIELDS if statistics_only else YOUTUBE_VIDEOS_FIELDS,
+        "part": YOUTUBE_STATISTICS_PART if statistics_only else YOUTUBE_VIDEOS_PART,
+    }
+
+
+def _pull_video_data(
+    video_ids: List[str],
+    api_key: str,
+    session: "requests.Session",
+    statistics_only: bool = False,
+    api_url: str = YOUTUBE_API_URL,
+) -> Dict[str, Any]:
+    """
+    Pulls data from the Youtube API for up to 50 video ids in a single request
+    """
+    params = _video_request_params(video_ids, api_key, statistics_only)
+    return _youtube_json(session.get(f"{api_url}/videos", params=params))
+
+
+def _match_batch_items(
+    batch: List[str],
+    data: Dict[str, Any],
+    found: Dict[str, Dict[str, Any]],
+    missing: List[str],
+) -> None:
+    """
+    Map the items of a successful videos response back to the requested ids.
+    Ids the response has no item for are deleted or private videos.
+    """
+    items = {item["id"]: item for item in data.get("items", [])}
+    for video_id in batch:
+        if video_id in items:
+            found[video_id] = items[video_id]
+        else:
+            missing.append(video_id)
+
+
+def _check_batch_size(batch_size: int) -> None:
+    if not 0 < batch_size <= YOUTUBE_MAX_IDS_PER_REQUEST:
+        raise ValueError(
+            f"batch_size must be between 1 and {YOUTUBE_MAX_IDS_PER_REQUEST}"
+        )
+
+
+def _pull_videos_in_batches(
+    videos: Iterable[str],
+    api_key: str,
+    session: Optional["requests.Session"] = None,
+    statistics_only: bool = False,
+    api_url: str = YOUTUBE_API_URL,
+    batch_size: int = YOUTUBE_MAX_IDS_PER_REQUEST,
+) -> Tuple[Dict[str, Dict[str, Any]], List[str]]:
+    """
+    Pull data for many videos, sending one request per batch of ids.
+
+    Returns:
+        A mapping of video id to the item returned by the API, in request order,
+        and the list of ids the API returned nothing for (deleted or private videos)
+    """
+    _check_batch_size(batch_size)
+    session = session or get_session()
+
+    found: Dict[str, Dict[str, Any]] = {}
+    missing: List[str] = []
+    for batch in _batched(videos, batch_size):
+        data = _pull_video_data(batch, api_key, session, statistics_only, api_url)
+        _match_batch_items(batch, data, found, missing)
+    return found, missing
+
+
+async def _pull_video_data_async(
+    client: "httpx.AsyncClient",
+    semaphore: "asyncio.Semaphore",
+    video_ids: List[str],
+    api_key: str,
+    max_retries: int,
+    statistics_only: bool = False,
+    api_url: str = YOUTUBE_API_URL,
+) -> Dict[str, Any]:
+    """
+    Pulls data for one batch of video ids, retrying throttled and failed requests
+    with full-jitter exponential backoff
+    """
+    import asyncio
+    import random
+
+    import httpx
+
+    params = _video_request_params(video_ids, api_key, statistics_only)
+    for attempt in range(max_retries + 1):
+        async with semaphore:
+            try:
+                response = await client.get(f"{api_url}/videos", params=params)
+            except httpx.TransportError:
+                # Covers connect/read timeouts as well as dropped connections
+                if attempt == max_retries:
+                    raise
+                response = None
+
+        if response is not None and (
+            response.status_code not in YOUTUBE_RETRYABLE_STATUS_CODES
+            or attempt == max_retries
+        ):
+            return _youtube_json(response)
+
+        # Sleep outside the semaphore so other batches can use the slot
+        await asyncio.sleep(random.uniform(0, min(YOUTUBE_MAX_BACKOFF_SECS, 2**attempt)))
+
+
+async def _pull_videos_in_batches_async(
+    videos: Iterable[str],
+    api_key: str,
+    max_concurrency: int,
+    timeout_secs: float,
+    max_retries: int,
+    statistics_only: bool = False,
+    api_url: str = YOUTUBE_API_URL,
+    batch_size: int = YOUTUBE_MAX_IDS_PER_REQUEST,
+) -> Tuple[Dict[str, Dict[str, Any]], List[str]]:
     """
-    Run the Youtube API on a list of videos to extract view statistics and metadata
+    Async counterpart of `_pull_videos_in_batches` with at most `max_concurrency`
+    requests in flight
+    """
+    import asyncio
+
+    import httpx
+
+    _check_batch_size(batch_size)
+
+    batches = list(_batched(videos, batch_size))
+    semaphore = asyncio.Semaphore(max_concurrency)
+    limits = httpx.Limits(max_connections=max_concurrency)
+    async with httpx.AsyncClient(timeout=timeout_secs, limits=limits) as client:
+        responses = await asyncio.gather(
+            *(
+                _pull_video_data_async(
+                    client, semaphore, batch, api_key, max_retries, statistics_only, api_url
+                )
+                for batch in batches
+            )
+        )
+
+    found: Dict[str, Dict[str, Any]] = {}
+    missing: List[str] = []
+    for batch, data in zip(batches, responses):
+        _match_batch_items(batch, data, found, missing)
+    return found, missing
+
+
+def _run_coroutine(coroutine: Any) -> Any:
+    """
+    Run a coroutine to completion, also from a thread whose event loop is already running
+    (notebooks, `kedro jupyter`), where `asyncio.run` refuses to start a second loop
+    """
+    import asyncio
+    from concurrent.futures import ThreadPoolExecutor
+
+    try:
+        asyncio.get_running_loop()
+    except RuntimeError:
+        return asyncio.run(coroutine)
+    with ThreadPoolExecutor(max_workers=1) as executor:
+        return executor.submit(asyncio.run, coroutine).result()
+
+
+def pull_video_data(
+    videos: List[str],
+    api_key: str,
+    metadata_videos: Optional[List[str]] = None,
+    collector: Optional[Dict[str, Any]] = None,
+    http: Optional[Dict[str, Any]] = None,
+    api_url: str = YOUTUBE_API_URL,
+) -> Dict[str, Dict[str, Any]]:
+    """
+    Run the Youtube API once on a list of videos. The raw responses feed both
+    the time series and the metadata nodes, so each video is only downloaded once per run.
+
+    Only the videos in `metadata_videos` (all videos when not given) are pulled with
+    their snippet, contentDetails and status; the rest only have their statistics pulled.
+
+    `collector` selects how requests are issued: `mode: sequential` (the default) sends
+    one blocking request at a time, `mode: async` sends up to `max_concurrency` requests concurrently
+    with a per-request `timeout_secs` and up to `max_retries` jittered retries.
+    `http` configures the pooled session used in sequential mode.
+    """
+    from logzero import logger
+
+    collector = collector or {}
+    metadata_videos = set(videos if metadata_videos is None else metadata_videos)
+
+    video_data: Dict[str, Dict[str, Any]] = {}
+    missing: List[str] = []
+    for statistics_only in (False, True):
+        group = [id for id in videos if (id in metadata_videos) != statistics_only]
+        if not group:
+            continue
+        if collector.get("mode", "sequential") == "async":
+            found, not_found = _run_coroutine(
+                _pull_videos_in_batches_async(
+                    group,
+                    api_key,
+                    max_concurrency=collector.get("max_concurrency", 8),
+                    timeout_secs=collector.get("timeout_secs", 30),
+                    max_retries=collector.get("max_retries", 5),
+                    statistics_only=statistics_only,
+                    api_url=api_url,
+                )
+            )
+        else:
+            found, not_found = _pull_videos_in_batches(
+                group,
+                api_key,
+                session=get_session(http),
+                statistics_only=statistics_only,
+                api_url=api_url,
+            )
+        video_data.update(found)
+        missing += not_found
+
+    # Keep the order the videos were enumerated in
+    video_data = {id: video_data[id] for id in videos if id in video_data}
+    if missing:
+        logger.warning(f"{len(missing)} videos are not available: {', '.join(missing)}")
+
+    logger.info(f"Pulled Youtube data on {len(video_data)} videos")
+    return video_data
+
+def compile_metadata(video_data: Dict[str, Dict[str, Any]]) -> pd.DataFrame:
+    """
+    Extract metadata from the raw Youtube API responses
     """
     from logzero import logger
 
     video_metadata = []
-    for id in videos:
-        try:
-            items = _pull_video_data(id, api_key)["items"][0]
-
-            video_metadata.append({
-                "video_id": id,
-                "publishedAt": items["snippet"]["publishedAt"],
-                "channelId": items["snippet"]["channelId"],
-                "title": items["snippet"]["title"],
-                # "description": items["snippet"]["description"],
-                "categoryId": items["snippet"]["categoryId"],
-                "channelTitle": items["snippet"]["channelTitle"],
-                "tags": ", ".join(items["snippet"].get("tags", [])),
-                "duration": items["contentDetails"]["duration"],
-                "madeForKids": items["status"]["madeForKids"]
-            })
-
-            logger.info(f"""Pulled Youtube Metadata on {items['snippet']['title']}""")
-        except IndexError as e:
-            print(e, "video with ID", id, "is not available")
+    for id, items in video_data.items():
+        if "snippet" not in items:
+            # Only statistics were pulled for this video
             continue
-        
-    return pd.DataFrame(video_metadata)
 
-def compile_timeseries_data(videos: List[str], api_key: str) -> pd.DataFrame:
+        video_metadata.append({
+            "video_id": id,
+            "publishedAt": items["snippet"]["publishedAt"],
+            "channelId": items["snippet"]["channelId"],
+            "title": items["snippet"]["title"],
+            # "description": items["snippet"]["description"],
+            "categoryId": items["snippet"]["categoryId"],
+            "channelTitle": items["snippet"]["channelTitle"],
+            "tags": ", ".join(items["snippet"].get("tags", [])),
+            "duration": items["contentDetails"]["duration"],
+            "madeForKids": items["status"]["madeForKids"]
+        })
+
+        logger.info(f"""Pulled Youtube Metadata on {items['snippet']['title']}""")
+
+    return apply_metadata_schema(pd.DataFrame(video_metadata, columns=METADATA_COLUMNS))
+
+def compile_timeseries_data(video_data: Dict[str, Dict[str, Any]]) -> pd.DataFrame:
     """
-    Run the Youtube API on a list of videos to extract view statistics and metadata
+    Extract view statistics from the raw Youtube API responses
     """
-    from datetime import datetime
     from logzero import logger
-    import pytz
 
     # It's important to ensure consistency by adding in a timezone.
-    timezone = pytz.timezone('America/New_York')
-    current_time = pd.to_datetime(datetime.now(tz=timezone).strftime('%Y-%m-%d %H:%M:%S'))
+    current_time = pd.Timestamp.now(tz=TIMESERIES_TIMEZONE).floor("s")
 
     # Rounding timestamp to nearest half/full hour
     minutes = current_time.minute
@@ -89,33 +438,21 @@ def compile_timeseries_data(videos: List[str], api_key: str) -> pd.DataFrame:
         current_time = current_time.replace(minute=30, second=0, microsecond=0)
     else:
         current_time = (current_time + pd.Timedelta(minutes=(60 - minutes))).replace(minute=0, second=0, microsecond=0)
-    
-    video_statistics = []
-    for id in videos:
-        try:
-            items = _pull_video_data(id, api_key)["items"][0]
 
-            video_stats = items["statistics"]
-            video_stats["as_of_datetime"] = current_time
-            video_stats["video_id"] = id
+    video_statistics = []
+    for id, items in video_data.items():
+        # Copy so the shared response isn't mutated for the metadata node
+        video_stats = dict(items["statistics"])
+        video_stats["as_of_datetime"] = current_time
+        video_stats["video_id"] = id
 
-            video_statistics.append(video_stats)
+        video_statistics.append(video_stats)
 
-            logger.info(f"""Pulled Youtube Time Series Data on {items['snippet']['title']}""")
-        except IndexError as e:
-            print(e, "video with ID", id, "is not available")
-            continue
+        logger.info(f"""Pulled Youtube Time Series Data on {items.get('snippet', {}).get('title', id)}""")
 
-    return pd.DataFrame(video_statistics)
-
-def _check_if_dataset_exists(name: str) -> Union[str, None]:
-    """
-    Check if a dataset with the given name exists in the AI Catalog
-    Returns:
-        id (string) or None
-    """
-    datasets = dr.Dataset.list()
-    return next((dataset.id for dataset in datasets if dataset.name == name), None)
+    return apply_timeseries_schema(
+        pd.DataFrame(video_statistics, columns=COUNTER_COLUMNS + ["as_of_datetime", "video_id"])
+    )
 
 def update_or_create_timeseries_dataset(
         endpoint: str,
@@ -123,45 +460,201 @@ def update_or_create_timeseries_dataset(
         name: str, 
         data_frame: pd.DataFrame, 
         use_cases: Optional[UseCaseLike] = None,
+        store: Optional[LocalTimeSeriesStore] = None,
+        materialize_every_n_snapshots: int = 1,
         **kwargs: Any,
-) -> None:
+) -> LocalTimeSeriesStore:
     """
+    Append the latest snapshot to the local time series store and upload the full
+    history to the AI Catalog every `materialize_every_n_snapshots` snapshots.
+    `store` is the `timeseries_store` catalog entry.
+
+    The local store is the source of truth, so a run never has to download the
+    catalog history. It is seeded from the catalog once if it doesn't exist yet.
+    Returns the store, so downstream nodes read the history including this snapshot.
     """
     from datetime import timedelta
-    CLIENT = dr.Client(token=token, endpoint=endpoint)
+    from logzero import logger
+
+    configure_client(endpoint, token)
     dataset_token = get_hash(name, data_frame, use_cases, **kwargs)
-    dataset_id = _check_if_dataset_exists(name)
+    dataset_id = find_dataset_id(name)
+
+    store = store or LocalTimeSeriesStore("data/timeseries_store")
+
+    if dataset_id is not None and store.is_empty():
+        logger.info(f"Seeding local time series store from {name}")
+        store.bootstrap(dr.Dataset.get(dataset_id).get_as_dataframe())
+
+    if data_frame.empty:
+        logger.warning(f"No videos were pulled, {name} is left unchanged")
+        return store
+
+    latest_time_pulled = store.watermark
+    time_pulled_this_df = to_wall_time(data_frame["as_of_datetime"]).max()
+
+    # Guard rail to ensure that there is sufficient time between data pulls.
+    if latest_time_pulled is not None and abs(latest_time_pulled - time_pulled_this_df) <= timedelta(hours=0.5):
+        return store
+
+    store.append(data_frame)
 
     if dataset_id is None:
         dataset: Dataset = Dataset.create_from_in_memory_data(
-            data_frame=data_frame, use_cases=use_cases
+            data_frame=store.read(), use_cases=use_cases
         )
         dataset.modify(name=f"{name}")
+        get_dataset_index().register(name, dataset.id)
+        store.mark_materialized()
+    elif store.snapshots_since_materialization >= materialize_every_n_snapshots:
+        dataset = dr.Dataset.create_version_from_in_memory_data(dataset_id, store.read())
+        store.mark_materialized()
     else:
-        current_data = dr.Dataset.get(dataset_id).get_as_dataframe()
-        latest_time_pulled = pd.to_datetime(current_data["as_of_datetime"]).max()
+        logger.info(
+            f"Stored snapshot locally; {name} will be uploaded after "
+            f"{materialize_every_n_snapshots - store.snapshots_since_materialization} more snapshots"
+        )
+    return store
 
-        time_pulled_this_df = pd.to_datetime(data_frame["as_of_datetime"]).max()
+def _read_metadata_cache(cache_filepath: Optional[str]) -> Optional[pd.DataFrame]:
+    """
+    The local copy of the metadataset, None when there is none yet
+    """
+    import os
 
-        # Guard rail to ensure that there is sufficient time between data pulls.
-        if abs(latest_time_pulled - time_pulled_this_df) <= timedelta(hours=0.5):
-            return name
-        else:
-            # update dataset if time is greater than 2 hours
-            updated_df = pd.concat([current_data, data_frame]).reset_index(drop=True)
-            dataset = dr.Dataset.create_version_from_in_memory_data(dataset_id, updated_df)
+    if not cache_filepath or not os.path.exists(cache_filepath):
+        return None
+    # Caches written before the typed schema hold ISO durations and plain strings
+    return apply_metadata_schema(pd.read_parquet(cache_filepath))
+
+def load_known_metadata(
+        endpoint: str,
+        token: str,
+        name: str,
+        metadata_refresh: Optional[Dict[str, Any]] = None,
+) -> pd.DataFrame:
+    """
+    Load the metadata of the videos that have already been ingested, from the local
+    cache when it exists or else from the metadataset in the AI Catalog.
+    Empty when incremental metadata ingestion is disabled.
+    """
+    metadata_refresh = metadata_refresh or {}
+    empty = pd.DataFrame(columns=METADATA_COLUMNS + [METADATA_PULLED_AT_COLUMN])
+    if not metadata_refresh.get("incremental", False):
+        return empty
+
+    cached = _read_metadata_cache(metadata_refresh.get("cache_filepath"))
+    if cached is not None:
+        return cached
+
+    configure_client(endpoint, token)
+    dataset_id = find_dataset_id(name)
+    if dataset_id is None:
+        return empty
+
+    known_metadata = apply_metadata_schema(dr.Dataset.get(dataset_id).get_as_dataframe())
+    # The age of catalog rows is unknown, so they count as stale until pulled again
+    known_metadata[METADATA_PULLED_AT_COLUMN] = pd.Series(
+        pd.NaT, index=known_metadata.index, dtype="datetime64[ns, UTC]"
+    )
+    return known_metadata
+
+def select_metadata_videos(
+        videos: List[str],
+        known_metadata: pd.DataFrame,
+        metadata_refresh: Optional[Dict[str, Any]] = None,
+) -> List[str]:
+    """
+    Pick the videos whose metadata should be pulled: videos that aren't in the
+    metadataset yet and, if `refresh_after_days` is set, videos pulled longer ago than that
+    """
+    from logzero import logger
+
+    refresh_after_days = (metadata_refresh or {}).get("refresh_after_days")
+    known_ids = set(known_metadata["video_id"])
+
+    stale_ids = set()
+    if refresh_after_days is not None and len(known_metadata):
+        pulled_at = pd.to_datetime(known_metadata[METADATA_PULLED_AT_COLUMN], utc=True)
+        cutoff = pd.Timestamp.now(tz="UTC") - pd.Timedelta(days=refresh_after_days)
+        stale = pulled_at.isna() | (pulled_at < cutoff)
+        stale_ids = set(known_metadata.loc[stale.to_numpy(), "video_id"])
+
+    metadata_videos = [id for id in videos if id not in known_ids or id in stale_ids]
+    logger.info(
+        f"Pulling metadata for {len(metadata_videos)} of {len(videos)} videos "
+        f"({len(stale_ids & set(videos))} refreshed)"
+    )
+    return metadata_videos
+
+def _same_rows(left: pd.DataFrame, right: pd.DataFrame) -> bool:
+    """
+    Compare two metadata frames regardless of row order and column dtypes
+    """
+    if set(left.columns) != set(right.columns) or len(left) != len(right):
+        return False
+    columns = sorted(left.columns)
+    left = left[columns].astype(str).sort_values("video_id").reset_index(drop=True)
+    right = right[columns].astype(str).sort_values("video_id").reset_index(drop=True)
+    return left.equals(right)
 
 def update_or_create_metadataset(
         name: str, 
         data_frame: pd.DataFrame, 
         use_cases: Optional[UseCaseLike] = None, 
-) -> None:
+        known_metadata: Optional[pd.DataFrame] = None,
+        metadata_refresh: Optional[Dict[str, Any]] = None,
+) -> pd.DataFrame:
     """
+    Create the metadataset or add a version with newly pulled and refreshed videos.
+    Rows for videos that weren't pulled this run are carried over from `known_metadata`.
+    No version is added when the rows are the same as in `known_metadata`, or in the
+    local cache when incremental ingestion is disabled.
+    Returns the full metadata, i.e. the rows of the metadataset.
     """
-    dataset_id = _check_if_dataset_exists(name)
+    import os
+    from logzero import logger
+
+    metadata_refresh = metadata_refresh or {}
+    if known_metadata is None:
+        known_metadata = pd.DataFrame(columns=METADATA_COLUMNS + [METADATA_PULLED_AT_COLUMN])
+
+    pulled = data_frame.assign(**{METADATA_PULLED_AT_COLUMN: pd.Timestamp.now(tz="UTC")})
+    carried_over = known_metadata[~known_metadata["video_id"].isin(data_frame["video_id"])]
+    if not len(pulled):
+        combined = known_metadata
+    elif not len(carried_over):
+        combined = pulled.reset_index(drop=True)
+    else:
+        combined = pd.concat([carried_over, pulled]).reset_index(drop=True)
+    # Concatenating categoricals with different categories falls back to object
+    combined = apply_metadata_schema(combined)
+    upload_frame = to_upload_frame(combined.drop(columns=METADATA_PULLED_AT_COLUMN))
+
+    dataset_id = find_dataset_id(name)
+    cache_filepath = metadata_refresh.get("cache_filepath")
 
     if dataset_id is None:
         dataset: Dataset = Dataset.create_from_in_memory_data(
-            data_frame=data_frame, use_cases=use_cases
+            data_frame=upload_frame, use_cases=use_cases
         )
-        dataset.modify(name=f"{name}")
\ No newline at end of file
+        dataset.modify(name=f"{name}")
+        get_dataset_index().register(name, dataset.id)
+    elif len(pulled):
+        if metadata_refresh.get("incremental", False):
+            current = known_metadata
+        else:
+            # Nothing was loaded up front, and downloading the metadataset to compare
+            # would cost more than the upload. Without a cache every run adds a version.
+            current = _read_metadata_cache(cache_filepath)
+        if current is None or not _same_rows(
+            upload_frame, to_upload_frame(current.drop(columns=METADATA_PULLED_AT_COLUMN))
+        ):
+            dr.Dataset.create_version_from_in_memory_data(dataset_id, upload_frame)
+            logger.info(f"Added {len(pulled)} new or refreshed videos to {name}")
+
+    if cache_filepath:
+        os.makedirs(os.path.dirname(cache_filepath) or ".", exist_ok=True)
+        combined.to_parquet(cache_filepath, index=False)
+
+    return combined.drop(columns=METADATA_PULLED_AT_COLUMN)
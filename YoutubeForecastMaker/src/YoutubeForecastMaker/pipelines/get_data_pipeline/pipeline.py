@@ -10,9 +10,12 @@ from datarobotx.idp.use_cases import get_or_create_use_case
 
 from .nodes import (
                 get_videos, 
+                pull_video_data,
                 compile_timeseries_data,
                 update_or_create_timeseries_dataset,
                 compile_metadata,
+                load_known_metadata,
+                select_metadata_videos,
                 update_or_create_metadataset
                 )
 
@@ -34,16 +37,51 @@ def create_pipeline(**kwargs) -> Pipeline:
             func=get_videos,
             inputs={
                 "playlist_ids": "params:playlist_ids",
-                "api_key": "params:credentials.youtube_api_key"
+                "api_key": "params:credentials.youtube_api_key",
+                "http": "params:http",
+                "api_url": "params:youtube_api_url",
             },
             outputs="combined_videos",
         ),
+        node(
+            name="Get_known_metadata",
+            func=load_known_metadata,
+            inputs={
+                "endpoint": "params:credentials.datarobot.endpoint",
+                "token": "params:credentials.datarobot.api_token",
+                "name": "params:metadataset_name",
+                "metadata_refresh": "params:metadata_refresh",
+            },
+            outputs="known_metadata",
+        ),
+        node(
+            name="Select_metadata_videos",
+            func=select_metadata_videos,
+            inputs={
+                "videos": "combined_videos",
+                "known_metadata": "known_metadata",
+                "metadata_refresh": "params:metadata_refresh",
+            },
+            outputs="metadata_videos",
+        ),
+        node(
+            name="Pull_video_data",
+            func=pull_video_data,
+            inputs={
+                "videos": "combined_videos",
+                "api_key": "params:credentials.youtube_api_key",
+                "metadata_videos": "metadata_videos",
+                "collector": "params:collector",
+                "http": "params:http",
+                "api_url": "params:youtube_api_url",
+            },
+            outputs="video_data",
+        ),
         node(
             name="Pull_Data",
             func=compile_timeseries_data,
             inputs={
-                "videos": "combined_videos",
-                "api_key": "params:credentials.youtube_api_key"
+                "video_data": "video_data",
             },
             outputs="time_series_data",
             tags=["checkpoint"],
@@ -52,8 +90,7 @@ def create_pipeline(**kwargs) -> Pipeline:
             name="Pull_metadata",
             func=compile_metadata,
             inputs={
-                "videos": "combined_videos",
-                "api_key": "params:credentials.youtube_api_key"
+                "video_data": "video_data",
             },
             outputs="metadata",
             tags=["checkpoint"],
@@ -67,8 +104,10 @@ def create_pipeline(**kwargs) -> Pipeline:
                 "name": "params:timeseries_dataset_name",
                 "data_frame": "time_series_data",
                 "use_cases": "use_case_id",
+                "store": "timeseries_store",
+                "materialize_every_n_snapshots": "params:materialize_every_n_snapshots",
             },
-            outputs=None
+            outputs="timeseries_history",
         ),
         node(
             name="update_metadata",
@@ -77,8 +116,10 @@ def create_pipeline(**kwargs) -> Pipeline:
                 "use_cases": "use_case_id",
                 "name": "params:metadataset_name",
                 "data_frame": "metadata",
+                "known_metadata": "known_metadata",
+                "metadata_refresh": "params:metadata_refresh",
             },
-            outputs=None
+            outputs="all_metadata",
         ),
     ]
     pipeline_inst = pipeline(nodes)
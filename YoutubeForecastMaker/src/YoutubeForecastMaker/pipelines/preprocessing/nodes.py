@@ -5,28 +5,490 @@
 # affiliates.
 # Released under the terms of DataRobot Tool and Utility Agreement.
 
-from typing import List, Dict, Any, Tuple, Union, Optional
+from typing import List, Dict, Any, Tuple, Optional
 import datarobot as dr
+import numpy as np
 import pandas as pd
 
 from datarobot import Dataset
 from datarobot.models.use_cases.utils import UseCaseLike
 
-def _check_if_dataset_exists(name: str) -> Union[str, None]:
+from ...common.datarobot_client import configure_client, rest_client
+from ...common.dataset_index import find_dataset_id, get_dataset_index
+from ...common.schemas import (
+    CATEGORICAL_COLUMNS,
+    COUNTER_COLUMNS,
+    STRING_COLUMNS,
+    apply_metadata_schema,
+    apply_timeseries_schema,
+    repeated_hour_start,
+    to_upload_frame,
+    to_wall_time,
+)
+from ...common.timeseries_store import LocalTimeSeriesStore
+
+
+DIFF_COLUMNS = ["viewDiff", "likeDiff", "commentDiff"]
+# Per-video state that lets the next run continue the thinning and diffs where this one stopped
+LAST_COUNTER_COLUMNS = ["last_" + column for column in COUNTER_COLUMNS]
+WATERMARK_COLUMNS = ["video_id", "last_seen_datetime", "seen_count"] + LAST_COUNTER_COLUMNS
+# Dataset version deletes that fail with these statuses are worth retrying
+RETRYABLE_STATUS_CODES = {429, 500, 502, 503, 504}
+MAX_BACKOFF_SECS = 30
+
+
+def empty_watermarks() -> pd.DataFrame:
+    """Watermarks of a run that hasn't seen any snapshots yet."""
+    return pd.DataFrame(
+        {
+            "video_id": pd.Series(dtype="category"),
+            "last_seen_datetime": pd.Series(dtype="datetime64[ns, UTC]"),
+            "seen_count": pd.Series(dtype="Int64"),
+            **{column: pd.Series(dtype="Int64") for column in LAST_COUNTER_COLUMNS},
+        }
+    )
+
+
+def thin_timeseries(
+    raw_ts_data: pd.DataFrame,
+    watermarks: Optional[pd.DataFrame] = None,
+    latest: Optional[pd.Timestamp] = None,
+) -> Tuple[pd.DataFrame, pd.DataFrame]:
+    """Keep every third snapshot per video and add the counter diffs.
+
+    With `watermarks` from a previous run only snapshots newer than each video's
+    `last_seen_datetime` are processed. The thinning phase and the diffs continue from
+    the stored state, so concatenating the outputs of consecutive runs gives the same
+    rows as one run over the full history. Snapshots that arrive later than the
+    watermark of their video are ignored. While the latest snapshot is in the hour that
+    repeats when daylight saving time ends, that hour is left for the next run.
+
+    Parameters
+    ----------
+    raw_ts_data : pd.DataFrame
+        The raw timeseries data
+    watermarks : pd.DataFrame, optional
+        State returned by the previous run
+    latest : pd.Timestamp, optional
+        Latest snapshot of the whole time series, when `raw_ts_data` only holds some
+        of the videos. Defaults to the latest snapshot in `raw_ts_data`
+
+    Returns
+    -------
+    pd.DataFrame
+        Thinned snapshots sorted by video and `as_of_datetime`
+    pd.DataFrame
+        Watermarks to pass to the next run
+    """
+    if watermarks is None:
+        watermarks = empty_watermarks()
+    new_data = apply_timeseries_schema(raw_ts_data).reset_index(drop=True)
+    new_data["video_id"] = new_data["video_id"].astype(str)
+    watermarks = watermarks.astype({"video_id": str})
+
+    state = new_data[["video_id"]].merge(watermarks, on="video_id", how="left")
+    last_seen = pd.to_datetime(state["last_seen_datetime"], utc=True)
+    is_new = last_seen.isna() | (new_data["as_of_datetime"] > last_seen)
+    cutoff = repeated_hour_start(new_data["as_of_datetime"].max() if latest is None else latest)
+    if cutoff is not None:
+        is_new &= new_data["as_of_datetime"] < cutoff
+    new_data = new_data[is_new.to_numpy()]
+
+    new_data = new_data.sort_values(['video_id', 'as_of_datetime'], kind="stable")
+
+    new_data = new_data.drop_duplicates(subset=["video_id", "viewCount", "as_of_datetime"])
+    new_data = new_data.merge(watermarks, on="video_id", how="left")
+    by_video = new_data.groupby('video_id', sort=False)
+
+    seen_counts = by_video.agg(
+        last_seen_datetime=("as_of_datetime", "max"), new_count=("as_of_datetime", "size")
+    )
+
+    # Keep the 1st, 4th, 7th, ... snapshot of every video
+    position = by_video.cumcount() + new_data["seen_count"].fillna(0)
+    new_data = new_data[(position % 3 == 0).to_numpy()].reset_index(drop=True)
+
+    # Calculate the difference in the counters from the previous kept snapshot of each video
+    #   for the first entry, it remains 0
+    by_video = new_data.groupby('video_id', sort=False)
+    diffs = by_video[COUNTER_COLUMNS].diff().set_axis(DIFF_COLUMNS, axis=1)
+    first = (by_video.cumcount() == 0).to_numpy()
+    diffs[first] = (
+        new_data.loc[first, COUNTER_COLUMNS].to_numpy()
+        - new_data.loc[first, LAST_COUNTER_COLUMNS].to_numpy()
+    )
+    new_data[DIFF_COLUMNS] = diffs.astype("Int64")
+
+    last_emitted = new_data.drop_duplicates("video_id", keep="last").set_index("video_id")[COUNTER_COLUMNS]
+    new_watermarks = (
+        seen_counts.join(last_emitted.set_axis(LAST_COUNTER_COLUMNS, axis=1))
+        .reset_index()
+        .merge(watermarks, on="video_id", how="left", suffixes=("", "_previous"))
+    )
+    new_watermarks["seen_count"] = new_watermarks["seen_count"].fillna(0) + new_watermarks.pop("new_count")
+    for column in LAST_COUNTER_COLUMNS:
+        # Videos without a kept snapshot in this run still diff against the old one
+        previous = new_watermarks.pop(column + "_previous")
+        new_watermarks[column] = new_watermarks[column].where(
+            new_watermarks["video_id"].isin(new_data["video_id"]), previous
+        )
+    new_watermarks = new_watermarks.drop(columns="last_seen_datetime_previous")
+    new_watermarks = pd.concat(
+        [watermarks[~watermarks["video_id"].isin(new_watermarks["video_id"])], new_watermarks]
+    )[WATERMARK_COLUMNS]
+
+    new_data = new_data.drop(columns=["last_seen_datetime", "seen_count"] + LAST_COUNTER_COLUMNS)
+    new_data[COUNTER_COLUMNS + DIFF_COLUMNS] = new_data[COUNTER_COLUMNS + DIFF_COLUMNS].fillna(0)
+    new_data["viewDiff"] = new_data["viewDiff"].clip(lower=0)
+    return apply_timeseries_schema(new_data), _watermark_schema(new_watermarks)
+
+
+def _watermark_schema(watermarks: pd.DataFrame) -> pd.DataFrame:
+    watermarks = watermarks.reset_index(drop=True)
+    watermarks["video_id"] = watermarks["video_id"].astype(str).astype("category")
+    watermarks["last_seen_datetime"] = pd.to_datetime(watermarks["last_seen_datetime"], utc=True)
+    return watermarks.astype({column: "Int64" for column in ["seen_count"] + LAST_COUNTER_COLUMNS})
+
+
+def resample_timeseries(
+    raw_ts_data: pd.DataFrame,
+    freq: str,
+    fill_gaps: bool = False,
+    watermarks: Optional[pd.DataFrame] = None,
+    latest: Optional[pd.Timestamp] = None,
+) -> Tuple[pd.DataFrame, pd.DataFrame]:
+    """Align every video onto a regular grid of `freq` and add the counter diffs.
+
+    Snapshots are binned by flooring `as_of_datetime` to the grid and the last snapshot
+    in each bin is kept, stamped with the start of its bin. The bin of the latest
+    snapshot may still receive snapshots and is left for the next run. While the latest
+    snapshot is in the hour that repeats when daylight saving time ends, every bin from
+    the start of that hour on is left too. With `fill_gaps`, bins without a snapshot
+    between the first and last bin of a video repeat the previous counters, so their
+    diffs are 0.
+
+    Parameters
+    ----------
+    raw_ts_data : pd.DataFrame
+        The raw timeseries data
+    freq : str
+        Fixed grid step, e.g. "90min"
+    fill_gaps : bool
+        Whether to fill empty bins with the previous counters
+    watermarks : pd.DataFrame, optional
+        State returned by the previous run; only later bins are emitted and the first
+        diff of each video continues from its last emitted bin
+    latest : pd.Timestamp, optional
+        Latest snapshot of the whole time series, when `raw_ts_data` only holds some
+        of the videos. Defaults to the latest snapshot in `raw_ts_data`
+
+    Returns
+    -------
+    pd.DataFrame
+        One row per video and grid step, sorted by video and `as_of_datetime`
+    pd.DataFrame
+        Watermarks to pass to the next run
+    """
+    step = pd.Timedelta(freq)
+    if watermarks is None:
+        watermarks = empty_watermarks()
+    new_data = apply_timeseries_schema(raw_ts_data).reset_index(drop=True)
+    new_data["video_id"] = new_data["video_id"].astype(str)
+    watermarks = watermarks.astype({"video_id": str})
+
+    # Floor in UTC so the grid doesn't shift at daylight saving time changes
+    bins = new_data["as_of_datetime"].dt.tz_convert("UTC").dt.floor(step)
+    latest = new_data["as_of_datetime"].max() if latest is None else pd.Timestamp(latest)
+    cutoff = repeated_hour_start(latest)
+    open_bin = (latest if cutoff is None else cutoff).tz_convert("UTC").floor(step)
+    last_bin = pd.to_datetime(
+        new_data[["video_id"]].merge(watermarks, on="video_id", how="left")["last_seen_datetime"],
+        utc=True,
+    )
+    is_new = ((bins < open_bin) & (last_bin.isna() | (bins > last_bin))).to_numpy()
+    new_data = new_data[is_new].assign(bin=bins[is_new])
+
+    # Last observation in each bin
+    new_data = new_data.sort_values(['video_id', 'as_of_datetime'], kind="stable")
+    new_data = new_data.drop_duplicates(subset=["video_id", "bin"], keep="last")
+    new_data = new_data.drop(columns="as_of_datetime")[["video_id", "bin"] + COUNTER_COLUMNS]
+
+    # Previously emitted bins anchor the gap filling and the first diff, they are dropped again
+    anchors = watermarks[watermarks["video_id"].isin(new_data["video_id"])]
+    anchors = pd.DataFrame(
+        {
+            "video_id": anchors["video_id"],
+            "bin": pd.to_datetime(anchors["last_seen_datetime"], utc=True),
+            **{
+                column: anchors[last_column]
+                for column, last_column in zip(COUNTER_COLUMNS, LAST_COUNTER_COLUMNS)
+            },
+            "is_anchor": True,
+        }
+    )
+    new_data = pd.concat([anchors, new_data.assign(is_anchor=False)], ignore_index=True)
+    new_data = new_data.sort_values(["video_id", "bin"], kind="stable").reset_index(drop=True)
+
+    if fill_gaps and len(new_data):
+        bounds = new_data.groupby("video_id", sort=False)["bin"].agg(["min", "max"])
+        counts = ((bounds["max"] - bounds["min"]) // step + 1).to_numpy()
+        offsets = np.arange(counts.sum()) - np.repeat(np.cumsum(counts) - counts, counts)
+        starts = bounds["min"].dt.tz_localize(None).to_numpy()
+        grid = pd.DataFrame(
+            {
+                "video_id": np.repeat(bounds.index.to_numpy(), counts),
+                "bin": pd.to_datetime(
+                    np.repeat(starts, counts) + offsets * step.to_timedelta64()
+                ).tz_localize("UTC"),
+            }
+        )
+        new_data = grid.merge(new_data, on=["video_id", "bin"], how="left", indicator=True)
+        is_gap = (new_data.pop("_merge") == "left_only").to_numpy()
+        filled = new_data.groupby("video_id", sort=False)[COUNTER_COLUMNS].ffill()
+        new_data.loc[is_gap, COUNTER_COLUMNS] = filled.loc[is_gap]
+        new_data["is_anchor"] = new_data["is_anchor"].fillna(False).astype(bool)
+
+    # Calculate the difference in the counters from the previous grid step of each video
+    #   for the first entry, it remains 0
+    by_video = new_data.groupby('video_id', sort=False)
+    new_data[DIFF_COLUMNS] = by_video[COUNTER_COLUMNS].diff().set_axis(DIFF_COLUMNS, axis=1)
+
+    last_rows = new_data.drop_duplicates("video_id", keep="last")
+    new_watermarks = pd.DataFrame(
+        {
+            "video_id": last_rows["video_id"],
+            "last_seen_datetime": last_rows["bin"],
+            "seen_count": pd.NA,
+            **{
+                last_column: last_rows[column]
+                for column, last_column in zip(COUNTER_COLUMNS, LAST_COUNTER_COLUMNS)
+            },
+        }
+    )
+    new_watermarks = pd.concat(
+        [watermarks[~watermarks["video_id"].isin(new_watermarks["video_id"])], new_watermarks]
+    )[WATERMARK_COLUMNS]
+
+    new_data = new_data[~new_data.pop("is_anchor").to_numpy()]
+    new_data = new_data.rename(columns={"bin": "as_of_datetime"})
+    new_data = new_data[COUNTER_COLUMNS + ["as_of_datetime", "video_id"] + DIFF_COLUMNS]
+    new_data[COUNTER_COLUMNS + DIFF_COLUMNS] = new_data[COUNTER_COLUMNS + DIFF_COLUMNS].fillna(0)
+    new_data["viewDiff"] = new_data["viewDiff"].clip(lower=0)
+    return apply_timeseries_schema(new_data.reset_index(drop=True)), _watermark_schema(new_watermarks)
+
+
+def downsample_timeseries(
+    raw_ts_data: pd.DataFrame,
+    watermarks: Optional[pd.DataFrame] = None,
+    downsampling: Optional[Dict[str, Any]] = None,
+    engine: str = "pandas",
+    latest: Optional[pd.Timestamp] = None,
+) -> Tuple[pd.DataFrame, pd.DataFrame]:
+    """Downsample with the `method` configured in `downsampling`.
+
+    "every_third" (the default) uses `thin_timeseries`, "grid" uses `resample_timeseries`,
+    both are passed `latest`.
+    With `engine="polars"` every-third thinning runs through `polars_engine` instead,
+    falling back to pandas when polars isn't installed. Both engines return identical frames.
     """
-    Check if a dataset with the given name exists in the AI Catalog
-    Returns:
-        id (string) or None
+    from logzero import logger
+
+    downsampling = downsampling or {}
+    method = downsampling.get("method", "every_third")
+    if engine == "polars" and method == "every_third":
+        try:
+            from .polars_engine import thin_timeseries_polars
+        except ImportError:
+            logger.warning("polars is not installed, preprocessing with pandas instead")
+        else:
+            new_data, new_watermarks = thin_timeseries_polars(
+                raw_ts_data, empty_watermarks() if watermarks is None else watermarks, latest
+            )
+            return new_data, _watermark_schema(new_watermarks)
+    elif engine not in ("pandas", "polars"):
+        raise ValueError(f"Unknown preprocessing engine {engine}")
+
+    if method == "grid":
+        return resample_timeseries(
+            raw_ts_data,
+            downsampling["freq"],
+            fill_gaps=downsampling.get("fill_gaps", False),
+            watermarks=watermarks,
+            latest=latest,
+        )
+    elif method == "every_third":
+        return thin_timeseries(raw_ts_data, watermarks, latest)
+    raise ValueError(f"Unknown downsampling method {method}")
+
+
+def join_metadata(metadata_df: pd.DataFrame, timeseries: pd.DataFrame) -> pd.DataFrame:
+    """Inner join the metadata onto thinned snapshots, sorted by video and `as_of_datetime`."""
+    metadata_df = apply_metadata_schema(metadata_df)
+
+    # Join the metadata and timeseries data on the Video ID
+    new_data = pd.merge(metadata_df, timeseries, on="video_id", how="inner").reset_index(drop=True)
+    # The merge key loses its categorical dtype when the two sides have different categories
+    new_data = apply_timeseries_schema(new_data)
+    new_data = new_data.sort_values(['video_id', 'as_of_datetime'], kind="stable").reset_index(drop=True)
+
+    return _zero_fill_metadata(new_data)
+
+
+def _zero_fill_metadata(new_data: pd.DataFrame) -> pd.DataFrame:
+    """Upload missing metadata as 0, like the frame-wide `fillna(0)` this replaced.
+
+    DataRobot infers the feature types of the modeling dataset from these values, so
+    e.g. videos without tags keep a literal "0" instead of an empty cell.
     """
-    datasets = dr.Dataset.list()
-    return next((dataset.id for dataset in datasets if dataset.name == name), None)
+    for column in STRING_COLUMNS:
+        new_data[column] = new_data[column].fillna("0")
+    for column in CATEGORICAL_COLUMNS:
+        if column != "video_id" and new_data[column].isna().any():
+            new_data[column] = new_data[column].cat.add_categories(
+                [] if "0" in new_data[column].cat.categories else ["0"]
+            ).fillna("0")
+    new_data["duration"] = new_data["duration"].fillna(0)
+    new_data["madeForKids"] = new_data["madeForKids"].fillna(False)
+    return new_data
+
+
+def prepare_modeling_data(
+    metadata_df: pd.DataFrame,
+    raw_ts_data: pd.DataFrame,
+    downsampling: Optional[Dict[str, Any]] = None,
+    engine: str = "pandas",
+) -> pd.DataFrame:
+    """Join metadata onto the time series, downsample each video and add diffs.
+
+    Parameters
+    ----------
+    metadata_df : pd.DataFrame
+        The raw metadata dataset to combine with timeseries data for modeling
+    raw_ts_data : pd.DataFrame
+        The raw timeseries dataset to combine with metadata for modeling
+    downsampling : dict, optional
+        See `downsample_timeseries`, defaults to keeping every third snapshot
+    engine : str
+        "pandas" or "polars", see `downsample_timeseries`
+
+    Returns
+    -------
+    pd.DataFrame
+        Modeling data sorted by video and `as_of_datetime`
+    """
+    timeseries, _ = downsample_timeseries(raw_ts_data, downsampling=downsampling, engine=engine)
+    return join_metadata(metadata_df, timeseries)
+
+
+def _upload_modeling_dataset(
+    modeling_dataset_name: str,
+    modeling_dataset_id: Optional[str],
+    use_cases: Optional[UseCaseLike] = None,
+    data_frame: Optional[pd.DataFrame] = None,
+    file_path: Optional[str] = None,
+) -> Dataset:
+    """Create the modeling dataset or add a version, from a DataFrame or a CSV file."""
+    # If it exists, add a new version, otherwise create it!
+    if modeling_dataset_id is None:
+        if file_path is not None:
+            dataset: Dataset = Dataset.create_from_file(file_path=file_path, use_cases=use_cases)
+        else:
+            dataset = Dataset.create_from_in_memory_data(data_frame=data_frame, use_cases=use_cases)
+        dataset.modify(name=f"{modeling_dataset_name}")
+        get_dataset_index().register(modeling_dataset_name, dataset.id)
+    elif file_path is not None:
+        dataset = dr.Dataset.create_version_from_file(modeling_dataset_id, file_path=file_path)
+    else:
+        dataset = dr.Dataset.create_version_from_in_memory_data(modeling_dataset_id, data_frame)
+    return dataset
+
+
+def _previous_watermarks(
+    incremental: Dict[str, Any], modeling_dataset_id: Optional[str]
+) -> Optional[pd.DataFrame]:
+    """Watermarks of the previous run, or None when this run starts from the full history."""
+    import os
+
+    if incremental.get("enabled", False):
+        missing = [key for key in ("watermarks_filepath", "timeseries_filepath") if not incremental.get(key)]
+        if missing:
+            raise ValueError(f"Incremental preprocessing needs {' and '.join(missing)} to be set")
+
+    resume = (
+        incremental.get("enabled", False)
+        and modeling_dataset_id is not None
+        and os.path.exists(incremental.get("watermarks_filepath"))
+        and os.path.exists(incremental.get("timeseries_filepath"))
+    )
+    return pd.read_parquet(incremental["watermarks_filepath"]) if resume else None
+
+
+def _save_watermarks(incremental: Dict[str, Any], watermarks: pd.DataFrame) -> None:
+    # Only called once the upload succeeded, so a failed run is simply repeated
+    import os
+
+    if incremental.get("enabled", False):
+        watermarks_filepath = incremental["watermarks_filepath"]
+        os.makedirs(os.path.dirname(watermarks_filepath) or ".", exist_ok=True)
+        watermarks.to_parquet(watermarks_filepath, index=False)
+
+
+def _update_modeling_dataset(
+    modeling_dataset_name: str,
+    modeling_dataset_id: Optional[str],
+    use_cases: Optional[UseCaseLike],
+    metadata_df: pd.DataFrame,
+    raw_ts_data: pd.DataFrame,
+    previous_watermarks: Optional[pd.DataFrame],
+    incremental: Dict[str, Any],
+    downsampling: Optional[Dict[str, Any]],
+    engine: str,
+) -> str:
+    """Downsample and join in memory, upload, then persist the incremental state."""
+    import os
+    from logzero import logger
+
+    timeseries_filepath = incremental.get("timeseries_filepath")
+    if previous_watermarks is not None:
+        previous_timeseries = pd.read_parquet(timeseries_filepath)
+        new_timeseries, watermarks = downsample_timeseries(
+            raw_ts_data, previous_watermarks, downsampling, engine
+        )
+        logger.info(f"Kept {len(new_timeseries)} new snapshots for {modeling_dataset_name}")
+        if not len(new_timeseries):
+            # Metadata changes are picked up together with the next snapshot
+            return str(modeling_dataset_id)
+        timeseries = pd.concat([previous_timeseries, new_timeseries], ignore_index=True)
+    else:
+        timeseries, watermarks = downsample_timeseries(
+            raw_ts_data, downsampling=downsampling, engine=engine
+        )
+
+    new_data = to_upload_frame(join_metadata(metadata_df, timeseries))
+    dataset = _upload_modeling_dataset(
+        modeling_dataset_name, modeling_dataset_id, use_cases, data_frame=new_data
+    )
+    if incremental.get("enabled", False):
+        os.makedirs(os.path.dirname(timeseries_filepath) or ".", exist_ok=True)
+        apply_timeseries_schema(timeseries).to_parquet(timeseries_filepath, index=False)
+    _save_watermarks(incremental, watermarks)
+    return str(dataset.id)
 
 
 def create_or_update_modeling_dataset(modeling_dataset_name: str, 
                                  timeseries_data_name: str,
                                  metadataset_name: Optional[str] = None, 
-                                 use_cases: Optional[UseCaseLike] = None) -> str:
+                                 use_cases: Optional[UseCaseLike] = None,
+                                 incremental: Optional[Dict[str, Any]] = None,
+                                 downsampling: Optional[Dict[str, Any]] = None,
+                                 engine: str = "pandas",
+                                 streaming: Optional[Dict[str, Any]] = None) -> str:
     """Prepare a dataset for modeling in DataRobot.
+
+    In incremental mode the thinned snapshots and per-video watermarks of the
+    previous run are kept locally and only newer snapshots are processed. In
+    streaming mode the time series is processed on disk in buckets of videos
+    that fit a memory budget, see `streaming.stream_modeling_data`.
     
     Parameters
     ----------
@@ -34,47 +496,167 @@ def create_or_update_modeling_dataset(modeling_dataset_name: str,
         The raw metadata dataset to combine with timeseries data for modeling
     timeseries_data: pd.DataFrame
         The raw timeseries dataset to combine with metadata for modeling
+    incremental : dict, optional
+        `enabled`, `watermarks_filepath` and `timeseries_filepath`
+    downsampling : dict, optional
+        `method` ("every_third" or "grid"), grid `freq` and `fill_gaps`
+    engine : str
+        DataFrame library used for downsampling, "pandas" or "polars"
+    streaming : dict, optional
+        `enabled`, `memory_budget_mb`, `chunksize` and scratch `work_dir`
     Returns
     -------
     str
         ID of the dataset prepared for modeling in DataRobot
     """
-    metadata_df = dr.Dataset.get(_check_if_dataset_exists(metadataset_name)).get_as_dataframe()
-    raw_ts_data = dr.Dataset.get(_check_if_dataset_exists(timeseries_data_name)).get_as_dataframe()
+    import os
+    import tempfile
+    from logzero import logger
 
-    # Join the metadata and timeseries data on the Video ID
-    new_data = pd.merge(metadata_df, raw_ts_data, on="video_id", how="inner").reset_index(drop=True)
+    incremental = incremental or {}
+    streaming = streaming or {}
+    timeseries_filepath = incremental.get("timeseries_filepath")
 
-    # Calculate the difference in viewCount from the previous hour for each entry
-    #   for the first entry, it remains 0
-    new_data['as_of_datetime'] = pd.to_datetime(new_data['as_of_datetime'], errors='coerce')
-    new_data = new_data.sort_values(['video_id', 'as_of_datetime'])
+    metadata_df = dr.Dataset.get(find_dataset_id(metadataset_name)).get_as_dataframe()
+    timeseries_dataset_id = find_dataset_id(timeseries_data_name)
+    modeling_dataset_id = find_dataset_id(modeling_dataset_name)
+    previous_watermarks = _previous_watermarks(incremental, modeling_dataset_id)
+    resume = previous_watermarks is not None
 
-    new_data = new_data.drop_duplicates(subset=["video_id", "viewCount", "as_of_datetime"])
-
-    new_data = new_data.groupby('video_id').apply(lambda group: group.iloc[::3]).reset_index(drop=True)
+    if not streaming.get("enabled", False):
+        raw_ts_data = dr.Dataset.get(timeseries_dataset_id).get_as_dataframe()
+        return _update_modeling_dataset(
+            modeling_dataset_name,
+            modeling_dataset_id,
+            use_cases,
+            metadata_df,
+            raw_ts_data,
+            previous_watermarks,
+            incremental,
+            downsampling,
+            engine,
+        )
 
-    new_data['viewDiff'] = new_data.groupby('video_id')['viewCount'].diff()
-    new_data['likeDiff'] = new_data.groupby('video_id')['likeCount'].diff()
-    new_data['commentDiff'] = new_data.groupby('video_id')['commentCount'].diff()
+    from .streaming import download_dataset_file, stream_modeling_data
 
-    new_data.fillna(0, inplace=True)
+    work_dir = streaming.get("work_dir", "data/tmp/preprocessing")
+    os.makedirs(work_dir, exist_ok=True)
+    with tempfile.TemporaryDirectory(dir=work_dir) as tmp:
+        raw_filepath = os.path.join(tmp, "raw_timeseries.csv")
+        output_filepath = os.path.join(tmp, "modeling_data.csv")
+        timeseries_output = os.path.join(tmp, "timeseries.parquet")
+        download_dataset_file(timeseries_dataset_id, raw_filepath)
 
-    new_data["viewDiff"] = new_data["viewDiff"].apply(lambda x: max(x, 0))
+        new_rows, watermarks = stream_modeling_data(
+            raw_filepath,
+            metadata_df,
+            output_filepath,
+            os.path.join(tmp, "buckets"),
+            memory_budget_mb=streaming.get("memory_budget_mb", 1024),
+            chunksize=streaming.get("chunksize", 500_000),
+            downsampling=downsampling,
+            engine=engine,
+            watermarks=previous_watermarks,
+            previous_timeseries_path=timeseries_filepath if resume else None,
+            timeseries_output_path=timeseries_output if incremental.get("enabled", False) else None,
+        )
+        logger.info(f"Kept {new_rows} new snapshots for {modeling_dataset_name}")
+        if resume and not new_rows:
+            # Metadata changes are picked up together with the next snapshot
+            return str(modeling_dataset_id)
 
-    # If it exists, add a new version, otherwise create it!
-    modeling_dataset_id = _check_if_dataset_exists(modeling_dataset_name)
-   
-    if modeling_dataset_id is None:
-        dataset: Dataset = Dataset.create_from_in_memory_data(
-            data_frame=new_data, use_cases=use_cases
+        dataset = _upload_modeling_dataset(
+            modeling_dataset_name, modeling_dataset_id, use_cases, file_path=output_filepath
         )
-        dataset.modify(name=f"{modeling_dataset_name}")
-    else:     
-        dataset = dr.Dataset.create_version_from_in_memory_data(modeling_dataset_id, new_data)
+        if incremental.get("enabled", False):
+            os.makedirs(os.path.dirname(timeseries_filepath) or ".", exist_ok=True)
+            os.replace(timeseries_output, timeseries_filepath)
 
+    _save_watermarks(incremental, watermarks)
     return str(dataset.id)
 
+
+def read_new_snapshots(
+    store: LocalTimeSeriesStore, watermarks: Optional[pd.DataFrame] = None
+) -> pd.DataFrame:
+    """Read the raw snapshots that `downsample_timeseries` needs from the local store.
+
+    Without watermarks that is the full history. Otherwise only snapshots from the
+    oldest watermark on are read, plus the full history of videos that appear in
+    that window but have no watermark yet.
+
+    Parameters
+    ----------
+    store : LocalTimeSeriesStore
+        The local raw time series store
+    watermarks : pd.DataFrame, optional
+        Watermarks of the previous run
+
+    Returns
+    -------
+    pd.DataFrame
+        Raw snapshots, sorted by `as_of_datetime`
+    """
+    if watermarks is None or not len(watermarks):
+        return store.read()
+
+    start = to_wall_time(pd.to_datetime(watermarks["last_seen_datetime"], utc=True)).min()
+    recent = store.read(start=start)
+    new_video_ids = set(recent["video_id"]) - set(watermarks["video_id"].astype(str))
+    if not new_video_ids:
+        return recent
+    history = store.read(end=start, video_ids=sorted(new_video_ids))
+    # Rows exactly at `start` are in both reads
+    history = history[history["as_of_datetime"] < start]
+    return pd.concat([history, recent], ignore_index=True)
+
+
+def create_or_update_modeling_dataset_from_store(modeling_dataset_name: str,
+                                                 metadata: pd.DataFrame,
+                                                 store: LocalTimeSeriesStore,
+                                                 use_cases: Optional[UseCaseLike] = None,
+                                                 incremental: Optional[Dict[str, Any]] = None,
+                                                 downsampling: Optional[Dict[str, Any]] = None,
+                                                 engine: str = "pandas") -> str:
+    """Prepare the modeling dataset from data that is already local.
+
+    Used by the `refresh` pipeline, which runs right after ingestion: `metadata` is the
+    full metadata handed over in memory and the time series is read from the local store,
+    so neither catalog dataset is downloaded. With incremental state, only the snapshots
+    newer than the watermarks are read (see `read_new_snapshots`). Streaming mode does
+    not apply here.
+
+    Parameters
+    ----------
+    modeling_dataset_name : str
+        Name of the modeling dataset in the AI Catalog
+    metadata : pd.DataFrame
+        Metadata of every video, as returned by the metadata upload node
+    store : LocalTimeSeriesStore
+        The local raw time series store, after this run's snapshot was appended
+    incremental, downsampling, engine :
+        See `create_or_update_modeling_dataset`
+
+    Returns
+    -------
+    str
+        ID of the dataset prepared for modeling in DataRobot
+    """
+    incremental = incremental or {}
+    modeling_dataset_id = find_dataset_id(modeling_dataset_name)
+    previous_watermarks = _previous_watermarks(incremental, modeling_dataset_id)
+    return _update_modeling_dataset(
+        modeling_dataset_name,
+        modeling_dataset_id,
+        use_cases,
+        metadata,
+        read_new_snapshots(store, previous_watermarks),
+        previous_watermarks,
+        incremental,
+        downsampling,
+        engine,
+    )
+
 def create_or_update_scoring_dataset(scoring_dataset_name: str,
                                     modeling_dataset_id: str,
                                     use_cases: Optional[UseCaseLike] = None) -> None:
@@ -94,40 +676,156 @@ def create_or_update_scoring_dataset(scoring_dataset_name: str,
     """
     modeling_df = dr.Dataset.get(modeling_dataset_id).get_as_dataframe()
 
-    scoring_dataset_id = _check_if_dataset_exists(scoring_dataset_name)
+    scoring_dataset_id = find_dataset_id(scoring_dataset_name)
 
     if scoring_dataset_id is None:
         dataset: Dataset = Dataset.create_from_in_memory_data(
             data_frame=modeling_df, use_cases=use_cases
         )
         dataset.modify(name=f"{scoring_dataset_name}")
+        get_dataset_index().register(scoring_dataset_name, dataset.id)
     else:
         dr.Dataset.create_version_from_in_memory_data(scoring_dataset_id, modeling_df)
 
 
-def remove_old_retraining_data(endpoint: str, 
+def list_dataset_versions(dataset_id: str) -> pd.DataFrame:
+    """All versions of a dataset across every page, oldest first, with parsed creation dates."""
+    from datarobot.utils.pagination import unpaginate
+
+    versions = pd.DataFrame(
+        list(unpaginate(f"datasets/{dataset_id}/versions/", {"limit": 100}, rest_client())),
+        columns=["versionId", "creationDate"],
+    )
+    versions["creationDate"] = pd.to_datetime(versions["creationDate"], utc=True, format="ISO8601")
+    return versions.sort_values("creationDate", kind="stable", ignore_index=True)
+
+
+def select_versions_to_prune(
+    versions: pd.DataFrame,
+    keep_latest: int = 50,
+    keep_newer_than_days: Optional[float] = None,
+    now: Optional[pd.Timestamp] = None,
+) -> List[str]:
+    """Ids of the versions outside the retention policy.
+
+    A version is kept if it is one of the `keep_latest` newest versions or, when
+    `keep_newer_than_days` is set, if it was created within that many days. The newest
+    version is always kept.
+
+    Parameters
+    ----------
+    versions : pd.DataFrame
+        Versions as returned by `list_dataset_versions`, oldest first
+    keep_latest : int
+        Number of newest versions to keep
+    keep_newer_than_days : float, optional
+        Also keep every version younger than this
+    now : pd.Timestamp, optional
+        Reference time for `keep_newer_than_days`, defaults to the current time
+
+    Returns
+    -------
+    list of str
+        Version ids to delete, oldest first
+    """
+    candidates = versions.iloc[: max(len(versions) - max(keep_latest, 1), 0)]
+    if keep_newer_than_days is not None:
+        now = pd.Timestamp.now(tz="UTC") if now is None else now
+        cutoff = now - pd.Timedelta(days=keep_newer_than_days)
+        candidates = candidates[candidates["creationDate"] < cutoff]
+    return candidates["versionId"].tolist()
+
+
+def _delete_dataset_version(dataset_id: str, version_id: str, max_retries: int) -> None:
+    """Delete one version, retrying throttled and failed requests with full-jitter backoff."""
+    import random
+    import time
+
+    import requests
+    from datarobot.errors import AppPlatformError
+
+    for attempt in range(max_retries + 1):
+        try:
+            rest_client().delete(f"datasets/{dataset_id}/versions/{version_id}/")
+            return
+        except AppPlatformError as e:
+            if e.status_code == 404:
+                # Already deleted, e.g. by an overlapping run
+                return
+            if e.status_code not in RETRYABLE_STATUS_CODES or attempt == max_retries:
+                raise
+        except (requests.ConnectionError, requests.Timeout):
+            if attempt == max_retries:
+                raise
+        time.sleep(random.uniform(0, min(MAX_BACKOFF_SECS, 2**attempt)))
+
+
+def remove_old_retraining_data(endpoint: str,
                                token: str,
-                               datasets_to_check: Dict[str, str]):
+                               datasets_to_check: Dict[str, str],
+                               retention: Optional[Dict[str, Any]] = None) -> None:
+    """Delete old versions of the pipeline's datasets to stay below the version limit.
+
+    Every page of versions is listed. Once a dataset has more than
+    `retention["prune_above"]` versions, the versions outside the retention policy
+    (see `select_versions_to_prune`) are deleted concurrently. Versions that still
+    fail after retrying are logged and left for the next run.
+
+    Parameters
+    ----------
+    endpoint : str
+        DataRobot API endpoint
+    token : str
+        DataRobot API token
+    datasets_to_check : dict
+        Dataset names to prune, keyed by their parameter name
+    retention : dict, optional
+        `prune_above`, `keep_latest`, `keep_newer_than_days`, `max_workers` and
+        `max_retries`, usually the `version_retention` block of parameters.yml
+    """
+    from concurrent.futures import ThreadPoolExecutor, as_completed
+
     from logzero import logger
 
-    client = dr.Client(endpoint=endpoint, token=token)
+    retention = retention or {}
+    prune_above = retention.get("prune_above", 75)
+    max_retries = retention.get("max_retries", 3)
+    max_workers = max(1, retention.get("max_workers", 8))
+
+    configure_client(endpoint, token)
 
+    to_delete: List[Tuple[str, str]] = []
     for dataset_name in list(datasets_to_check.values()):
-        data_id = _check_if_dataset_exists(dataset_name)
+        data_id = find_dataset_id(dataset_name)
         if data_id is None:
             continue
 
-        url = f"{endpoint}/datasets/{data_id}/versions/"
-        dataset_versions = client.get(url).json()
+        versions = list_dataset_versions(data_id)
+        logger.info(f"Found {len(versions)} versions of {data_id}")
 
-        logger.info(f"Found {dataset_versions['count']} versions of {data_id}")
+        if len(versions) > prune_above:
+            version_ids = select_versions_to_prune(
+                versions,
+                keep_latest=retention.get("keep_latest", 50),
+                keep_newer_than_days=retention.get("keep_newer_than_days"),
+            )
+            logger.info(f"Deleting {len(version_ids)} versions of {data_id}")
+            to_delete += [(data_id, version_id) for version_id in version_ids]
 
-        if dataset_versions['count'] > 75:
-            sorted_versions = sorted(dataset_versions['data'], key=lambda x: pd.to_datetime(x['creationDate']))
-            for version in sorted_versions[:-50]:
-                url = f"{endpoint}/datasets/{data_id}/versions/{version['versionId']}"
-                client.delete(url)
-            logger.info(f"Deleted {dataset_versions['count'] - 50} versions of {data_id}")
+    if not to_delete:
+        return
 
-    
-    
+    failed = 0
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        futures = {
+            executor.submit(_delete_dataset_version, data_id, version_id, max_retries): (data_id, version_id)
+            for data_id, version_id in to_delete
+        }
+        for future in as_completed(futures):
+            try:
+                future.result()
+            except Exception as e:
+                data_id, version_id = futures[future]
+                logger.warning(f"Could not delete version {version_id} of {data_id}: {e}")
+                failed += 1
+    logger.info(f"Deleted {len(to_delete) - failed} of {len(to_delete)} dataset versions")
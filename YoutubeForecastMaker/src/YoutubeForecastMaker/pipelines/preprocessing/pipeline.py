@@ -35,6 +35,10 @@ def create_pipeline(**kwargs) -> Pipeline:
                 "metadataset_name": "params:datasets.metadataset_name",
                 "timeseries_data_name": "params:datasets.timeseries_dataset_name",
                 "use_cases": "use_case_id",
+                "incremental": "params:incremental",
+                "downsampling": "params:downsampling",
+                "engine": "params:engine",
+                "streaming": "params:streaming",
             },
             outputs="modeling_dataset_id",
         ),
@@ -56,6 +60,7 @@ def create_pipeline(**kwargs) -> Pipeline:
                 "endpoint": "params:credentials.datarobot.endpoint",
                 "token": "params:credentials.datarobot.api_token",
                 "datasets_to_check": "params:datasets",
+                "retention": "params:version_retention",
             },
             outputs=None,
         ),
@@ -0,0 +1,118 @@
+# Copyright 2024 DataRobot, Inc. and its affiliates.
+# All rights reserved.
+# DataRobot, Inc.
+# This is proprietary source code of DataRobot, Inc. and its
+# affiliates.
+# Released under the terms of DataRobot Tool and Utility Agreement.
+
+"""Polars implementation of the every-third-snapshot thinning in `nodes.thin_timeseries`.
+
+Runs the sort, dedup, thinning and grouped diffs as one multi-threaded lazy query.
+Inputs and outputs are pandas frames with the same types and row order as the pandas
+implementation, so the two engines are interchangeable. Requires the optional
+`polars` dependency.
+"""
+from typing import Optional, Tuple
+
+import pandas as pd
+import polars as pl
+
+from ...common.schemas import COUNTER_COLUMNS, apply_timeseries_schema, repeated_hour_start
+from .nodes import DIFF_COLUMNS, LAST_COUNTER_COLUMNS, WATERMARK_COLUMNS
+
+
+def _to_polars(data_frame: pd.DataFrame) -> pl.DataFrame:
+    data_frame = data_frame.astype({"video_id": str})
+    return pl.from_pandas(data_frame, include_index=False)
+
+
+def thin_timeseries_polars(
+    raw_ts_data: pd.DataFrame, watermarks: pd.DataFrame, latest: Optional[pd.Timestamp] = None
+) -> Tuple[pd.DataFrame, pd.DataFrame]:
+    """Same contract as `nodes.thin_timeseries`, `watermarks` may be empty but not None."""
+    # Parsing stays in pandas so both engines read timestamps and counters identically
+    typed = apply_timeseries_schema(raw_ts_data).reset_index(drop=True)
+    cutoff = repeated_hour_start(typed["as_of_datetime"].max() if latest is None else latest)
+    if cutoff is not None:
+        typed = typed[typed["as_of_datetime"] < cutoff].reset_index(drop=True)
+    columns = list(typed.columns)
+    ts = _to_polars(typed).lazy()
+    state = _to_polars(watermarks[WATERMARK_COLUMNS]).lazy().with_columns(
+        pl.col("last_seen_datetime").cast(pl.Datetime("ns", "UTC")),
+        pl.col(["seen_count"] + LAST_COUNTER_COLUMNS).cast(pl.Int64),
+    )
+
+    deduped = (
+        ts.join(state, on="video_id", how="left")
+        .filter(
+            pl.col("last_seen_datetime").is_null()
+            | (pl.col("as_of_datetime").dt.convert_time_zone("UTC") > pl.col("last_seen_datetime"))
+        )
+        # Stable, so ties keep their input order as with pandas
+        .sort(["video_id", "as_of_datetime"], maintain_order=True)
+        .unique(subset=["video_id", "viewCount", "as_of_datetime"], keep="first", maintain_order=True)
+        # Materialized once, the kept rows and the watermarks are both derived from it
+        .collect()
+        .lazy()
+    )
+
+    seen = deduped.group_by("video_id").agg(
+        pl.col("as_of_datetime").max().dt.convert_time_zone("UTC").alias("new_last_seen_datetime"),
+        pl.len().alias("new_count"),
+    )
+
+    # Rows are sorted by video, so groups are contiguous runs and no window functions are needed
+    row = pl.int_range(pl.len())
+    previous_video_id = pl.col("video_id").shift(1)
+    first = previous_video_id.is_null() | (pl.col("video_id") != previous_video_id)
+
+    # Keep the 1st, 4th, 7th, ... snapshot of every video
+    position = row - pl.when(first).then(row).forward_fill() + pl.col("seen_count").fill_null(0)
+    kept = deduped.filter(position % 3 == 0)
+
+    # Calculate the difference in the counters from the previous kept snapshot of each video
+    #   for the first entry, it remains 0
+    kept = kept.with_columns(
+        pl.when(first)
+        .then(pl.col(column) - pl.col(last_column))
+        .otherwise(pl.col(column).diff())
+        .alias(diff_column)
+        for column, last_column, diff_column in zip(COUNTER_COLUMNS, LAST_COUNTER_COLUMNS, DIFF_COLUMNS)
+    )
+
+    last_emitted = kept.group_by("video_id").agg(
+        [pl.col(column).last().alias("new_" + last_column) for column, last_column in zip(COUNTER_COLUMNS, LAST_COUNTER_COLUMNS)]
+        + [pl.lit(True).alias("has_kept")]
+    )
+    updated = (
+        seen.join(last_emitted, on="video_id", how="left")
+        .join(state, on="video_id", how="left")
+        .select(
+            "video_id",
+            pl.col("new_last_seen_datetime").alias("last_seen_datetime"),
+            (pl.col("seen_count").fill_null(0) + pl.col("new_count")).cast(pl.Int64).alias("seen_count"),
+            *[
+                # Videos without a kept snapshot in this run still diff against the old one
+                pl.when(pl.col("has_kept").fill_null(False))
+                .then(pl.col("new_" + last_column))
+                .otherwise(pl.col(last_column))
+                .alias(last_column)
+                for last_column in LAST_COUNTER_COLUMNS
+            ],
+        )
+    )
+    untouched = state.join(seen.select("video_id"), on="video_id", how="anti")
+
+    kept = kept.select(
+        [pl.col(column) for column in columns]
+        + [pl.col(column) for column in DIFF_COLUMNS]
+    ).with_columns(pl.col(COUNTER_COLUMNS + DIFF_COLUMNS).fill_null(0)).with_columns(
+        pl.col("viewDiff").clip(lower_bound=0)
+    )
+
+    new_data, untouched, updated = pl.collect_all([kept, untouched, updated])
+    new_watermarks = pd.concat(
+        [untouched.to_pandas(), updated.to_pandas()], ignore_index=True
+    )[WATERMARK_COLUMNS]
+    new_data = apply_timeseries_schema(new_data.to_pandas())
+    return new_data.astype({column: "Int64" for column in DIFF_COLUMNS}), new_watermarks
@@ -0,0 +1,196 @@
+# Copyright 2024 DataRobot, Inc. and its affiliates.
+# All rights reserved.
+# DataRobot, Inc.
+# This is proprietary source code of DataRobot, Inc. and its
+# affiliates.
+# Released under the terms of DataRobot Tool and Utility Agreement.
+
+"""Out-of-core variant of the modeling data preparation in `nodes`.
+
+The raw time series is streamed from the AI Catalog to a CSV file and split by video
+into buckets that fit a memory budget. Every video lands in exactly one bucket, so each
+bucket can be downsampled on its own; metadata is joined only onto the downsampled rows
+of a bucket and the result is appended to the output file. Buckets are contiguous
+ranges of sorted video ids, so the output has the same rows in the same order as the
+in-memory path.
+"""
+import pathlib
+from typing import Any, Dict, List, Optional, Tuple, Union
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+from ...common.datarobot_client import rest_client
+from ...common.schemas import (
+    TIMESERIES_TIMEZONE,
+    apply_timeseries_schema,
+    to_datetime_tz,
+    to_upload_frame,
+)
+from .nodes import downsample_timeseries, empty_watermarks, join_metadata, _watermark_schema
+
+# A bucket is held several times while it is processed (raw, typed, sorted, joined)
+WORKING_SET_FACTOR = 6
+
+
+def download_dataset_file(
+    dataset_id: str, file_path: Union[str, pathlib.Path], chunk_bytes: int = 1 << 20
+) -> None:
+    """Stream the CSV of a catalog dataset to disk without holding it in memory."""
+    response = rest_client().get(f"datasets/{dataset_id}/file/", stream=True)
+    with open(file_path, "wb") as f:
+        for block in response.iter_content(chunk_bytes):
+            f.write(block)
+
+
+def _read_csv_chunks(csv_path: pathlib.Path, chunksize: int, **kwargs: Any):
+    return pd.read_csv(csv_path, chunksize=chunksize, dtype={"video_id": str}, **kwargs)
+
+
+def plan_buckets(
+    csv_path: pathlib.Path, chunksize: int, memory_budget_mb: float
+) -> Tuple[np.ndarray, Optional[pd.Timestamp]]:
+    """Sorted first video id of each bucket, sized so a bucket fits `memory_budget_mb`.
+
+    Also returns the latest snapshot in the file, which buckets are downsampled up to.
+    """
+    counts = pd.Series(dtype="int64")
+    bytes_per_row = None
+    latest = None
+    for chunk in _read_csv_chunks(csv_path, chunksize):
+        if bytes_per_row is None and len(chunk):
+            bytes_per_row = chunk.memory_usage(deep=True).sum() / len(chunk)
+        counts = counts.add(chunk["video_id"].value_counts(), fill_value=0)
+        chunk_latest = to_datetime_tz(chunk["as_of_datetime"], TIMESERIES_TIMEZONE).max()
+        if pd.notna(chunk_latest) and (latest is None or chunk_latest > latest):
+            latest = chunk_latest
+    if not len(counts):
+        return np.array([], dtype=object), latest
+
+    rows_per_bucket = max(1, int(memory_budget_mb * 2**20 / (bytes_per_row * WORKING_SET_FACTOR)))
+    counts = counts.sort_index()
+    bucket = (counts.cumsum().to_numpy() - 1) // rows_per_bucket
+    first_of_bucket = np.r_[True, bucket[1:] != bucket[:-1]]
+    return counts.index.to_numpy()[first_of_bucket].astype(object), latest
+
+
+def partition_by_video(
+    csv_path: pathlib.Path, edges: np.ndarray, work_dir: pathlib.Path, chunksize: int
+) -> List[List[pathlib.Path]]:
+    """Split the CSV into per-bucket parquet parts, keeping the file order of the rows."""
+    parts: List[List[pathlib.Path]] = [[] for _ in edges]
+    for i, chunk in enumerate(_read_csv_chunks(csv_path, chunksize)):
+        buckets = np.searchsorted(edges, chunk["video_id"].to_numpy(dtype=object), side="right") - 1
+        for bucket, part in chunk.groupby(buckets, sort=False):
+            path = work_dir / f"bucket-{bucket}" / f"part-{i}.parquet"
+            path.parent.mkdir(parents=True, exist_ok=True)
+            part.to_parquet(path, index=False)
+            parts[bucket].append(path)
+    return parts
+
+
+def stream_modeling_data(
+    csv_path: Union[str, pathlib.Path],
+    metadata_df: pd.DataFrame,
+    output_path: Union[str, pathlib.Path],
+    work_dir: Union[str, pathlib.Path],
+    memory_budget_mb: float = 1024,
+    chunksize: int = 500_000,
+    downsampling: Optional[Dict[str, Any]] = None,
+    engine: str = "pandas",
+    watermarks: Optional[pd.DataFrame] = None,
+    previous_timeseries_path: Optional[Union[str, pathlib.Path]] = None,
+    timeseries_output_path: Optional[Union[str, pathlib.Path]] = None,
+) -> Tuple[int, pd.DataFrame]:
+    """Write the modeling data for a raw time series CSV to `output_path` bucket by bucket.
+
+    Parameters
+    ----------
+    csv_path : str or pathlib.Path
+        Raw time series CSV, as downloaded from the AI Catalog
+    metadata_df : pd.DataFrame
+        The raw metadata dataset, joined onto each downsampled bucket
+    output_path : str or pathlib.Path
+        CSV file the modeling data is written to
+    work_dir : str or pathlib.Path
+        Scratch directory for the bucket files
+    memory_budget_mb : float
+        Approximate memory a single bucket may use while it is processed
+    chunksize : int
+        Rows read from the CSV at a time
+    downsampling, engine :
+        See `nodes.downsample_timeseries`
+    watermarks : pd.DataFrame, optional
+        Watermarks of a previous run, only newer snapshots are downsampled
+    previous_timeseries_path : str or pathlib.Path, optional
+        Downsampled rows kept by the previous run, prepended to the new rows per bucket
+    timeseries_output_path : str or pathlib.Path, optional
+        Where to write all downsampled rows for the next incremental run
+
+    Returns
+    -------
+    int
+        Number of newly downsampled rows
+    pd.DataFrame
+        Watermarks to pass to the next run
+    """
+    from logzero import logger
+
+    csv_path, work_dir = pathlib.Path(csv_path), pathlib.Path(work_dir)
+    watermarks = empty_watermarks() if watermarks is None else watermarks
+    watermarks = watermarks.astype({"video_id": str})
+    metadata_df = metadata_df.astype({"video_id": str})
+
+    edges, latest = plan_buckets(csv_path, chunksize, memory_budget_mb)
+    parts = partition_by_video(csv_path, edges, work_dir, chunksize)
+    logger.info(f"Preprocessing {csv_path.name} in {len(edges)} buckets of videos")
+
+    new_rows = 0
+    new_watermarks = []
+    seen_video_ids: List[str] = []
+    writer: Optional[pq.ParquetWriter] = None
+    header = True
+    with open(output_path, "w", newline="") as output:
+        for bucket_parts in parts:
+            raw = pd.concat([pd.read_parquet(path) for path in bucket_parts], ignore_index=True)
+            video_ids = raw["video_id"].unique().tolist()
+            seen_video_ids += video_ids
+
+            timeseries, bucket_watermarks = downsample_timeseries(
+                raw,
+                watermarks[watermarks["video_id"].isin(video_ids)],
+                downsampling,
+                engine,
+                # Snapshots are held back up to the latest of the whole time series, not of the bucket
+                latest,
+            )
+            new_rows += len(timeseries)
+            new_watermarks.append(bucket_watermarks)
+            if previous_timeseries_path is not None:
+                previous = pd.read_parquet(
+                    previous_timeseries_path, filters=[("video_id", "in", video_ids)]
+                )
+                timeseries = pd.concat([previous, timeseries], ignore_index=True)
+            timeseries = apply_timeseries_schema(timeseries)
+
+            if timeseries_output_path is not None:
+                table = pa.Table.from_pandas(timeseries.astype({"video_id": str}), preserve_index=False)
+                if writer is None:
+                    writer = pq.ParquetWriter(timeseries_output_path, table.schema)
+                writer.write_table(table.cast(writer.schema))
+
+            # Metadata is joined late, onto the downsampled rows of this bucket only
+            bucket_metadata = metadata_df[metadata_df["video_id"].isin(video_ids)]
+            to_upload_frame(join_metadata(bucket_metadata, timeseries)).to_csv(
+                output, header=header, index=False
+            )
+            header = False
+
+    if writer is not None:
+        writer.close()
+
+    # Videos that no longer have any snapshots keep their watermark
+    unseen = watermarks[~watermarks["video_id"].isin(seen_video_ids)]
+    return new_rows, _watermark_schema(pd.concat([unseen] + new_watermarks, ignore_index=True))
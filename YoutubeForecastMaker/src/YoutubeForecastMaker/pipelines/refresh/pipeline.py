@@ -0,0 +1,58 @@
+# Copyright 2024 DataRobot, Inc. and its affiliates.
+# All rights reserved.
+# DataRobot, Inc.
+# This is proprietary source code of DataRobot, Inc. and its
+# affiliates.
+# Released under the terms of DataRobot Tool and Utility Agreement.
+from kedro.pipeline import node, Pipeline
+from kedro.pipeline.modular_pipeline import pipeline
+
+from .. import get_data_pipeline, preprocessing
+from ..preprocessing.nodes import create_or_update_modeling_dataset_from_store
+
+
+def create_pipeline(**kwargs) -> Pipeline:
+    """Pull a snapshot and update the modeling dataset in one run.
+
+    The ingestion nodes of `pull_data` hand the full metadata and the local time series
+    store to preprocessing in memory, so neither raw dataset is downloaded from the AI
+    Catalog again. The raw time series is only uploaded every
+    `refresh.materialize_every_n_snapshots` snapshots.
+    """
+    ingest = pipeline(
+        get_data_pipeline.create_pipeline(),
+        parameters={
+            "params:get_data_pipeline.materialize_every_n_snapshots": "params:refresh.materialize_every_n_snapshots",
+        },
+    )
+
+    nodes = [
+        node(
+            name="preprocess_data",
+            func=create_or_update_modeling_dataset_from_store,
+            inputs={
+                "modeling_dataset_name": "params:datasets.modeling_dataset_name",
+                "metadata": "all_metadata",
+                "store": "timeseries_history",
+                "use_cases": "use_case_id",
+                "incremental": "params:incremental",
+                "downsampling": "params:downsampling",
+                "engine": "params:engine",
+            },
+            outputs="modeling_dataset_id",
+        ),
+    ]
+    prepare = pipeline(
+        pipeline(nodes),
+        namespace="preprocessing",
+        inputs={
+            "all_metadata": "get_data_pipeline.all_metadata",
+            "timeseries_history": "get_data_pipeline.timeseries_history",
+        },
+    )
+    # The use case and version pruning nodes are shared with `data_prep`
+    housekeeping = preprocessing.create_pipeline().only_nodes(
+        "preprocessing.make_or_get_datarobot_use_case",
+        "preprocessing.data_versioning_overflow_mitigation",
+    )
+    return ingest + prepare + housekeeping
@@ -14,6 +14,8 @@ https://docs.kedro.org/en/stable/kedro_project_setup/settings.html."""
 # from {{cookiecutter.python_package}}.hooks import ProjectHooks
 from datarobotx.idp.common.credentials_hooks import CredentialsHooks
 from datarobotx.idp.common.checkpoint_hooks import CheckpointHooks
+
+from {{cookiecutter.python_package}}.hooks import DataRobotClientHooks, NodeProfilingHooks
 {% if cookiecutter.analytics_trace_id %}
 from datarobotx.idp.common.analytics_hooks import AnalyticsHooks
 {% endif %}
@@ -21,7 +23,7 @@ from datarobotx.idp.common.analytics_hooks import AnalyticsHooks
 
 # Hooks are executed in a Last-In-First-Out (LIFO) order.
 # HOOKS = (ProjectHooks(),)
-HOOKS = (CredentialsHooks(), CheckpointHooks())
+HOOKS = (CredentialsHooks(), CheckpointHooks(), DataRobotClientHooks(), NodeProfilingHooks())
 {% if cookiecutter.analytics_trace_id %}
 # Comment the below line out if you do not wish for recipe usage analytics
 # to be reported to DR. No customer code or datasets are included in the
@@ -0,0 +1,66 @@
+# Copyright 2024 DataRobot, Inc. and its affiliates.
+# All rights reserved.
+# DataRobot, Inc.
+# This is proprietary source code of DataRobot, Inc. and its
+# affiliates.
+# Released under the terms of DataRobot Tool and Utility Agreement.
+
+import time
+
+import datarobot as dr
+import pandas as pd
+
+from YoutubeForecastMaker.common.dataset_index import DatasetIndex
+
+LIST = "GET datasets/"
+
+
+def _create(name: str) -> str:
+    dataset = dr.Dataset.create_from_in_memory_data(data_frame=pd.DataFrame({"a": [1]}))
+    dataset.modify(name=name)
+    return dataset.id
+
+
+def _lists(datarobot_api) -> int:
+    return datarobot_api.stats()["requests"].get(LIST, 0)
+
+
+def test_repeated_hits_and_misses_list_the_catalog_once(datarobot_api, datarobot_server):
+    dataset_id = _create("Raw Time Series")
+    index = DatasetIndex()
+
+    for _ in range(3):
+        assert index.get("Raw Time Series") == dataset_id
+    assert _lists(datarobot_api) == 1
+
+    # A name that doesn't exist yet is looked up again once, in case it was just created
+    for _ in range(3):
+        assert index.get("Modeling Data") is None
+    assert _lists(datarobot_api) == 2
+    assert index.get("Scoring Data") is None
+    assert _lists(datarobot_api) == 3
+
+    # Datasets created elsewhere are still found on their first lookup
+    created_elsewhere = _create("Meta Data")
+    assert index.get("Meta Data") == created_elsewhere
+    assert _lists(datarobot_api) == 4
+    assert index.get("Modeling Data") is None
+    assert index.get("Scoring Data") is None
+    assert _lists(datarobot_api) == 4
+
+    index.register("Modeling Data", "0" * 24)
+    assert index.get("Modeling Data") == "0" * 24
+    assert _lists(datarobot_api) == 4
+
+
+def test_misses_expire_with_the_index(datarobot_api, datarobot_server):
+    index = DatasetIndex(ttl_secs=0.5)
+
+    assert index.get("Modeling Data") is None
+    assert index.get("Modeling Data") is None
+    assert _lists(datarobot_api) == 1
+
+    time.sleep(0.6)
+    assert index.get("Modeling Data") is None
+    assert index.get("Modeling Data") is None
+    assert _lists(datarobot_api) == 2
@@ -0,0 +1,44 @@
+# Copyright 2024 DataRobot, Inc. and its affiliates.
+# All rights reserved.
+# DataRobot, Inc.
+# This is proprietary source code of DataRobot, Inc. and its
+# affiliates.
+# Released under the terms of DataRobot Tool and Utility Agreement.
+
+import pytest
+
+from YoutubeForecastMaker.common.datarobot_client import configure_client
+from YoutubeForecastMaker.devtools.fake_datarobot_api import FakeDataRobotApi, FakeDataRobotServer
+from YoutubeForecastMaker.devtools.fake_youtube_api import (
+    FakeYoutubeApi,
+    FakeYoutubeCatalog,
+    FakeYoutubeServer,
+)
+
+TOKEN = "token"
+
+
+@pytest.fixture
+def datarobot_api() -> FakeDataRobotApi:
+    return FakeDataRobotApi()
+
+
+@pytest.fixture
+def datarobot_server(datarobot_api: FakeDataRobotApi) -> FakeDataRobotServer:
+    """A local DataRobot API the client is configured for, like the hooks do for a run."""
+    with FakeDataRobotServer(datarobot_api) as server:
+        configure_client(server.url, TOKEN)
+        yield server
+
+
+@pytest.fixture
+def youtube_api() -> FakeYoutubeApi:
+    # Counters are frozen so every pull of a video sees the same statistics
+    catalog = FakeYoutubeCatalog(n_videos=180, n_playlists=3, seed=3, missing_rate=0.1, time_scale=0)
+    return FakeYoutubeApi(catalog, seed=3)
+
+
+@pytest.fixture
+def youtube_server(youtube_api: FakeYoutubeApi) -> FakeYoutubeServer:
+    with FakeYoutubeServer(youtube_api) as server:
+        yield server
@@ -0,0 +1,48 @@
+# Copyright 2024 DataRobot, Inc. and its affiliates.
+# All rights reserved.
+# DataRobot, Inc.
+# This is proprietary source code of DataRobot, Inc. and its
+# affiliates.
+# Released under the terms of DataRobot Tool and Utility Agreement.
+
+import datarobot as dr
+import pandas as pd
+import pytest
+from datarobot.client import client_configuration
+
+from YoutubeForecastMaker.devtools.fake_datarobot_api import FakeDataRobotApi, FakeDataRobotServer
+
+
+@pytest.fixture
+def api():
+    return FakeDataRobotApi()
+
+
+@pytest.fixture
+def server(api):
+    with FakeDataRobotServer(api) as server:
+        with client_configuration(endpoint=server.url, token="token"):
+            yield server
+
+
+def test_dataset_round_trip_through_the_sdk(api, server):
+    first = pd.DataFrame({"video_id": ["a", "b"], "viewCount": [1, 2]})
+    second = pd.DataFrame({"video_id": ["a", "b", "c"], "viewCount": [3, 4, 5]})
+
+    dataset = dr.Dataset.create_from_in_memory_data(data_frame=first)
+    dataset.modify(name="Raw Time Series")
+    version = dr.Dataset.create_version_from_in_memory_data(dataset.id, second)
+
+    assert [d.name for d in dr.Dataset.list()] == ["Raw Time Series"]
+    assert version.version_id != dataset.version_id
+    pd.testing.assert_frame_equal(dr.Dataset.get(dataset.id).get_as_dataframe(), second)
+
+    dr.client.get_client().delete(f"datasets/{dataset.id}/versions/{dataset.version_id}/")
+    versions = dr.client.get_client().get(f"datasets/{dataset.id}/versions/").json()["data"]
+    assert [v["versionId"] for v in versions] == [version.version_id]
+
+    dr.Dataset.delete(dataset.id)
+    assert dr.Dataset.list() == []
+    assert api.stats()["datasets"] == 0
+    assert api.stats()["requests"]["POST datasets/fromFile/"] == 1
+    assert api.stats()["requests"]["POST datasets/{id}/versions/fromFile/"] == 1
@@ -0,0 +1,52 @@
+# Copyright 2024 DataRobot, Inc. and its affiliates.
+# All rights reserved.
+# DataRobot, Inc.
+# This is proprietary source code of DataRobot, Inc. and its
+# affiliates.
+# Released under the terms of DataRobot Tool and Utility Agreement.
+
+import pytest
+
+from YoutubeForecastMaker.devtools.fake_datarobot_api import DEFAULT_DATE_FORMAT
+from YoutubeForecastMaker.pipelines.deploy_forecast.nodes import ensure_deployment_settings
+
+from ...conftest import TOKEN
+
+GET_SETTINGS = "GET deployments/{id}/settings/"
+PATCH_SETTINGS = "PATCH deployments/{id}/settings/"
+
+
+@pytest.mark.parametrize("v2_date_formats", [False, True])
+@pytest.mark.parametrize("association_id", [None, "association_id"])
+def test_reconciling_unchanged_settings_is_a_single_read(
+    datarobot_api, datarobot_server, v2_date_formats, association_id
+):
+    datarobot_api.v2_date_formats = v2_date_formats
+    deployment_id = datarobot_api.add_deployment()
+
+    def ensure() -> None:
+        ensure_deployment_settings(
+            datarobot_server.url,
+            TOKEN,
+            deployment_id,
+            "as_of_datetime",
+            80,
+            DEFAULT_DATE_FORMAT,
+            association_id,
+        )
+
+    ensure()
+    settings = datarobot_api.deployments[deployment_id]["settings"]
+    assert settings["predictionIntervals"]["percentiles"] == [80]
+    assert settings["predictionsByForecastDate"]["datetimeFormat"] == (
+        "v2" + DEFAULT_DATE_FORMAT if v2_date_formats else DEFAULT_DATE_FORMAT
+    )
+    first_run = datarobot_api.stats()
+    assert first_run["requests"][PATCH_SETTINGS]
+    # Deployments that want the "v2" variant reject the plain date format first
+    assert bool(first_run["errors"]) == v2_date_formats
+
+    datarobot_api.reset_stats()
+    ensure()
+    # The date format variant the deployment accepted is kept, so nothing differs
+    assert datarobot_api.stats()["requests"] == {GET_SETTINGS: 1}
@@ -0,0 +1,114 @@
+# Copyright 2024 DataRobot, Inc. and its affiliates.
+# All rights reserved.
+# DataRobot, Inc.
+# This is proprietary source code of DataRobot, Inc. and its
+# affiliates.
+# Released under the terms of DataRobot Tool and Utility Agreement.
+
+import hashlib
+import json
+from typing import Any, Dict
+
+import pytest
+from PIL import Image
+
+from YoutubeForecastMaker.pipelines.deploy_streamlit_app.nodes import (
+    _write_build_record,
+    make_app_build_manifest,
+)
+
+from ...conftest import TOKEN
+
+SECRETS_TEMPLATE = (
+    'datarobot_endpoint = "<datarobot_endpoint>"\n'
+    'datarobot_api_token = "<datarobot_api_token>"\n'
+    'azure_endpoint = "<azure_endpoint>"\n'
+    'azure_api_key = "<azure_api_key>"\n'
+    'azure_api_version = "<azure_api_version>"\n'
+)
+
+
+@pytest.fixture
+def build_inputs(datarobot_server) -> Dict[str, Any]:
+    return {
+        "endpoint": datarobot_server.url,
+        "token": TOKEN,
+        "azure_endpoint": "https://azure.example.com",
+        "azure_api_key": "azure-key",
+        "azure_api_version": "2024-02-01",
+        "app_py": "import streamlit as st\n",
+        "helpers_py": "def helper():\n    pass\n",
+        "app_parameters_yml": {"page_title": "Forecasts"},
+        "requirements": "streamlit\n",
+        "dockerfile": "FROM python:3.11\n",
+        "logo": Image.new("RGB", (8, 8), "white"),
+        "style_css": "body {}\n",
+        "config_toml": "[theme]\n",
+        "secrets_template": SECRETS_TEMPLATE,
+    }
+
+
+@pytest.fixture
+def built(tmp_path, datarobot_api, build_inputs) -> Dict[str, Any]:
+    """Inputs of a recorded, successful build."""
+    environment_id, version_id = datarobot_api.add_execution_environment_version()
+    record_path = str(tmp_path / "app_build.json")
+    app_build = make_app_build_manifest(
+        execution_environment_id=environment_id, build_record_filepath=record_path, **build_inputs
+    )
+    assert app_build["execution_environment_version_id"] is None
+    _write_build_record(record_path, app_build, environment_id, version_id)
+    return {
+        **build_inputs,
+        "execution_environment_id": environment_id,
+        "build_record_filepath": record_path,
+        "version_id": version_id,
+    }
+
+
+def _rebuild(built: Dict[str, Any], **changes: Any) -> Dict[str, Any]:
+    inputs = {key: value for key, value in built.items() if key != "version_id"}
+    return make_app_build_manifest(**{**inputs, **changes})
+
+
+def test_unchanged_app_skips_the_build(built):
+    assert _rebuild(built)["execution_environment_version_id"] == built["version_id"]
+
+
+@pytest.mark.parametrize(
+    "changes",
+    [
+        {"app_py": "import streamlit as st\nst.title('Forecasts')\n"},
+        {"logo": Image.new("RGB", (8, 8), "black")},
+        {"app_parameters_yml": {"page_title": "Other forecasts"}},
+        {"azure_api_key": "rotated-key"},
+        {"token": "rotated-token"},
+    ],
+    ids=["file", "logo", "parameters", "azure credential", "datarobot token"],
+)
+def test_any_change_triggers_a_build(built, changes):
+    assert _rebuild(built, **changes)["execution_environment_version_id"] is None
+
+
+def test_failed_build_is_not_reused(datarobot_api, built):
+    datarobot_api.execution_environments[built["execution_environment_id"]][built["version_id"]][
+        "buildStatus"
+    ] = "failed"
+    assert _rebuild(built)["execution_environment_version_id"] is None
+
+
+def test_record_cannot_be_checked_against_guessed_credentials(built):
+    with open(built["build_record_filepath"]) as f:
+        record = f.read()
+    rendered = (
+        SECRETS_TEMPLATE.replace("<datarobot_endpoint>", built["endpoint"])
+        .replace("<datarobot_api_token>", TOKEN)
+        .replace("<azure_endpoint>", built["azure_endpoint"])
+        .replace("<azure_api_key>", built["azure_api_key"])
+        .replace("<azure_api_version>", built["azure_api_version"])
+    )
+    assert TOKEN not in json.loads(record).values()
+    assert built["azure_api_key"] not in record
+    # Without the key the digest can't be recomputed from the secrets alone
+    assert hashlib.sha256(rendered.encode()).hexdigest() not in record
+    assert "salt" not in json.loads(record)
@@ -0,0 +1,99 @@
+# Copyright 2024 DataRobot, Inc. and its affiliates.
+# All rights reserved.
+# DataRobot, Inc.
+# This is proprietary source code of DataRobot, Inc. and its
+# affiliates.
+# Released under the terms of DataRobot Tool and Utility Agreement.
+
+import math
+
+import pandas as pd
+import pytest
+
+from YoutubeForecastMaker.common.schemas import apply_metadata_schema
+from YoutubeForecastMaker.devtools.synthetic_data import generate_metadata
+from YoutubeForecastMaker.pipelines.get_data_pipeline.nodes import (
+    YOUTUBE_MAX_IDS_PER_REQUEST,
+    get_videos,
+    pull_video_data,
+    update_or_create_metadataset,
+)
+
+METADATASET = "Music Video Meta Data"
+CREATE = "POST datasets/fromFile/"
+ADD_VERSION = "POST datasets/{id}/versions/fromFile/"
+DOWNLOADS = ["GET datasets/{id}/file/", "GET datasets/{id}/versions/{id}/file/"]
+API_KEY = "key"
+
+
+@pytest.fixture
+def videos(youtube_api, youtube_server) -> list:
+    return get_videos(list(youtube_api.catalog.playlists), API_KEY, api_url=youtube_server.url)
+
+
+@pytest.fixture
+def metadata() -> pd.DataFrame:
+    return apply_metadata_schema(generate_metadata(20, seed=1))
+
+
+@pytest.mark.parametrize("cached", [True, False])
+def test_metadataset_without_incremental_ingestion(tmp_path, datarobot_api, datarobot_server, metadata, cached):
+    metadata_refresh = {"incremental": False}
+    if cached:
+        metadata_refresh["cache_filepath"] = str(tmp_path / "metadata.parquet")
+    renamed = metadata.assign(title=metadata["title"].astype(str).replace({metadata["title"][0]: "Renamed"}))
+
+    for data_frame in [metadata, metadata, renamed]:
+        update_or_create_metadataset(METADATASET, data_frame, metadata_refresh=metadata_refresh)
+
+    requests = datarobot_api.stats()["requests"]
+    assert requests[CREATE] == 1
+    # With a cache only the renamed video adds a version, without one every run does
+    assert requests[ADD_VERSION] == (1 if cached else 2)
+    # The metadataset itself is never downloaded to compare
+    assert not any(requests.get(route) for route in DOWNLOADS)
+
+
+def test_videos_are_pulled_in_batches(youtube_api, youtube_server, videos):
+    metadata_videos = videos[:70]
+    youtube_api.reset_stats()
+
+    video_data = pull_video_data(
+        videos, API_KEY, metadata_videos=metadata_videos, api_url=youtube_server.url
+    )
+
+    # One request per batch of ids, metadata and statistics-only videos batched separately
+    n_requests = sum(
+        math.ceil(n / YOUTUBE_MAX_IDS_PER_REQUEST) for n in [70, len(videos) - 70]
+    )
+    assert youtube_api.stats()["requests"] == {"videos": n_requests}
+    # Private and deleted videos are left out, the rest keep their enumeration order
+    missing = youtube_api.catalog.missing
+    assert missing
+    assert list(video_data) == [video_id for video_id in videos if video_id not in missing]
+    for video_id, item in video_data.items():
+        assert item["id"] == video_id
+        assert ("snippet" in item) == (video_id in metadata_videos)
+
+
+def test_async_collector_matches_sequential(youtube_api, youtube_server, videos):
+    metadata_videos = videos[::2]
+    sequential = pull_video_data(
+        videos, API_KEY, metadata_videos=metadata_videos, api_url=youtube_server.url
+    )
+
+    # Throttling and server errors are retried until every batch succeeds
+    youtube_api.error_rate = 0.3
+    youtube_api.error_codes = [429, 500, 503]
+    youtube_api.reset_stats()
+    concurrent = pull_video_data(
+        videos,
+        API_KEY,
+        metadata_videos=metadata_videos,
+        collector={"mode": "async", "max_concurrency": 4, "timeout_secs": 5, "max_retries": 8},
+        api_url=youtube_server.url,
+    )
+
+    assert youtube_api.stats()["errors"]
+    assert concurrent == sequential
+    assert list(concurrent) == list(sequential)
@@ -0,0 +1,26 @@
+# Copyright 2024 DataRobot, Inc. and its affiliates.
+# All rights reserved.
+# DataRobot, Inc.
+# This is proprietary source code of DataRobot, Inc. and its
+# affiliates.
+# Released under the terms of DataRobot Tool and Utility Agreement.
+
+import pandas as pd
+import pytest
+
+from YoutubeForecastMaker.devtools.synthetic_data import generate_metadata, generate_timeseries
+
+# Fixed so the data doesn't depend on the day the tests run
+END = "2024-06-30 23:30:00"
+
+
+@pytest.fixture
+def metadata() -> pd.DataFrame:
+    """Raw metadata of 40 videos, some of them without tags."""
+    return generate_metadata(40, seed=1)
+
+
+@pytest.fixture
+def raw_ts_data(metadata: pd.DataFrame) -> pd.DataFrame:
+    """Two days of half-hourly snapshots with missed pulls and duplicated rows."""
+    return generate_timeseries(metadata, days=2, end=END, seed=1)
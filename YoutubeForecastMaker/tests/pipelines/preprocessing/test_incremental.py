@@ -0,0 +1,77 @@
+# Copyright 2024 DataRobot, Inc. and its affiliates.
+# All rights reserved.
+# DataRobot, Inc.
+# This is proprietary source code of DataRobot, Inc. and its
+# affiliates.
+# Released under the terms of DataRobot Tool and Utility Agreement.
+
+from typing import Any, Dict
+
+import pandas as pd
+import pytest
+
+from YoutubeForecastMaker.common.schemas import to_upload_frame, to_wall_time
+from YoutubeForecastMaker.devtools.synthetic_data import generate_timeseries
+from YoutubeForecastMaker.pipelines.preprocessing.nodes import downsample_timeseries, join_metadata
+
+DOWNSAMPLING = {
+    "every_third": {"method": "every_third"},
+    "grid": {"method": "grid", "freq": "90min", "fill_gaps": False},
+    "grid_fill_gaps": {"method": "grid", "freq": "90min", "fill_gaps": True},
+    # Finer than the hour that repeats when daylight saving time ends
+    "grid_30min": {"method": "grid", "freq": "30min", "fill_gaps": False},
+}
+
+
+@pytest.fixture
+def dst_raw_ts_data(metadata: pd.DataFrame) -> pd.DataFrame:
+    """Half-hourly snapshots across the end of daylight saving time in New York.
+
+    Stored as naive wall-clock times like the time series dataset, so the snapshots of
+    01:00 to 01:59 appear twice with the same `as_of_datetime`, in the order they were pulled.
+    """
+    raw_ts_data = generate_timeseries(metadata, days=1, end="2024-11-03 14:00:00", seed=2)
+    as_of = raw_ts_data["as_of_datetime"].dt.tz_localize("UTC")
+    return raw_ts_data.assign(as_of_datetime=to_wall_time(as_of))
+
+
+def _incremental_runs(raw_ts_data: pd.DataFrame, downsampling: Dict[str, Any], engine: str) -> pd.DataFrame:
+    """Run after every pull, each time on the history so far, and concatenate the kept rows."""
+    # Rows of a pull are contiguous, repeated wall-clock times belong to different pulls
+    pull = (raw_ts_data["as_of_datetime"] != raw_ts_data["as_of_datetime"].shift()).cumsum()
+    outputs, watermarks = [], None
+    for last_pull in range(1, pull.max() + 1):
+        new_timeseries, watermarks = downsample_timeseries(
+            raw_ts_data[pull <= last_pull], watermarks, downsampling, engine
+        )
+        outputs.append(new_timeseries)
+    return pd.concat(outputs, ignore_index=True)
+
+
+def _assert_incremental_matches_full(metadata, raw_ts_data, downsampling, engine="pandas"):
+    full, _ = downsample_timeseries(raw_ts_data, downsampling=downsampling)
+    incremental = _incremental_runs(raw_ts_data, downsampling, engine)
+
+    assert len(full)
+    pd.testing.assert_frame_equal(
+        to_upload_frame(join_metadata(metadata, incremental)),
+        to_upload_frame(join_metadata(metadata, full)),
+    )
+
+
+@pytest.mark.parametrize("downsampling", DOWNSAMPLING.values(), ids=DOWNSAMPLING.keys())
+def test_incremental_runs_match_full_recompute(metadata, raw_ts_data, downsampling):
+    _assert_incremental_matches_full(metadata, raw_ts_data, downsampling)
+
+
+@pytest.mark.parametrize("downsampling", DOWNSAMPLING.values(), ids=DOWNSAMPLING.keys())
+def test_incremental_runs_across_daylight_saving_time_match_full_recompute(
+    metadata, dst_raw_ts_data, downsampling
+):
+    assert dst_raw_ts_data["as_of_datetime"].dt.strftime("%Y-%m-%d %H").eq("2024-11-03 01").sum() > 4 * len(metadata)
+    _assert_incremental_matches_full(metadata, dst_raw_ts_data, downsampling)
+
+
+def test_incremental_polars_runs_across_daylight_saving_time_match_full_recompute(metadata, dst_raw_ts_data):
+    pytest.importorskip("polars")
+    _assert_incremental_matches_full(metadata, dst_raw_ts_data, DOWNSAMPLING["every_third"], engine="polars")
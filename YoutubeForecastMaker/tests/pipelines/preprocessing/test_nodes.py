@@ -0,0 +1,55 @@
+# Copyright 2024 DataRobot, Inc. and its affiliates.
+# All rights reserved.
+# DataRobot, Inc.
+# This is proprietary source code of DataRobot, Inc. and its
+# affiliates.
+# Released under the terms of DataRobot Tool and Utility Agreement.
+
+import io
+
+import pandas as pd
+
+from YoutubeForecastMaker.common.schemas import to_upload_frame
+from YoutubeForecastMaker.pipelines.preprocessing.nodes import prepare_modeling_data
+
+
+def _groupby_apply_modeling_data(metadata_df: pd.DataFrame, raw_ts_data: pd.DataFrame) -> pd.DataFrame:
+    """The groupby/apply implementation that `prepare_modeling_data` replaced."""
+    new_data = pd.merge(metadata_df, raw_ts_data, on="video_id", how="inner").reset_index(drop=True)
+    new_data["as_of_datetime"] = pd.to_datetime(new_data["as_of_datetime"], errors="coerce")
+    new_data = new_data.sort_values(["video_id", "as_of_datetime"])
+    new_data = new_data.drop_duplicates(subset=["video_id", "viewCount", "as_of_datetime"])
+    new_data = new_data.groupby("video_id").apply(lambda group: group.iloc[::3]).reset_index(drop=True)
+    new_data["viewDiff"] = new_data.groupby("video_id")["viewCount"].diff()
+    new_data["likeDiff"] = new_data.groupby("video_id")["likeCount"].diff()
+    new_data["commentDiff"] = new_data.groupby("video_id")["commentCount"].diff()
+    new_data.fillna(0, inplace=True)
+    new_data["viewDiff"] = new_data["viewDiff"].apply(lambda x: max(x, 0))
+    return new_data
+
+
+def _as_uploaded(data_frame: pd.DataFrame) -> pd.DataFrame:
+    """The frame as the AI Catalog reads it back from the uploaded CSV."""
+    buffer = io.StringIO()
+    data_frame.to_csv(buffer, index=False)
+    buffer.seek(0)
+    return pd.read_csv(buffer)
+
+
+def test_prepare_modeling_data_matches_groupby_apply(metadata, raw_ts_data):
+    expected = _as_uploaded(_groupby_apply_modeling_data(metadata, raw_ts_data))
+    actual = _as_uploaded(to_upload_frame(prepare_modeling_data(metadata, raw_ts_data)))
+
+    assert list(actual.columns) == list(expected.columns)
+    # Diffs used to be floats, 34.0 and 34 are the same value once uploaded
+    pd.testing.assert_frame_equal(actual, expected, check_dtype=False)
+
+
+def test_missing_tags_are_uploaded_as_zero(metadata, raw_ts_data):
+    untagged = metadata.loc[metadata["tags"].isna(), "video_id"]
+    assert len(untagged)
+
+    modeling_data = prepare_modeling_data(metadata, raw_ts_data)
+
+    tags = modeling_data.loc[modeling_data["video_id"].isin(untagged), "tags"]
+    assert (tags == "0").all()
@@ -0,0 +1,50 @@
+# Copyright 2024 DataRobot, Inc. and its affiliates.
+# All rights reserved.
+# DataRobot, Inc.
+# This is proprietary source code of DataRobot, Inc. and its
+# affiliates.
+# Released under the terms of DataRobot Tool and Utility Agreement.
+
+import pandas as pd
+import pytest
+
+pytest.importorskip("polars")
+
+from YoutubeForecastMaker.pipelines.preprocessing.nodes import (  # noqa: E402
+    _watermark_schema,
+    empty_watermarks,
+    thin_timeseries,
+)
+from YoutubeForecastMaker.pipelines.preprocessing.polars_engine import (  # noqa: E402
+    thin_timeseries_polars,
+)
+
+
+def _assert_same_output(raw_ts_data: pd.DataFrame, watermarks: pd.DataFrame) -> None:
+    expected_data, expected_watermarks = thin_timeseries(raw_ts_data, watermarks)
+    actual_data, actual_watermarks = thin_timeseries_polars(raw_ts_data, watermarks)
+
+    assert len(expected_data)
+    pd.testing.assert_frame_equal(actual_data, expected_data)
+    # Watermark row order isn't part of the contract
+    pd.testing.assert_frame_equal(
+        _watermark_schema(actual_watermarks).sort_values("video_id", ignore_index=True),
+        expected_watermarks.sort_values("video_id", ignore_index=True),
+        check_categorical=False,
+    )
+
+
+def test_full_history_matches_pandas(raw_ts_data):
+    _assert_same_output(raw_ts_data, empty_watermarks())
+
+
+@pytest.mark.parametrize("new_pulls", [1, 3, 7])
+def test_incremental_run_matches_pandas(raw_ts_data, new_pulls):
+    pulls = raw_ts_data["as_of_datetime"].drop_duplicates().sort_values()
+    is_history = raw_ts_data["as_of_datetime"] < pulls.iloc[-new_pulls]
+    # Videos added to a playlist since the last run have no watermark yet
+    new_videos = raw_ts_data["video_id"].drop_duplicates().iloc[:5]
+    _, watermarks = thin_timeseries(raw_ts_data[is_history & ~raw_ts_data["video_id"].isin(new_videos)])
+
+    new_snapshots = ~is_history | raw_ts_data["video_id"].isin(new_videos)
+    _assert_same_output(raw_ts_data[new_snapshots], watermarks)
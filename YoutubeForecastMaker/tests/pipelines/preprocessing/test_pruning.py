@@ -0,0 +1,61 @@
+# Copyright 2024 DataRobot, Inc. and its affiliates.
+# All rights reserved.
+# DataRobot, Inc.
+# This is proprietary source code of DataRobot, Inc. and its
+# affiliates.
+# Released under the terms of DataRobot Tool and Utility Agreement.
+
+import pytest
+
+from YoutubeForecastMaker.pipelines.preprocessing.nodes import (
+    _delete_dataset_version,
+    remove_old_retraining_data,
+)
+
+from ...conftest import TOKEN
+
+DATASET = "Modeling Data"
+LIST_VERSIONS = "GET datasets/{id}/versions/"
+DELETE_VERSION = "DELETE datasets/{id}/versions/{id}/"
+# More versions than fit on one page of the versions listing
+N_VERSIONS = 110
+
+
+def _version_ids(datarobot_api, dataset_id):
+    return [version["versionId"] for version in datarobot_api.datasets[dataset_id]["versions"]]
+
+
+@pytest.mark.parametrize(
+    "retention, n_kept",
+    [
+        ({"prune_above": 75, "keep_latest": 50}, 50),
+        # Versions are an hour apart, so the last three days are 72 versions
+        ({"prune_above": 75, "keep_latest": 50, "keep_newer_than_days": 3}, 72),
+        ({"prune_above": 75, "keep_latest": 10, "keep_newer_than_days": 0.1}, 10),
+        ({"prune_above": N_VERSIONS, "keep_latest": 10}, N_VERSIONS),
+    ],
+)
+def test_pruning_keeps_the_retained_versions(datarobot_api, datarobot_server, retention, n_kept):
+    dataset_id = datarobot_api.add_dataset(DATASET, N_VERSIONS, hours_between_versions=1)
+    version_ids = _version_ids(datarobot_api, dataset_id)
+
+    remove_old_retraining_data(
+        datarobot_server.url, TOKEN, {"modeling": DATASET}, {**retention, "max_workers": 4}
+    )
+
+    assert _version_ids(datarobot_api, dataset_id) == version_ids[-n_kept:]
+    requests = datarobot_api.stats()["requests"]
+    assert requests[LIST_VERSIONS] == 2
+    assert requests.get(DELETE_VERSION, 0) == N_VERSIONS - n_kept
+
+
+def test_deleting_a_deleted_version_succeeds(datarobot_api, datarobot_server):
+    dataset_id = datarobot_api.add_dataset(DATASET, 3)
+    version_id = _version_ids(datarobot_api, dataset_id)[0]
+
+    _delete_dataset_version(dataset_id, version_id, max_retries=0)
+    # An overlapping run already deleted it
+    _delete_dataset_version(dataset_id, version_id, max_retries=0)
+
+    assert version_id not in _version_ids(datarobot_api, dataset_id)
+    assert datarobot_api.stats()["errors"] == {"404": 1}
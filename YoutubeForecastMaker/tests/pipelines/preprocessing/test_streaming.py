@@ -0,0 +1,60 @@
+# Copyright 2024 DataRobot, Inc. and its affiliates.
+# All rights reserved.
+# DataRobot, Inc.
+# This is proprietary source code of DataRobot, Inc. and its
+# affiliates.
+# Released under the terms of DataRobot Tool and Utility Agreement.
+
+import pandas as pd
+import pytest
+
+from YoutubeForecastMaker.common.schemas import to_upload_frame
+from YoutubeForecastMaker.pipelines.preprocessing.nodes import prepare_modeling_data
+from YoutubeForecastMaker.pipelines.preprocessing.streaming import stream_modeling_data
+
+
+@pytest.fixture
+def raw_ts_data_with_old_videos(raw_ts_data: pd.DataFrame) -> pd.DataFrame:
+    """Snapshots where the videos with the lowest ids stopped being pulled 100 minutes early.
+
+    Those videos share the first bucket, whose newest snapshot lies before the newest
+    snapshot of the whole time series.
+    """
+    old_videos = sorted(raw_ts_data["video_id"].unique())[:10]
+    cutoff = raw_ts_data["as_of_datetime"].max() - pd.Timedelta(minutes=100)
+    is_dropped = raw_ts_data["video_id"].isin(old_videos) & (raw_ts_data["as_of_datetime"] > cutoff)
+    return raw_ts_data[~is_dropped].reset_index(drop=True)
+
+
+@pytest.mark.parametrize(
+    "downsampling",
+    [
+        {"method": "every_third"},
+        {"method": "grid", "freq": "90min", "fill_gaps": False},
+        {"method": "grid", "freq": "90min", "fill_gaps": True},
+    ],
+)
+def test_streaming_matches_in_memory(tmp_path, metadata, raw_ts_data_with_old_videos, downsampling):
+    raw_ts_data = raw_ts_data_with_old_videos
+    csv_path = tmp_path / "raw_timeseries.csv"
+    raw_ts_data.to_csv(csv_path, index=False)
+    output_path = tmp_path / "modeling_data.csv"
+
+    stream_modeling_data(
+        csv_path,
+        metadata,
+        output_path,
+        tmp_path / "buckets",
+        # A few videos per bucket
+        memory_budget_mb=0.2,
+        chunksize=500,
+        downsampling=downsampling,
+    )
+
+    in_memory_path = tmp_path / "in_memory.csv"
+    to_upload_frame(prepare_modeling_data(metadata, raw_ts_data, downsampling)).to_csv(
+        in_memory_path, index=False
+    )
+    streamed = pd.read_csv(output_path)
+    assert len(streamed)
+    pd.testing.assert_frame_equal(streamed, pd.read_csv(in_memory_path))
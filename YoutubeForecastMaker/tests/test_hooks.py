@@ -0,0 +1,111 @@
+# Copyright 2024 DataRobot, Inc. and its affiliates.
+# All rights reserved.
+# DataRobot, Inc.
+# This is proprietary source code of DataRobot, Inc. and its
+# affiliates.
+# Released under the terms of DataRobot Tool and Utility Agreement.
+
+import threading
+from typing import Any, Callable, Dict, List
+
+import datarobot as dr
+import pytest
+from datarobot.rest import RESTClientObject
+from kedro.framework.hooks.manager import _create_hook_manager
+from kedro.io import DataCatalog
+from kedro.pipeline import node, pipeline
+from kedro.runner import ThreadRunner
+
+from YoutubeForecastMaker.common.datarobot_client import configure_client, rest_client
+from YoutubeForecastMaker.devtools.fake_datarobot_api import FakeDataRobotApi, FakeDataRobotServer
+from YoutubeForecastMaker.hooks import ENDPOINT_PARAM, TOKEN_PARAM, DataRobotClientHooks
+
+N_NODES = 4
+
+
+@pytest.fixture
+def datarobot_endpoint():
+    with FakeDataRobotServer(FakeDataRobotApi()) as server:
+        yield server.url
+
+
+def _run_on_threads(funcs: List[Callable[[str, str], None]], datarobot_endpoint: str) -> RESTClientObject:
+    """Run every function as a node on its own ThreadRunner thread, return the client configured by the hooks."""
+    nodes = pipeline(
+        [node(func, [ENDPOINT_PARAM, TOKEN_PARAM], None, name=f"node_{i}") for i, func in enumerate(funcs)]
+    )
+    catalog = DataCatalog(feed_dict={ENDPOINT_PARAM: datarobot_endpoint, TOKEN_PARAM: "token"})
+    hooks = DataRobotClientHooks()
+    hook_manager = _create_hook_manager()
+    hook_manager.register(hooks)
+
+    hooks.before_pipeline_run({}, nodes, catalog)
+    global_client = dr.client.get_client()
+    ThreadRunner(max_workers=len(funcs)).run(nodes, catalog, hook_manager)
+    return global_client
+
+
+def test_nodes_on_runner_threads_get_their_own_client(datarobot_endpoint):
+    # Every node waits for the others, so they all run at the same time on different threads
+    barrier = threading.Barrier(N_NODES, timeout=10)
+    # Collected here rather than returned, Kedro would hand copies to the runner
+    records: List[Dict[str, Any]] = []
+
+    def record_client(endpoint: str, token: str) -> None:
+        barrier.wait()
+        # Like the pipeline nodes, a no-op once the hook configured the client
+        configure_client(endpoint, token)
+        client = dr.client.get_client()
+        # An SDK call through the node's client
+        dr.Dataset.list()
+        records.append(
+            {"thread": threading.get_ident(), "client": client, "rest_client": rest_client()}
+        )
+
+    global_client = _run_on_threads([record_client] * N_NODES, datarobot_endpoint)
+
+    assert len(records) == N_NODES
+    assert len({record["thread"] for record in records}) == N_NODES
+    assert len({id(record["client"]) for record in records}) == N_NODES
+    for record in records:
+        assert record["client"] is not global_client
+        assert record["rest_client"] is record["client"]
+        assert record["client"].endpoint == global_client.endpoint
+    # The global client was configured once and never replaced
+    assert dr.client.get_client() is global_client
+
+
+def test_nodes_keep_their_client_when_a_node_replaces_the_global_one(datarobot_endpoint):
+    barrier = threading.Barrier(N_NODES, timeout=10)
+    replaced = threading.Event()
+    replacements: List[RESTClientObject] = []
+    records: List[Dict[str, Any]] = []
+
+    def replace_client(endpoint: str, token: str) -> None:
+        barrier.wait()
+        # Like the datarobotx.idp helpers some nodes call
+        replacements.append(dr.Client(endpoint=endpoint, token=token))
+        replaced.set()
+
+    def record_client(endpoint: str, token: str) -> None:
+        client = dr.client.get_client()
+        barrier.wait()
+        assert replaced.wait(10)
+        dr.Dataset.list()
+        records.append({"client": client, "after_replacement": dr.client.get_client()})
+
+    global_client = _run_on_threads([replace_client] + [record_client] * (N_NODES - 1), datarobot_endpoint)
+
+    (replacement,) = replacements
+    assert len(records) == N_NODES - 1
+    for record in records:
+        assert record["after_replacement"] is record["client"]
+        assert record["client"] not in (global_client, replacement)
+    # Threads that didn't configure a client themselves, like the runner's, copy the replacement
+    clients: List[RESTClientObject] = []
+    thread = threading.Thread(target=lambda: clients.extend([dr.client.get_client(), rest_client()]))
+    thread.start()
+    thread.join()
+    assert clients[0] is replacement
+    assert clients[1] is not replacement
+    assert clients[1].endpoint == replacement.endpoint